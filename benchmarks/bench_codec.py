@@ -0,0 +1,73 @@
+'''
+Throughput of the language codec and the decoders over a generated
+corpus of messages (see corpus.py), per kind of message: MB/s and
+messages/s for pack, translate_from_bytes, fold, the decoders.py
+decoder where there is one, and parsing the printed notation.
+
+    python benchmarks/bench_codec.py
+    python benchmarks/bench_codec.py --count 5000 --seed 3 --depth 5
+'''
+import argparse
+import time
+
+import corpus
+import decoders
+import notation
+from language import Message
+
+
+def throughput(func, items, nbytes, min_time=0.2):
+    '''
+    Returns (messages per second, MB per second) for func over items.
+    '''
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            func(item)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    return runs * len(items) / elapsed, runs * nbytes / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure codec throughput on generated messages.')
+    parser.add_argument('--count', type=int, default=2000, help='messages to generate')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--depth', type=int, default=3, help='maximum press nesting')
+    args = parser.parse_args()
+
+    generator = corpus.Generator(args.seed, args.depth)
+    board_map = generator.map()
+    by_kind = {}
+    for kind, msg in generator.corpus(board_map, args.count):
+        by_kind.setdefault(kind, []).append(msg)
+
+    stages = [
+        ('pack', lambda msgs: msgs, Message.pack),
+        ('translate', lambda msgs: [msg.pack() for msg in msgs], Message.translate_from_bytes),
+        ('fold', lambda msgs: msgs, Message.fold),
+        ('decode', lambda msgs: [msg.pack() for msg in msgs], decoders.decode),
+        ('parse', lambda msgs: [str(msg) for msg in msgs], notation.parse_packed),
+    ]
+    print('%-5s %5s %9s' % ('', '', 'bytes') + ''.join('%21s' % name for name, _, _ in stages))
+    print('%-5s %5s %9s' % ('kind', 'msgs', 'per msg') + '%14s %6s' % ('msg/s', 'MB/s') * len(stages))
+    for kind in corpus.KINDS:
+        msgs = by_kind.get(kind)
+        if not msgs:
+            continue
+        nbytes = sum(len(msg) * 2 for msg in msgs)
+        row = '%-5s %5d %9.0f' % (kind, len(msgs), nbytes / len(msgs))
+        for name, prepare, func in stages:
+            if name == 'decode' and kind not in (str(command) for command in decoders.decoders):
+                row += '%21s' % '-'
+                continue
+            rate, mb = throughput(func, prepare(msgs), nbytes)
+            row += '%14.0f %6.1f' % (rate, mb)
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+'''
+Compares the schema-driven decoders against the Token list + fold()
+path on standard-map messages.
+
+    python benchmarks/bench_decoders.py
+'''
+import timeit
+
+import fixtures
+from language import Message
+from decoders import decode_MDF, decode_HLO, decode_NOW, decode_SCO, decode_ORD
+
+
+CASES = [
+    ('MDF', fixtures.STANDARD_MDF, decode_MDF, 50),
+    ('HLO', fixtures.HLO, decode_HLO, 2000),
+    ('NOW', fixtures.NOW_SPR, decode_NOW, 500),
+    ('NOW (MRT)', fixtures.NOW_AUT, decode_NOW, 500),
+    ('SCO', fixtures.SCO, decode_SCO, 1000),
+    ('ORD', fixtures.ORD[8], decode_ORD, 2000),
+]
+
+
+def per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print('%-10s %14s %14s %14s %14s' % ('message', 'bytes+fold us', 'bytes+decode', 'fold us', 'decode us'))
+    for name, text, decoder, number in CASES:
+        data = fixtures.packed(text)
+        msg = Message.translate_from_bytes(data)
+        old_bytes = per_call(lambda: Message.translate_from_bytes(data).fold(), number)
+        new_bytes = per_call(lambda: decoder(data), number)
+        old_msg = per_call(lambda: msg.fold(), number)
+        new_msg = per_call(lambda: decoder(msg), number)
+        print('%-10s %14.1f %14.1f %14.1f %14.1f' % (name, old_bytes, new_bytes, old_msg, new_msg))
+
+
+if __name__ == '__main__':
+    main()
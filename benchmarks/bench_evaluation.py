@@ -0,0 +1,60 @@
+'''
+Compares evaluating positions one call at a time with batching them
+through an EvaluationQueue, for many bot threads sharing one evaluator
+whose calls have a fixed overhead (as a model's do) plus a small cost
+per position.
+
+    python benchmarks/bench_evaluation.py
+'''
+import threading
+import time
+
+import fixtures  # puts pydip on the path
+import evaluation
+
+BOTS = 32
+REQUESTS = 20
+CALL_OVERHEAD = 0.0005
+ITEM_COST = 0.00001
+
+
+def model(items):
+    time.sleep(CALL_OVERHEAD + ITEM_COST * len(items))
+    return [0.0] * len(items)
+
+
+def run(evaluate):
+    def bot():
+        for i in range(REQUESTS):
+            evaluate(i)
+
+    threads = [threading.Thread(target=bot) for i in range(BOTS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return BOTS * REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    # The model isn't thread-safe, so direct callers take turns
+    lock = threading.Lock()
+
+    def direct(item):
+        with lock:
+            return model([item])[0]
+
+    print('one at a time: %8.0f positions/s' % run(direct))
+    for max_batch, max_delay in ((8, 0.001), (32, 0.001), (32, 0.005)):
+        queue = evaluation.EvaluationQueue(model, max_batch, max_delay)
+        rate = run(queue.evaluate)
+        queue.close()
+        stats = queue.stats()
+        print('batch %2d, delay %.0f ms: %8.0f positions/s, mean batch %.1f, queue p50 %.1f ms p99 %.1f ms'
+              % (max_batch, max_delay * 1e3, rate, stats['mean_batch'],
+                 stats['queue_latency']['p50'] * 1e3, stats['queue_latency']['p99'] * 1e3))
+
+
+if __name__ == '__main__':
+    main()
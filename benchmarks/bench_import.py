@@ -0,0 +1,71 @@
+'''
+Measures the cost of importing language: compiling it, loading its
+cached bytecode and executing it (best of many runs), and then the
+import and bot startup (importing RandBot and constructing one) in
+fresh interpreters, which is noisier.
+
+    python benchmarks/bench_import.py
+
+Per-module detail is available from
+    python -X importtime -c "import language"
+'''
+import marshal
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PYDIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pydip')
+RUNS = 25
+
+SNIPPETS = {
+    'import language': 'import language',
+    'bot startup': 'import RandBot; RandBot.RandBot()',
+}
+
+
+def timed(snippet, env):
+    code = ('import time; t = time.perf_counter(); %s; '
+            'print(time.perf_counter() - t)' % snippet)
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=PYDIP, env=env)
+    return float(out)
+
+
+def best(func, runs=300):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def module_costs():
+    sys.path.insert(0, PYDIP)
+    with open(os.path.join(PYDIP, 'language.py')) as f:
+        source = f.read()
+    code = compile(source, 'language.py', 'exec')
+    data = marshal.dumps(code)
+    print('language.py: compile %.0f us, unmarshal %.0f us, exec %.0f us' % (
+        best(lambda: compile(source, 'language.py', 'exec'), 10) * 1e6,
+        best(lambda: marshal.loads(data)) * 1e6,
+        best(lambda: exec(code, {'__name__': 'language'})) * 1e6))
+
+
+def main():
+    module_costs()
+    cached = dict(os.environ)
+    cached.pop('PYTHONDONTWRITEBYTECODE', None)
+    # An empty cache prefix, so that no .pyc is read or written
+    uncached = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', PYTHONPYCACHEPREFIX=tempfile.mkdtemp())
+    for label, env in (('bytecode cached', cached), ('no bytecode', uncached)):
+        for name, snippet in SNIPPETS.items():
+            timed(snippet, env)
+            samples = [timed(snippet, env) for i in range(RUNS)]
+            print('%-16s %-16s median %6.2f ms' % (label, name, statistics.median(samples) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+'''
+Measures the memory a Gameboard holds for the standard map, built from
+the MDF as usual and attached to shared map tables (see maptables.py),
+and the cost of a memoized adjacency query from each.
+
+    python benchmarks/bench_maptables.py
+'''
+import tempfile
+import timeit
+import tracemalloc
+
+import fixtures
+import maptables
+from gameboard import Gameboard
+from language import *
+
+BOARDS = 20
+
+
+def retained(make):
+    '''
+    Returns the bytes held per Gameboard, keeping BOARDS of them alive.
+    '''
+    make()
+    tracemalloc.start()
+    boards = [make() for i in range(BOARDS)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del boards
+    return size / BOARDS
+
+
+def main():
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    directory = tempfile.mkdtemp()
+    tables = maptables.attach(data, directory)
+    print('table file: %d bytes' % len(tables.buffer))
+    for label, make in (('private', lambda: Gameboard(ENG, data)),
+                        ('shared', lambda: Gameboard(ENG, data, maptables.attach(data, directory)))):
+        board = make()
+        adjacencies = board.adjacencies
+        uncached = timeit.timeit(lambda: adjacencies[STP][(FLT, NCS)], number=10000) / 10000
+        print('%-8s %8.1f KiB per board, adjacency lookup %5.2f us'
+              % (label, retained(make) / 1024, uncached * 1e6))
+
+
+if __name__ == '__main__':
+    main()
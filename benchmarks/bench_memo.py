@@ -0,0 +1,62 @@
+'''
+Runs RandBot-style order generation over standard-map positions and
+reports Gameboard query cache hits and misses, with the caches
+disabled and enabled.
+
+    python benchmarks/bench_memo.py
+'''
+import random
+import time
+
+import fixtures
+from gameboard import Gameboard
+from RandBot import RandBot
+
+CANDIDATES = 200
+POSITIONS = [fixtures.NOW_SPR, fixtures.NOW_FAL, fixtures.NOW_WIN]
+
+
+def run(cache_size):
+    random.seed(0)
+    mdf = fixtures.message(fixtures.STANDARD_MDF)
+    sco = fixtures.message(fixtures.SCO)
+    nows = [fixtures.message(text) for text in POSITIONS]
+    boards = []
+    start = time.perf_counter()
+    for power in Gameboard(None, mdf).powers:
+        bot = RandBot()
+        bot.power = power
+        bot.map = Gameboard(power, mdf)
+        for cache in bot.map.caches.values():
+            cache.maxsize = cache_size
+        bot.map.process_SCO(sco)
+        for now in nows:
+            bot.map.process_NOW(now)
+            for i in range(CANDIDATES):
+                bot.map.orders[bot.map.turn] = []
+                bot.generate_orders(bot.map)
+                for unit in bot.map.get_own_units():
+                    bot.map.get_adjacent_armies(unit.province, unit.coast)
+                    bot.map.get_adjacent_fleets(unit.province, unit.coast)
+        boards.append(bot.map)
+    elapsed = time.perf_counter() - start
+
+    totals = {}
+    for board in boards:
+        for scope, stats in board.cache_stats().items():
+            for name, (hits, misses) in stats.items():
+                h, m = totals.get(name, (0, 0))
+                totals[name] = (h + hits, m + misses)
+    return elapsed, totals
+
+
+def main():
+    for label, size in (('disabled', 0), ('enabled', 4096)):
+        elapsed, totals = run(size)
+        print('caches %s: %.3f s' % (label, elapsed))
+        for name, (hits, misses) in sorted(totals.items()):
+            print('  %-26s hits %7d  misses %7d' % (name, hits, misses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+'''
+Measures the memory held by the orders a search bot keeps around:
+RandBot-style candidate order sets for every power over standard-map
+positions, retained until the position changes. Run with interning on
+and off, and compares the size of a slotted Unit with an equivalent
+instance that keeps its fields in a __dict__.
+
+    python benchmarks/bench_memory.py
+'''
+import random
+import sys
+import tracemalloc
+
+import fixtures
+from gameboard import Gameboard, Unit
+from language import *
+from RandBot import RandBot
+
+CANDIDATES = 200
+POSITIONS = [fixtures.NOW_SPR, fixtures.NOW_FAL, fixtures.NOW_WIN]
+
+
+class UninternedGameboard(Gameboard):
+    def intern(self, value):
+        return value
+
+
+class DictUnit():
+    def __init__(self, power, unit_type, province):
+        self.power = power
+        self.unit_type = unit_type
+        self.province, self.coast = province, None
+        self.key = (power, unit_type, province)
+
+
+def run(board_class):
+    random.seed(0)
+    mdf = fixtures.message(fixtures.STANDARD_MDF)
+    sco = fixtures.message(fixtures.SCO)
+    peak = 0
+    count = 0
+    for now in [fixtures.message(text) for text in POSITIONS]:
+        tracemalloc.start()
+        kept = []
+        for power in Gameboard(None, mdf).powers:
+            bot = RandBot()
+            bot.power = power
+            bot.map = board_class(power, mdf)
+            bot.map.process_SCO(sco)
+            bot.map.process_NOW(now)
+            for i in range(CANDIDATES):
+                bot.map.orders[bot.map.turn] = []
+                bot.generate_orders(bot.map)
+                kept.append(bot.map.orders[bot.map.turn])
+        count += len(set(id(order) for orders in kept for order in orders))
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak, count
+
+
+def instance_size(value):
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += sys.getsizeof(value.__dict__)
+    return size
+
+
+def main():
+    print('Unit instance: slotted %d bytes, __dict__ %d bytes'
+          % (instance_size(Unit(ENG, AMY, LON)), instance_size(DictUnit(ENG, AMY, LON))))
+    for label, board_class in (('off', UninternedGameboard), ('on', Gameboard)):
+        peak, count = run(board_class)
+        print('interning %-3s: peak %8.1f KiB, %6d distinct order objects' % (label, peak / 1024, count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+'''
+Measures the throughput of parsing a DAIDE notation log, one message
+per line, into Messages and into packed bytes. The log is built from
+the standard-map fixtures, repeated to a few megabytes.
+
+    python benchmarks/bench_notation.py
+'''
+import io
+import time
+
+import fixtures
+import notation
+
+TARGET_BYTES = 4 * 1024 * 1024
+
+
+def build_log():
+    lines = [' '.join(text.split()) for text in
+             [fixtures.HLO, fixtures.NOW_SPR, fixtures.NOW_FAL, fixtures.NOW_AUT,
+              fixtures.NOW_WIN, fixtures.SCO] + list(fixtures.ORD)]
+    block = '\n'.join(lines) + '\n'
+    return block * (TARGET_BYTES // len(block) + 1)
+
+
+def run(label, func, log):
+    start = time.perf_counter()
+    count = sum(1 for _ in func(io.StringIO(log)))
+    elapsed = time.perf_counter() - start
+    print('%-14s %7d messages  %6.2f MB/s  %8.0f messages/s'
+          % (label, count, len(log) / elapsed / 1e6, count / elapsed))
+
+
+def main():
+    log = build_log()
+    print('log: %.1f MB' % (len(log) / 1e6))
+    run('iter_packed', notation.iter_packed, log)
+    run('iter_messages', notation.iter_messages, log)
+
+
+if __name__ == '__main__':
+    main()
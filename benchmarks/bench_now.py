@@ -0,0 +1,51 @@
+'''
+Measures what a NOW costs the Gameboard over a year of standard-map
+positions: how many new Unit objects it allocates, the number of
+memory blocks allocated while processing it (tracemalloc), and its
+speed.
+
+    python benchmarks/bench_now.py
+'''
+import timeit
+import tracemalloc
+
+import fixtures
+from gameboard import Gameboard
+from language import *
+
+POSITIONS = [fixtures.NOW_SPR, fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN]
+
+
+def all_units(board):
+    return [unit for units in board.units.values() for unit in units]
+
+
+def main():
+    board = Gameboard(ENG, fixtures.packed(fixtures.STANDARD_MDF))
+    board.process_SCO(fixtures.packed(fixtures.SCO))
+    data = [fixtures.packed(now) for now in POSITIONS]
+    board.process_NOW(data[-1])
+
+    new_units = 0
+    blocks = 0
+    for now in data:
+        # Holding on to the old Units, so that their ids aren't reused
+        old = all_units(board)
+        before = set(map(id, old))
+        tracemalloc.start()
+        board.process_NOW(now)
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks += sum(stat.count for stat in snapshot.statistics('filename'))
+        new_units += sum(1 for unit in all_units(board) if id(unit) not in before)
+
+    def year():
+        for now in data:
+            board.process_NOW(now)
+    seconds = min(timeit.repeat(year, number=200, repeat=5)) / 200 / len(data)
+    print('per NOW: %.1f new Units, %.0f blocks still allocated, %.1f us'
+          % (new_units / len(data), blocks / len(data), seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+'''
+Random DAIDE messages generated from the grammar in the DAIDE syntax
+document, for stress-testing and benchmarking the codec on inputs
+larger and more varied than the standard-map fixtures.
+
+    generator = Generator(seed=1)
+    board_map = generator.map(provinces=60)
+    mdf = generator.mdf(board_map)
+    now = generator.now(board_map, units=40)
+    for kind, message in generator.corpus(board_map, 1000):
+        data = message.pack()
+        broken = generator.malformed(data, 'drop_ket')
+
+Maps are synthetic, built from the standard map's province tokens (the
+only ones the vocabulary knows): a random subset of provinces, joined
+at random, with each province's supply-centre, sea, coastal and
+bicoastal nature taken from its token category. The other messages
+are valid for a given map, though not necessarily legal in play (an
+order may name a unit that isn't there).
+
+malformed() breaks a message's bytes in one of the ways listed in
+MALFORMED, for checking that decoding them fails cleanly.
+'''
+import random
+import struct
+
+import fixtures  # puts pydip on the path
+from language import *
+
+PROVINCES = [token for value, token in sorted(tokens_by_value.items()) if value >> 12 == 0x5]
+POWERS = [token for value, token in sorted(tokens_by_value.items()) if value >> 8 == 0x41]
+SEASONS = [SPR, SUM, FAL, AUT, WIN]
+RESULTS = [SUC, BNC, CUT, DSR, NSO]
+BICOASTS = {STP: (NCS, SCS), SPA: (NCS, SCS), BUL: (ECS, SCS)}
+TEXT = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,!?-'
+
+KINDS = ['MDF', 'NOW', 'SCO', 'ORD', 'SUB', 'SND', 'FRM', 'HLO', 'NME']
+MALFORMED = ['drop_bra', 'drop_ket', 'swap_brackets', 'truncate', 'odd_length', 'unknown_token',
+             'wrong_token']
+
+
+def is_sea(province):
+    return province._hex >> 8 in (0x52, 0x53)
+
+
+def is_coastal(province):
+    return province._hex >> 8 in (0x54, 0x55, 0x56, 0x57)
+
+
+def is_bicoastal(province):
+    return province._hex >> 8 in (0x56, 0x57)
+
+
+def is_center(province):
+    return province._hex >> 8 & 1 == 1
+
+
+class Map():
+    '''
+    A synthetic map.
+    - powers        power Tokens
+    - provinces     province Tokens
+    - home_centers  owner -> centres, UNO for the neutral ones
+    - adjacencies   province -> {unit_type: [adjacent ...]}, as
+                    Gameboard.adjacencies
+    - locations     (power-less) unit placements: (unit_type, province,
+                    coast or None)
+    '''
+    def __init__(self, powers, provinces, home_centers, adjacencies):
+        self.powers = powers
+        self.provinces = provinces
+        self.home_centers = home_centers
+        self.adjacencies = adjacencies
+        self.centers = [province for province in provinces if is_center(province)]
+        self.locations = []
+        for province, rows in adjacencies.items():
+            for unit_type in rows:
+                if isinstance(unit_type, tuple):
+                    self.locations.append((FLT, province, unit_type[1]))
+                else:
+                    self.locations.append((unit_type, province, None))
+
+
+class Generator():
+    def __init__(self, seed=0, max_depth=3):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+
+    # Building blocks
+    def text(self, low=1, high=24):
+        return ''.join(self.random.choice(TEXT) for i in range(self.random.randint(low, high)))
+
+    def turn(self):
+        return Message(self.random.choice(SEASONS), self.random.randint(1901, 2100)).wrap()
+
+    def powers(self, board_map, low=1, high=3):
+        return Message(*self.random.sample(board_map.powers, self.random.randint(low, min(high, len(board_map.powers)))))
+
+    def location(self, board_map):
+        return self.random.choice(board_map.locations)
+
+    def province(self, province, coast):
+        if coast is None:
+            return Message(province)
+        return Message(province, coast).wrap()
+
+    def unit(self, board_map, location=None):
+        unit_type, province, coast = location or self.location(board_map)
+        return Message(self.random.choice(board_map.powers), unit_type, self.province(province, coast)).wrap()
+
+    def destination(self, board_map, province):
+        '''
+        A province adjacent to province, with its coast if it has one.
+        '''
+        rows = board_map.adjacencies[province]
+        adjs = rows[self.random.choice(list(rows))]
+        adj = self.random.choice(adjs)
+        if isinstance(adj, tuple):
+            return Message(*adj).wrap()
+        return Message(adj)
+
+    # Maps
+    def map(self, provinces=None, powers=7, degree=4):
+        '''
+        Returns a random Map over provinces of the standard map's
+        provinces (all of them by default), each joined to about degree
+        others, with up to powers powers.
+        '''
+        rng = self.random
+        chosen = rng.sample(PROVINCES, provinces or len(PROVINCES))
+        chosen.sort(key=lambda p: p._hex)
+        map_powers = POWERS[:powers]
+
+        centers = [province for province in chosen if is_center(province)]
+        rng.shuffle(centers)
+        home_centers = {}
+        per_power = min(3, len(centers) // max(1, len(map_powers) + 1))
+        for i, power in enumerate(map_powers):
+            home_centers[power] = sorted(centers[i * per_power:(i + 1) * per_power], key=lambda p: p._hex)
+        neutral = centers[len(map_powers) * per_power:]
+        if neutral:
+            home_centers[UNO] = sorted(neutral, key=lambda p: p._hex)
+
+        def fleet_target(province):
+            if is_bicoastal(province):
+                return (province, rng.choice(BICOASTS.get(province, (NCS, SCS))))
+            return province
+
+        adjacencies = {}
+        for province in chosen:
+            neighbours = rng.sample([p for p in chosen if p is not province], min(degree, len(chosen) - 1))
+            land = [p for p in neighbours if not is_sea(p)] or [p for p in chosen if not is_sea(p) and p is not province][:1]
+            water = [fleet_target(p) for p in neighbours if is_sea(p) or is_coastal(p)] or \
+                [p for p in chosen if is_sea(p) and p is not province][:1]
+            rows = adjacencies[province] = {}
+            if not is_sea(province) and land:
+                rows[AMY] = land
+            if is_bicoastal(province):
+                for coast in BICOASTS.get(province, (NCS, SCS)):
+                    rows[(FLT, coast)] = water
+            elif (is_sea(province) or is_coastal(province)) and water:
+                rows[FLT] = water
+            if not rows:
+                rows[AMY if not is_sea(province) else FLT] = [p for p in chosen if p is not province][:1]
+        return Map(map_powers, chosen, home_centers, adjacencies)
+
+    def mdf(self, board_map):
+        '''
+        MDF (powers) (provinces) (adjacencies)
+        '''
+        msg = MDF(Message(*board_map.powers))
+        supply = Message()
+        for owner, centers in board_map.home_centers.items():
+            supply += Message(owner, *centers).wrap()
+        non_centers = [province for province in board_map.provinces if not is_center(province)]
+        msg += (supply.wrap() + Message(*non_centers).wrap()).wrap()
+        adjacencies = Message()
+        for province, rows in board_map.adjacencies.items():
+            entry = Message(province)
+            for unit_type, adjs in rows.items():
+                row = Message(*unit_type).wrap() if isinstance(unit_type, tuple) else Message(unit_type)
+                for adj in adjs:
+                    row += Message(*adj).wrap() if isinstance(adj, tuple) else Message(adj)
+                entry += row.wrap()
+            adjacencies += entry.wrap()
+        return msg + adjacencies.wrap()
+
+    # Server messages
+    def now(self, board_map, units=None, retreats=0.1):
+        '''
+        NOW (turn) (unit) ..., with up to units units, at most one per
+        province but for dislodged units, which have MRT retreat lists.
+        '''
+        rng = self.random
+        by_province = {}
+        for location in rng.sample(board_map.locations, len(board_map.locations)):
+            by_province.setdefault(location[1], location)
+        locations = list(by_province.values())[:units or len(by_province)]
+        msg = NOW(Message(*self.turn()[1:-1]))
+        for location in locations:
+            unit = Message(*self.unit(board_map, location)[1:-1])
+            if rng.random() < retreats:
+                options = Message()
+                for i in range(rng.randint(0, 3)):
+                    options += self.destination(board_map, location[1])
+                unit += MRT(options)
+            msg += unit.wrap()
+        return msg
+
+    def sco(self, board_map):
+        '''
+        SCO (power centre ...) ... with every centre owned by a power or UNO.
+        '''
+        owners = {}
+        for center in board_map.centers:
+            owner = self.random.choice(board_map.powers + [UNO])
+            owners.setdefault(owner, []).append(center)
+        msg = Message(SCO)
+        for owner, centers in owners.items():
+            msg += Message(owner, *centers).wrap()
+        return msg
+
+    def order(self, board_map):
+        '''
+        One order of any kind, as a Message without the outer brackets.
+        '''
+        rng = self.random
+        location = self.location(board_map)
+        unit = self.unit(board_map, location)
+        province = location[1]
+        kind = rng.choice([HLD, MTO, SUP, SUP, CVY, CTO, RTO, DSB, BLD, REM, WVE])
+        if kind is HLD or kind is DSB or kind is BLD or kind is REM:
+            return unit + Message(kind)
+        if kind is MTO or kind is RTO:
+            return unit + Message(kind) + self.destination(board_map, province)
+        if kind is WVE:
+            return Message(rng.choice(board_map.powers), WVE)
+        if kind is SUP:
+            other = self.location(board_map)
+            msg = unit + Message(SUP) + self.unit(board_map, other)
+            if rng.random() < 0.5:
+                msg += Message(MTO, other[1])
+            return msg
+        seas = [p for p in board_map.provinces if is_sea(p)] or board_map.provinces
+        if kind is CVY:
+            army = self.unit(board_map)
+            return unit + Message(CVY) + army + Message(CTO, rng.choice(board_map.provinces))
+        path = Message(*rng.sample(seas, min(len(seas), rng.randint(1, 3))))
+        return unit + Message(CTO, rng.choice(board_map.provinces), VIA) + path.wrap()
+
+    def ord(self, board_map):
+        '''
+        ORD (turn) (order) (result)
+        '''
+        result = Message(self.random.choice(RESULTS))
+        if self.random.random() < 0.2:
+            result += Message(RET)
+        return ORD(Message(*self.turn()[1:-1])) + self.order(board_map).wrap() + result.wrap()
+
+    def sub(self, board_map, orders=None):
+        '''
+        SUB (turn) (order) ..., the turn being optional.
+        '''
+        msg = Message(SUB)
+        if self.random.random() < 0.5:
+            msg += self.turn()
+        for i in range(orders or self.random.randint(1, 20)):
+            msg += self.order(board_map).wrap()
+        return msg
+
+    def hlo(self, board_map):
+        '''
+        HLO (power) (passcode) (variant option ...)
+        '''
+        rng = self.random
+        variant = Message(LVL, rng.randint(0, 200)).wrap()
+        for option in rng.sample([MTL, RTL, BTL, PTL], rng.randint(0, 4)):
+            variant += Message(option, rng.randint(1, 3600)).wrap()
+        for option in rng.sample([AOA, DSD, NPR, NPB, PDA], rng.randint(0, 3)):
+            variant += Message(option).wrap()
+        return HLO(rng.choice(board_map.powers))(rng.randint(0, 0x3FFF)) + variant.wrap()
+
+    def nme(self):
+        return NME(self.text())(self.text(1, 8))
+
+    # Press
+    def arrangement(self, board_map, depth=0):
+        rng = self.random
+        kinds = ['PCE', 'ALY', 'DRW', 'SLO', 'XDO', 'DMZ', 'SCD', 'OCC', 'XOY', 'YDO']
+        if depth < self.max_depth:
+            kinds += ['AND', 'ORR', 'NOT'] * 2
+        kind = rng.choice(kinds)
+        if kind == 'PCE':
+            return PCE(self.powers(board_map, 2))
+        if kind == 'ALY':
+            return ALY(self.powers(board_map, 2)) + VSS(self.powers(board_map))
+        if kind == 'DRW':
+            return Message(DRW)
+        if kind == 'SLO':
+            return SLO(rng.choice(board_map.powers))
+        if kind == 'XDO':
+            return XDO(self.order(board_map))
+        if kind == 'DMZ':
+            return DMZ(self.powers(board_map))(Message(*rng.sample(board_map.provinces, rng.randint(1, 4))))
+        if kind == 'SCD':
+            msg = Message(SCD)
+            for power in self.powers(board_map):
+                msg += Message(power, *rng.sample(board_map.centers, min(2, len(board_map.centers)))).wrap()
+            return msg
+        if kind == 'OCC':
+            msg = Message(OCC)
+            for i in range(rng.randint(1, 3)):
+                msg += self.unit(board_map)
+            return msg
+        if kind == 'XOY':
+            return XOY(rng.choice(board_map.powers))(rng.choice(board_map.powers))
+        if kind == 'YDO':
+            return YDO(rng.choice(board_map.powers)) + self.unit(board_map)
+        if kind == 'NOT':
+            return NOT(self.arrangement(board_map, depth + 1))
+        msg = Message(AND if kind == 'AND' else ORR)
+        for i in range(rng.randint(2, 4)):
+            msg += self.arrangement(board_map, depth + 1).wrap()
+        return msg
+
+    def press(self, board_map, depth=0):
+        '''
+        A press message: a proposal, a reply to one, a statement or a
+        query, nested up to max_depth.
+        '''
+        rng = self.random
+        kinds = ['PRP', 'FCT', 'THK', 'INS', 'QRY', 'SUG', 'WHT', 'HOW', 'TRY']
+        if depth < self.max_depth:
+            kinds += ['YES', 'REJ', 'BWX', 'HUH', 'IDK', 'IFF', 'EXP']
+        kind = rng.choice(kinds)
+        if kind in ('PRP', 'FCT', 'THK', 'INS', 'QRY', 'SUG'):
+            return tokens_by_tla[kind](self.arrangement(board_map, depth))
+        if kind == 'WHT':
+            return WHT(Message(*self.unit(board_map)[1:-1]))
+        if kind == 'HOW':
+            return HOW(rng.choice(board_map.provinces))
+        if kind == 'TRY':
+            return TRY(Message(*rng.sample([PCE, ALY, VSS, DRW, SLO, NOT, XDO, DMZ, AND, ORR], rng.randint(1, 5))))
+        if kind == 'IFF':
+            msg = IFF(self.arrangement(board_map, depth + 1)) + THN(self.press(board_map, depth + 1))
+            if rng.random() < 0.5:
+                msg += ELS(self.press(board_map, depth + 1))
+            return msg
+        if kind == 'EXP':
+            return EXP(Message(*self.turn()[1:-1]))(self.press(board_map, depth + 1))
+        return tokens_by_tla[kind](self.press(board_map, depth + 1))
+
+    def snd(self, board_map):
+        '''
+        SND (turn) (powers) (press), the turn being optional.
+        '''
+        msg = Message(SND)
+        if self.random.random() < 0.5:
+            msg += self.turn()
+        return msg + self.powers(board_map).wrap() + self.press(board_map).wrap()
+
+    def frm(self, board_map):
+        '''
+        FRM (power) (powers) (press)
+        '''
+        return FRM(self.random.choice(board_map.powers))(self.powers(board_map))(self.press(board_map))
+
+    def message(self, board_map, kind):
+        if kind == 'MDF':
+            return self.mdf(board_map)
+        if kind == 'NME':
+            return self.nme()
+        return getattr(self, kind.lower())(board_map)
+
+    def corpus(self, board_map, count, kinds=KINDS):
+        '''
+        Yields count (kind, Message) pairs, the kinds chosen at random.
+        '''
+        for i in range(count):
+            kind = self.random.choice(kinds)
+            yield kind, self.message(board_map, kind)
+
+    # Breaking messages
+    def malformed(self, data, kind):
+        '''
+        Returns a copy of a packed message broken in one way:
+        - drop_bra          a BRA removed
+        - drop_ket          a KET removed
+        - swap_brackets     a top-level group turned inside out: ) ... (
+        - truncate          cut short at a token boundary
+        - odd_length        an extra byte on the end
+        - unknown_token     a value outside the vocabulary inserted
+        - wrong_token       a token replaced by one of another category
+        '''
+        rng = self.random
+        values = list(struct.unpack('!%dH' % (len(data) // 2), data))
+        bra, ket = BRA._hex, KET._hex
+        if kind == 'drop_bra' or kind == 'drop_ket':
+            positions = [i for i, v in enumerate(values) if v == (bra if kind == 'drop_bra' else ket)]
+            if positions:
+                del values[rng.choice(positions)]
+        elif kind == 'swap_brackets':
+            opened = []
+            pairs = []
+            for i, v in enumerate(values):
+                if v == bra:
+                    opened.append(i)
+                elif v == ket and opened:
+                    start = opened.pop()
+                    # Turning a nested group inside out can leave the
+                    # brackets balanced, e.g. ( ( A ) ) to ( ) A ( )
+                    if not opened:
+                        pairs.append((start, i))
+            if pairs:
+                start, end = rng.choice(pairs)
+                values[start], values[end] = ket, bra
+        elif kind == 'truncate':
+            if len(values) > 1:
+                values = values[:rng.randrange(1, len(values))]
+        elif kind == 'odd_length':
+            return bytes(data) + b'\x00'
+        elif kind == 'unknown_token':
+            values.insert(rng.randrange(1, len(values) + 1), 0x5800 + rng.randrange(0x100))
+        elif kind == 'wrong_token':
+            positions = [i for i, v in enumerate(values) if v >= 0x4100 and v >> 8 != 0x4B]
+            if positions:
+                i = rng.choice(positions)
+                others = [v for v in tokens_by_value if v >> 8 not in (values[i] >> 8, 0x40)]
+                values[i] = rng.choice(others)
+        else:
+            raise ValueError('unknown kind of malformation: %s' % kind)
+        return struct.pack('!%dH' % len(values), *values)
@@ -0,0 +1,203 @@
+'''
+Standard-map DAIDE messages, recorded in the human notation that
+Message.__str__ produces, for use by the benchmarks.
+'''
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pydip'))
+
+from language import *
+from gameboard import Gameboard
+import notation
+
+
+STANDARD_MDF = '''
+MDF ( AUS ENG FRA GER ITA RUS TUR )
+( ( ( AUS BUD TRI VIE ) ( ENG EDI LON LVP ) ( FRA BRE MAR PAR )
+    ( GER BER KIE MUN ) ( ITA NAP ROM VEN ) ( RUS MOS SEV STP WAR )
+    ( TUR ANK CON SMY )
+    ( UNO BEL BUL DEN GRE HOL NWY POR RUM SER SPA SWE TUN ) )
+  ( ADR AEG ALB APU ARM BAL BAR BLA BOH BUR CLY EAS ECH FIN GAL GAS GOB GOL
+    HEL ION IRI LVN MAO NAF NAO NTH NWG PIC PIE PRU RUH SIL SKA SYR TUS TYR
+    TYS UKR WAL WES YOR ) )
+( ( BOH ( AMY MUN SIL GAL VIE TYR ) )
+  ( BUR ( AMY PAR PIC BEL RUH MUN MAR GAS ) )
+  ( GAL ( AMY BOH SIL WAR UKR RUM BUD VIE ) )
+  ( RUH ( AMY BUR BEL HOL KIE MUN ) )
+  ( SIL ( AMY MUN BER PRU WAR GAL BOH ) )
+  ( TYR ( AMY MUN BOH VIE TRI VEN PIE ) )
+  ( UKR ( AMY WAR MOS SEV RUM GAL ) )
+  ( BUD ( AMY VIE GAL RUM SER TRI ) )
+  ( MOS ( AMY STP LVN WAR UKR SEV ) )
+  ( MUN ( AMY BUR RUH KIE BER SIL BOH TYR ) )
+  ( PAR ( AMY BRE PIC BUR GAS ) )
+  ( SER ( AMY BUD RUM BUL GRE ALB TRI ) )
+  ( VIE ( AMY BOH GAL BUD TRI TYR ) )
+  ( WAR ( AMY PRU SIL GAL UKR MOS LVN ) )
+  ( ADR ( FLT VEN TRI ALB ION APU ) )
+  ( AEG ( FLT GRE ( BUL SCS ) CON SMY EAS ION ) )
+  ( BAL ( FLT SWE GOB LVN PRU BER KIE DEN ) )
+  ( BAR ( FLT NWG NWY ( STP NCS ) ) )
+  ( BLA ( FLT RUM SEV ARM ANK CON ( BUL ECS ) ) )
+  ( EAS ( FLT SYR SMY AEG ION ) )
+  ( ECH ( FLT IRI WAL LON NTH BEL PIC BRE MAO ) )
+  ( GOB ( FLT SWE FIN ( STP SCS ) LVN BAL ) )
+  ( GOL ( FLT ( SPA SCS ) MAR PIE TUS TYS WES ) )
+  ( HEL ( FLT NTH DEN KIE HOL ) )
+  ( ION ( FLT TUN TYS NAP APU ADR ALB GRE AEG EAS ) )
+  ( IRI ( FLT NAO LVP WAL ECH MAO ) )
+  ( MAO ( FLT NAO IRI ECH BRE GAS ( SPA NCS ) POR ( SPA SCS ) WES NAF ) )
+  ( NAO ( FLT NWG CLY LVP IRI MAO ) )
+  ( NTH ( FLT NWG EDI YOR LON ECH BEL HOL HEL DEN SKA NWY ) )
+  ( NWG ( FLT BAR NWY NTH EDI CLY NAO ) )
+  ( SKA ( FLT NWY SWE DEN NTH ) )
+  ( TYS ( FLT TUS ROM NAP ION TUN WES GOL ) )
+  ( WES ( FLT GOL TYS TUN NAF MAO ( SPA SCS ) ) )
+  ( ALB ( AMY TRI SER GRE ) ( FLT ADR TRI GRE ION ) )
+  ( APU ( AMY VEN ROM NAP ) ( FLT VEN ADR ION NAP ) )
+  ( ARM ( AMY ANK SMY SYR SEV ) ( FLT ANK SEV BLA ) )
+  ( CLY ( AMY EDI LVP ) ( FLT EDI LVP NAO NWG ) )
+  ( FIN ( AMY SWE STP NWY ) ( FLT SWE ( STP SCS ) GOB ) )
+  ( GAS ( AMY BRE PAR BUR MAR SPA ) ( FLT BRE ( SPA NCS ) MAO ) )
+  ( LVN ( AMY PRU STP MOS WAR ) ( FLT PRU BAL GOB ( STP SCS ) ) )
+  ( NAF ( AMY TUN ) ( FLT MAO WES TUN ) )
+  ( PIC ( AMY BRE PAR BUR BEL ) ( FLT BRE ECH BEL ) )
+  ( PIE ( AMY MAR TYR VEN TUS ) ( FLT MAR GOL TUS ) )
+  ( PRU ( AMY BER SIL WAR LVN ) ( FLT BER BAL LVN ) )
+  ( SYR ( AMY ARM SMY ) ( FLT SMY EAS ) )
+  ( TUS ( AMY PIE VEN ROM ) ( FLT PIE GOL TYS ROM ) )
+  ( WAL ( AMY LON LVP YOR ) ( FLT LON LVP IRI ECH ) )
+  ( YOR ( AMY EDI LVP WAL LON ) ( FLT EDI NTH LON ) )
+  ( ANK ( AMY CON SMY ARM ) ( FLT CON BLA ARM ) )
+  ( BEL ( AMY HOL RUH BUR PIC ) ( FLT HOL NTH ECH PIC ) )
+  ( BER ( AMY KIE MUN SIL PRU ) ( FLT KIE BAL PRU ) )
+  ( BRE ( AMY PIC PAR GAS ) ( FLT PIC ECH MAO GAS ) )
+  ( CON ( AMY BUL ANK SMY ) ( FLT ( BUL ECS ) ( BUL SCS ) BLA ANK SMY AEG ) )
+  ( DEN ( AMY KIE SWE ) ( FLT KIE HEL NTH SKA SWE BAL ) )
+  ( EDI ( AMY CLY LVP YOR ) ( FLT CLY NWG NTH YOR ) )
+  ( GRE ( AMY ALB SER BUL ) ( FLT ALB ION AEG ( BUL SCS ) ) )
+  ( HOL ( AMY BEL RUH KIE ) ( FLT BEL NTH HEL KIE ) )
+  ( KIE ( AMY HOL RUH MUN BER DEN ) ( FLT HOL HEL DEN BAL BER ) )
+  ( LON ( AMY WAL YOR ) ( FLT WAL ECH NTH YOR ) )
+  ( LVP ( AMY CLY EDI YOR WAL ) ( FLT CLY NAO IRI WAL ) )
+  ( MAR ( AMY SPA GAS BUR PIE ) ( FLT ( SPA SCS ) GOL PIE ) )
+  ( NAP ( AMY ROM APU ) ( FLT ROM TYS ION APU ) )
+  ( NWY ( AMY SWE FIN STP ) ( FLT SKA NTH NWG BAR ( STP NCS ) SWE ) )
+  ( POR ( AMY SPA ) ( FLT MAO ( SPA NCS ) ( SPA SCS ) ) )
+  ( ROM ( AMY TUS VEN APU NAP ) ( FLT TUS TYS NAP ) )
+  ( RUM ( AMY SER BUD GAL UKR SEV BUL ) ( FLT SEV BLA ( BUL ECS ) ) )
+  ( SEV ( AMY UKR MOS ARM RUM ) ( FLT RUM BLA ARM ) )
+  ( SMY ( AMY CON ANK ARM SYR ) ( FLT CON AEG EAS SYR ) )
+  ( SWE ( AMY NWY FIN DEN ) ( FLT NWY SKA DEN BAL GOB FIN ) )
+  ( TRI ( AMY VEN TYR VIE BUD SER ALB ) ( FLT VEN ADR ALB ) )
+  ( TUN ( AMY NAF ) ( FLT NAF WES TYS ION ) )
+  ( VEN ( AMY PIE TYR TRI APU ROM TUS ) ( FLT TRI ADR APU ) )
+  ( BUL ( AMY RUM SER GRE CON ) ( ( FLT ECS ) RUM BLA CON ) ( ( FLT SCS ) CON AEG GRE ) )
+  ( SPA ( AMY POR GAS MAR ) ( ( FLT NCS ) POR MAO GAS ) ( ( FLT SCS ) POR MAO WES GOL MAR ) )
+  ( STP ( AMY NWY FIN LVN MOS ) ( ( FLT NCS ) BAR NWY ) ( ( FLT SCS ) FIN GOB LVN ) ) )
+'''
+
+HLO = "HLO ( ENG ) ( 1234 ) ( ( LVL 0 ) ( MTL 60 ) ( RTL 30 ) ( BTL 30 ) ( AOA ) )"
+
+NOW_SPR = '''
+NOW ( SPR 1901 )
+( AUS AMY BUD ) ( AUS AMY VIE ) ( AUS FLT TRI )
+( ENG FLT EDI ) ( ENG FLT LON ) ( ENG AMY LVP )
+( FRA FLT BRE ) ( FRA AMY MAR ) ( FRA AMY PAR )
+( GER FLT KIE ) ( GER AMY BER ) ( GER AMY MUN )
+( ITA FLT NAP ) ( ITA AMY ROM ) ( ITA AMY VEN )
+( RUS AMY WAR ) ( RUS AMY MOS ) ( RUS FLT SEV ) ( RUS FLT ( STP SCS ) )
+( TUR FLT ANK ) ( TUR AMY CON ) ( TUR AMY SMY )
+'''
+
+NOW_FAL = '''
+NOW ( FAL 1901 )
+( AUS AMY SER ) ( AUS AMY GAL ) ( AUS FLT ALB )
+( ENG FLT NTH ) ( ENG FLT NWG ) ( ENG AMY YOR )
+( FRA FLT MAO ) ( FRA AMY SPA ) ( FRA AMY BUR )
+( GER FLT DEN ) ( GER AMY KIE ) ( GER AMY RUH )
+( ITA FLT ION ) ( ITA AMY APU ) ( ITA AMY VEN )
+( RUS AMY UKR ) ( RUS AMY STP ) ( RUS FLT RUM ) ( RUS FLT GOB )
+( TUR FLT BLA ) ( TUR AMY BUL ) ( TUR AMY ARM )
+'''
+
+NOW_AUT = '''
+NOW ( AUT 1901 )
+( AUS AMY BUL ) ( AUS AMY GAL )
+( ENG FLT NTH ) ( ENG FLT NWY ) ( ENG AMY YOR )
+( FRA FLT POR ) ( FRA AMY SPA ) ( FRA AMY BEL )
+( GER FLT DEN ) ( GER AMY HOL ) ( GER AMY MUN )
+( ITA FLT ALB ) ( ITA AMY APU ) ( ITA AMY VEN )
+( RUS AMY UKR ) ( RUS AMY STP ) ( RUS FLT RUM ) ( RUS FLT SWE )
+( TUR FLT BLA ) ( TUR AMY ARM )
+( TUR AMY BUL MRT ( CON GRE ) )
+( AUS FLT ALB MRT ( ADR TRI ) )
+'''
+
+NOW_WIN = '''
+NOW ( WIN 1901 )
+( AUS AMY BUL ) ( AUS AMY GAL ) ( AUS FLT ADR )
+( ENG FLT NTH ) ( ENG FLT NWY ) ( ENG AMY YOR )
+( FRA FLT POR ) ( FRA AMY SPA ) ( FRA AMY BEL )
+( GER FLT DEN ) ( GER AMY HOL ) ( GER AMY MUN )
+( ITA FLT TUN ) ( ITA AMY APU ) ( ITA AMY VEN )
+( RUS AMY UKR ) ( RUS AMY STP ) ( RUS FLT RUM ) ( RUS FLT SWE )
+( TUR FLT BLA ) ( TUR AMY ARM ) ( TUR AMY CON )
+'''
+
+SCO = '''
+SCO ( AUS BUD GRE TRI VIE ) ( ENG EDI LON LVP NWY ) ( FRA BEL BRE MAR PAR POR SPA )
+( GER BER DEN HOL KIE MUN ) ( ITA NAP ROM TUN VEN ) ( RUS MOS RUM SEV STP SWE WAR )
+( TUR ANK CON SER SMY ) ( UNO BUL )
+'''
+
+ORD = [
+    "ORD ( SPR 1901 ) ( ( ENG FLT LON ) MTO NTH ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( ENG FLT EDI ) MTO NWG ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( ENG AMY LVP ) MTO YOR ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( FRA AMY PAR ) MTO BUR ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( GER AMY MUN ) MTO BUR ) ( BNC )",
+    "ORD ( SPR 1901 ) ( ( RUS FLT ( STP SCS ) ) MTO GOB ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( TUR AMY CON ) MTO BUL ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( ITA AMY VEN ) HLD ) ( SUC )",
+    "ORD ( SPR 1901 ) ( ( AUS AMY BUD ) SUP ( AUS AMY VIE ) MTO GAL ) ( CUT )",
+    "ORD ( SPR 1901 ) ( ( AUS FLT TRI ) MTO ALB ) ( BNC RET )",
+]
+
+# Order sets as submitted, one per phase type
+SUB = [
+    "SUB ( ( ENG FLT LON ) MTO NTH ) ( ( ENG FLT EDI ) MTO NWG ) ( ( ENG AMY LVP ) MTO YOR )",
+    "SUB ( SPR 1901 ) ( ( RUS FLT ( STP SCS ) ) MTO GOB ) ( ( RUS AMY WAR ) MTO GAL )"
+    " ( ( RUS AMY MOS ) MTO UKR ) ( ( RUS FLT SEV ) MTO RUM )",
+    "SUB ( ( AUS AMY BUD ) SUP ( AUS AMY VIE ) MTO GAL ) ( ( AUS AMY VIE ) MTO GAL ) ( ( AUS FLT TRI ) HLD )",
+    "SUB ( ( TUR AMY BUL ) RTO CON ) ( ( AUS FLT ALB ) DSB )",
+    "SUB ( ( ENG FLT LON ) BLD ) ( ENG WVE )",
+]
+
+
+def message(text):
+    '''
+    Builds a Message from its printed DAIDE notation.
+    '''
+    return notation.parse(text)
+
+
+def packed(text):
+    '''
+    Returns the bytes the server would send for a printed message.
+    '''
+    return notation.parse_packed(text)
+
+
+def board(power=ENG, now=NOW_SPR, sco=SCO):
+    '''
+    Returns a Gameboard of the standard map played by power, after the
+    given SCO and NOW; pass None for either to leave it out.
+    '''
+    gameboard = Gameboard(power, packed(STANDARD_MDF))
+    if sco is not None:
+        gameboard.process_SCO(packed(sco))
+    if now is not None:
+        gameboard.process_NOW(packed(now))
+    return gameboard
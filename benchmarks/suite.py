@@ -0,0 +1,315 @@
+'''
+Benchmark suite for pydip's hot paths, on the standard-map fixtures.
+
+Each case reports operations per second (best of several timeit runs)
+and the peak memory allocated by one operation (tracemalloc), and is
+compared against the stored baseline:
+
+    python benchmarks/suite.py                  # run, compare with baseline.json
+    python benchmarks/suite.py --save           # record a new baseline (median of runs)
+    python benchmarks/suite.py process_NOW pack # only cases whose name matches
+
+Speeds are compared as ratios to a reference workload, plain Python
+that doesn't touch pydip, measured just before each case; a machine
+that is faster, slower or busier than the one that recorded the
+baseline moves both alike. A case regresses if its ratio falls more than
+--threshold (default 25%) below the baseline's, or it allocates more
+than --alloc-threshold (default 25%) more. A case that looks slower is
+measured again (--retries times) and judged on its best run, since
+timings on a busy machine are noisy. The exit status is 1 if any case
+regressed. Ratios still shift a little between Python versions, so
+record a new baseline after changing interpreters.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+import fixtures
+import snapshot
+from language import Message
+from gameboard import Gameboard
+from HoldBot import HoldBot
+from RandBot import RandBot
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+CASES = []
+
+
+def case(name):
+    '''
+    Registers a case. The decorated function does the setup and returns
+    the operation to time, a function of no arguments.
+    '''
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+
+@case('translate_from_bytes MDF')
+def translate_mdf():
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    return lambda: Message.translate_from_bytes(data)
+
+
+@case('translate_from_bytes NOW')
+def translate_now():
+    data = fixtures.packed(fixtures.NOW_SPR)
+    return lambda: Message.translate_from_bytes(data)
+
+
+@case('fold NOW')
+def fold_now():
+    msg = fixtures.message(fixtures.NOW_AUT)
+    return msg.fold
+
+
+@case('fold MDF')
+def fold_mdf():
+    msg = fixtures.message(fixtures.STANDARD_MDF)
+    return msg.fold
+
+
+@case('pack NOW')
+def pack_now():
+    msg = fixtures.message(fixtures.NOW_SPR)
+    return msg.pack
+
+
+@case('pack SUB')
+def pack_sub():
+    messages = [fixtures.message(text) for text in fixtures.SUB]
+    return lambda: [msg.pack() for msg in messages]
+
+
+@case('str NOW')
+def str_now():
+    msg = fixtures.message(fixtures.NOW_SPR)
+    return lambda: str(msg)
+
+
+@case('Gameboard.__init__')
+def gameboard_init():
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    return lambda: Gameboard(None, data)
+
+
+@case('process_NOW')
+def process_now():
+    gameboard = fixtures.board(None)
+    spring = fixtures.packed(fixtures.NOW_SPR)
+    fall = fixtures.packed(fixtures.NOW_FAL)
+
+    def op():
+        gameboard.process_NOW(fall)
+        gameboard.process_NOW(spring)
+    return op
+
+
+@case('process_SCO')
+def process_sco():
+    gameboard = fixtures.board(None)
+    data = fixtures.packed(fixtures.SCO)
+    return lambda: gameboard.process_SCO(data)
+
+
+@case('process_ORD batch')
+def process_ord():
+    gameboard = fixtures.board(None)
+    batch = [fixtures.packed(text) for text in fixtures.ORD]
+
+    def op():
+        for data in batch:
+            gameboard.process_ORD(data)
+    return op
+
+
+@case('ThreatMap.update')
+def threat_map_update():
+    gameboard = fixtures.board(None)
+    threat_map = gameboard.get_threat_map()
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_FAL))
+    spring_board = fixtures.board(None)
+
+    def op():
+        threat_map.update(spring_board)
+        threat_map.update(gameboard)
+    return op
+
+
+@case('snapshot.encode')
+def snapshot_encode():
+    gameboard = fixtures.board(fixtures.ENG, fixtures.NOW_AUT)
+    return lambda: snapshot.encode(gameboard)
+
+
+@case('snapshot.restore')
+def snapshot_restore():
+    data = snapshot.encode(fixtures.board(fixtures.ENG, fixtures.NOW_AUT))
+    template = Gameboard(fixtures.ENG, fixtures.packed(fixtures.STANDARD_MDF))
+    return lambda: snapshot.restore(data, template)
+
+
+def generation(bot_class, now, power=fixtures.ENG):
+    random.seed(0)
+    bot = bot_class()
+    bot.power = power
+    bot.map = fixtures.board(power, now)
+
+    def op():
+        bot.map.orders[bot.map.turn] = []
+        bot.generate_orders(bot.map)
+    return op
+
+
+@case('HoldBot.generate_orders SPR')
+def holdbot_spring():
+    return generation(HoldBot, fixtures.NOW_SPR)
+
+
+@case('RandBot.generate_orders SPR')
+def randbot_spring():
+    return generation(RandBot, fixtures.NOW_SPR)
+
+
+@case('RandBot.generate_orders AUT')
+def randbot_autumn():
+    # Austria has a dislodged fleet to retreat
+    return generation(RandBot, fixtures.NOW_AUT, fixtures.AUS)
+
+
+@case('RandBot.generate_orders WIN')
+def randbot_winter():
+    return generation(RandBot, fixtures.NOW_WIN)
+
+
+def reference():
+    '''
+    The reference workload: dict, list and string operations of the
+    kind pydip's hot paths are made of, without pydip itself.
+    '''
+    words = ['%s%d' % (word, n) for n in range(8) for word in ('AMY', 'FLT', 'SPR', 'LON')]
+    def op():
+        counts = {}
+        for word in words:
+            counts[word[:3]] = counts.get(word[:3], 0) + 1
+        return sorted(counts.items())
+    return op
+
+
+def measure(op):
+    '''
+    Returns (operations per second, peak bytes allocated per operation).
+    '''
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=5, number=number)) / number
+
+    tracemalloc.start()
+    op()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return 1.0 / best, peak - before
+
+
+def compare(name, result, baseline, threshold, alloc_threshold):
+    '''
+    Returns a list of regression descriptions for one case.
+    '''
+    old = baseline.get(name)
+    if old is None:
+        return []
+    problems = []
+    if result['relative'] < old['relative'] * (1 - threshold):
+        problems.append('%s: %.3f x reference, baseline %.3f'
+                        % (name, result['relative'], old['relative']))
+    # Allow a little slack, so tiny cases don't trip on a few bytes
+    if result['alloc'] > old['alloc'] * (1 + alloc_threshold) + 256:
+        problems.append('%s: %d bytes allocated, baseline %d' % (name, result['alloc'], old['alloc']))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pydip hot paths.')
+    parser.add_argument('only', nargs='*', help='run only cases whose name contains one of these')
+    parser.add_argument('--save', action='store_true', help='record the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--alloc-threshold', type=float, default=0.25)
+    parser.add_argument('--retries', type=int, default=2)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        # Older baselines stored only ops/s, which can't be compared
+        baseline = {name: old for name, old in baseline.items() if 'relative' in old}
+
+    results = {}
+    problems = []
+    print('%-30s %12s %10s %10s %12s %8s'
+          % ('case', 'ops/s', 'x ref', 'vs base', 'alloc B/op', 'vs base'))
+    for name, setup in CASES:
+        if args.only and not any(word in name for word in args.only):
+            continue
+        reference_ops = measure(reference())[0]
+        ops, alloc = measure(setup())
+        results[name] = {'ops': ops, 'relative': ops / reference_ops, 'alloc': alloc}
+        if args.save:
+            # A baseline is recorded from the median of several runs, so
+            # that one lucky or unlucky run doesn't set the bar
+            runs = [(ops / reference_ops, ops)]
+            for retry in range(args.retries * 2):
+                reference_ops = measure(reference())[0]
+                ops = measure(setup())[0]
+                runs.append((ops / reference_ops, ops))
+            relative, ops = sorted(runs)[len(runs) // 2]
+            results[name].update(ops=ops, relative=relative)
+        for retry in range(0 if args.save else args.retries):
+            if not compare(name, results[name], baseline, args.threshold, args.alloc_threshold):
+                break
+            reference_ops = measure(reference())[0]
+            ops = measure(setup())[0]
+            if ops / reference_ops > results[name]['relative']:
+                results[name].update(ops=ops, relative=ops / reference_ops)
+        old = baseline.get(name)
+        ops, relative = results[name]['ops'], results[name]['relative']
+        speed = '%+9.1f%%' % ((relative / old['relative'] - 1) * 100) if old else '         -'
+        growth = '%+7.1f%%' % ((alloc / old['alloc'] - 1) * 100) if old and old['alloc'] else '       -'
+        print('%-30s %12.0f %10.3f %10s %12d %8s' % (name, ops, relative, speed, alloc, growth))
+        problems += compare(name, results[name], baseline, args.threshold, args.alloc_threshold)
+
+    if args.save:
+        if args.only and baseline:
+            baseline.update(results)
+            results = baseline
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('baseline saved to %s' % args.baseline)
+        return 0
+
+    if problems:
+        print('\nregressions:')
+        for problem in problems:
+            print('  ' + problem)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,26 @@
 #!/usr/bin/env python3
+import collections
+import inspect
+import random
+import select
 import struct
 import socket
 import threading
+import time
 
 import util
+import instrument
+import maptables
+import ponder
+import press
+import submission
+import correlation
+from channel import MessageQueue
 from language import *
 from gameboard import Gameboard
+import decoders
+import evaluation
+from decoders import decode_HLO
 
 
 class BaseClient():
@@ -20,7 +35,76 @@ class BaseClient():
         self.power = None
         self.passcode = None
         self.variant = None
+        self.variant_options = {}
         self.press = 0
+        self.metrics = None
+        self.profiler = None
+        self.verbose = True
+
+        # Read the static map from tables shared by all bot processes on
+        # the host, instead of building a private copy (see maptables.py)
+        self.shared_map = False
+
+        # Phase deadlines, from HLO time limits and TME countdowns
+        self.deadline = None
+        self.deadline_margin = 2.0
+        self.last_recv_time = None
+        self.generation_thread = None
+        self.generating = None
+        self.checkpoint = None
+        self.overruns = 0
+        self.sync_deadlines = True
+        self.poll_interval = 0.05
+        # Messages read while waiting for generation, for the main loop
+        self.deferred = collections.deque()
+
+        # Pondering: orders generated for predicted positions while
+        # waiting for the next NOW
+        self.pondering = False
+        self.ponder_limit = 4
+        self.ponder_queue = []
+        self.pondered = {}
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+        # Threaded mode: a reader thread fills self.inbound and a writer
+        # thread drains self.outbound
+        self.threaded = False
+        self.inbound_size = 1024
+        self.inbound = None
+        self.outbound = None
+        self.io_threads = []
+
+        # Reconnect mode: if the connection drops mid-game, reconnect
+        # with jittered exponential backoff, resume with IAM and catch
+        # up from the server's SCO and NOW
+        self.reconnect = False
+        self.reconnect_attempts = 10
+        self.reconnect_delay = 0.5
+        self.reconnect_max_delay = 8.0
+        self.finished = False
+        self.recovering_since = None
+        self.history_nows = 0
+        self.recovery_times = []
+
+        # Press: FRM messages are queued per sender and handled only
+        # when no other message is waiting
+        self.press_queues = press.PressQueues()
+        self.press_encoder = press.Encoder()
+
+        # Incremental submission: after a phase's first SUB, only new or
+        # changed orders are sent, and dropped ones are withdrawn with
+        # NOT (SUB (order)); see submission.py
+        self.incremental_orders = False
+        self.submissions = submission.Submissions()
+
+        # Evaluation: positions or candidate order sets scored in
+        # batches shared with the other bots in the process
+        self.evaluator = None
+
+        # Requests in flight, resolved as their replies arrive; see
+        # correlation.py
+        self.requests = correlation.PendingRequests()
 
     def connect(self):
         '''
@@ -38,10 +122,81 @@ class BaseClient():
 
     def close(self):
         '''
-        Closes socket connection to the DAIDE server
+        Closes socket connection to the DAIDE server. In threaded mode
+        the writer thread sends any queued messages first.
         '''
-        self.sock.close()
         self.connected = False
+        self.finished = True
+        self.requests.abandon()
+        if self.outbound is not None:
+            self.outbound.close()
+        else:
+            self.sock.close()
+        if self.metrics:
+            self.metrics.close()
+
+    def enable_metrics(self, dump_path=None, dump_interval=60.0):
+        '''
+        Turns on latency and throughput instrumentation. Snapshots are
+        appended to dump_path every dump_interval seconds, and when
+        the connection is closed.
+        '''
+        self.metrics = instrument.Metrics(dump_path, dump_interval)
+
+    def enable_profiling(self, directory, **options):
+        '''
+        Turns on per-phase profiling of NOW handling (processing the
+        position, generating and submitting orders). See
+        instrument.PhaseProfiler for the options, e.g.
+        seasons={WIN}, every=10, allocations=True.
+        '''
+        self.profiler = instrument.PhaseProfiler(directory, **options)
+
+    def enable_evaluation(self, evaluate, **options):
+        '''
+        Sends evaluations to the process's shared EvaluationQueue for
+        evaluate, so they are batched with those of every other bot
+        using the same evaluator. See evaluation.EvaluationQueue for the
+        options, e.g. max_batch=128, max_delay=0.005.
+        '''
+        self.evaluator = evaluation.shared(evaluate, **options)
+
+    def evaluate(self, items):
+        '''
+        Returns the evaluator's results for a list of items, giving up
+        when the phase's time runs out.
+        '''
+        return self.evaluator.evaluate_many(items, self.time_left())
+
+    def metrics_snapshot(self):
+        '''
+        Returns a dict of the current metrics, with the shared
+        evaluation queue's stats, this phase's submission counts and the
+        request counts if those are in use, or None if metrics are
+        disabled.
+        '''
+        if self.metrics:
+            snapshot = self.metrics.snapshot()
+            if self.evaluator is not None:
+                snapshot['evaluation'] = self.evaluator.stats()
+            if self.incremental_orders:
+                snapshot['submission'] = dict(self.submissions.stats)
+            snapshot['requests'] = dict(self.requests.stats, in_flight=len(self.requests))
+            return snapshot
+        return None
+
+    def timed(self, name, func, *args):
+        '''
+        Calls func(*args), recording its duration under name when
+        metrics are enabled.
+        '''
+        if not self.metrics:
+            return func(*args)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.record(name, time.perf_counter() - start)
 
     def get_header(self):
         '''
@@ -50,7 +205,12 @@ class BaseClient():
         message length.
         '''
         if (self.connected):
-            header = self.sock.recv(4)
+            header = b''
+            while len(header) < 4:
+                chunk = self.sock.recv(4 - len(header))
+                if chunk == b'':
+                    raise RuntimeError("socket connection broken")
+                header += chunk
             (msg_type, msg_len) = struct.unpack('!bxh', header)
             return (msg_type, msg_len)
         else:
@@ -76,21 +236,32 @@ class BaseClient():
                 bytes_recvd = bytes_recvd + len(chunk)
 
             if msg:
-                return (msg_type, msg_len,  b''.join(msg))
+                message = b''.join(msg)
+                if self.metrics:
+                    self.metrics.frame_in(instrument.frame_kind(msg_type, message), msg_len + 4)
+                return (msg_type, msg_len, message)
 
         except Exception as e:
-            print(e)
+            # Errors after a deliberate close are expected
+            if self.connected:
+                print(e)
             self.connected = False
             self.sock.close()
 
     def write(self, message, msg_type):
         byte_length = len(message)
         header = struct.pack('!bxh', msg_type, byte_length)
-        message = header + message
-        if self.sock:
-            self.sock.send(message)
+        if self.outbound is not None:
+            # Press must not delay anything else, so every other frame
+            # jumps the queue ahead of it
+            urgent = not (msg_type == util.DM and decoders.command(message) is SND)
+            self.outbound.put(header + message, urgent)
+        elif self.sock:
+            self.sock.sendall(header + message)
         else:
             raise RuntimeError("socket connection broken")
+        if self.metrics:
+            self.metrics.frame_out(instrument.frame_kind(msg_type, message), byte_length + 4)
 
     def send_FM(self):
         self.write(0, 3)
@@ -98,15 +269,50 @@ class BaseClient():
     def send_dcsp(self, msg):
         self.write(msg.pack(), 2)
 
+    def request(self, msg, timeout=None, callback=None):
+        '''
+        Sends msg, a Message or its packed bytes, returning a
+        concurrent.futures.Future for the server's reply to it (see
+        correlation.py). The Future fails with TimeoutError if there is
+        no reply within timeout seconds. Replies still go to their
+        handle_ methods as well.
+        '''
+        future = self.requests.add(msg, timeout, callback)
+        try:
+            if isinstance(msg, Message):
+                self.send_dcsp(msg)
+            else:
+                self.write(msg, util.DM)
+        except Exception:
+            self.requests.discard(future)
+            raise
+        return future
+
     def send_OBS(self):
-        self.send_dcsp(+OBS)
+        return self.request(+OBS)
 
     def send_NME(self):
-        self.send_dcsp(NME(self.name)(self.version))
+        return self.request(NME(self.name)(self.version))
 
     def send_IAM(self):
         if self.power and self.passcode:
-            self.send_dcsp(IAM(self.power)(self.passcode))
+            return self.request(IAM(self.power)(self.passcode))
+
+    def send_TME(self, seconds=None):
+        '''
+        Asks the server for the time left, or to send a TME
+        countdown when that many seconds remain.
+        '''
+        if seconds is None:
+            return self.request(+TME)
+        return self.request(TME(seconds))
+
+    def send_press(self, recipients, message):
+        '''
+        Sends a press message, a press.Statement, to the recipients.
+        Returns a Future for the server's YES or REJ.
+        '''
+        return self.request(self.press_encoder.encode_SND(recipients, message))
 
     def send_initial_msg(self):
         msg = struct.pack('!HH', 1, 0xDA10)
@@ -119,15 +325,223 @@ class BaseClient():
         self.send_NME()
 
     def play(self):
+        self.finished = False
+        if self.threaded:
+            if not self.connected:
+                self.connect()
+            if self.connected:
+                self.start_io_threads()
         self.register()
+        while True:
+            self.play_connected()
+            self.stop_io_threads()
+            if self.finished or not self.reconnect or not self.resume():
+                break
+
+    def play_connected(self):
+        '''
+        Handles messages until the connection is closed or lost.
+        '''
         while self.connected:
-            msg = self.recv_msg()
+            if (self.press_queues or self.ponder_queue) and not self.readable():
+                if self.press_queues:
+                    self.press_step()
+                else:
+                    self.ponder_step()
+                continue
+            msg = self.next_message()
             if msg:
-                self.print_incoming_message(msg)
+                if self.verbose:
+                    self.print_incoming_message(msg)
                 self.handle_incoming_message(msg)
 
+    def resume(self):
+        '''
+        Reconnects after the connection was lost and asks to take the
+        power back with IAM. Attempts are spaced by an exponential
+        backoff, jittered so that bots dropped together don't retry in
+        step. Returns False if the power isn't known yet (there is
+        nothing to resume) or every attempt failed.
+        '''
+        if self.power is None or self.passcode is None:
+            return False
+        self.recovering_since = time.monotonic()
+        delay = self.reconnect_delay
+        for attempt in range(self.reconnect_attempts):
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.reconnect_max_delay)
+            self.connect()
+            if not self.connected:
+                continue
+            if self.threaded:
+                self.start_io_threads()
+            self.send_initial_msg()
+            self.send_IAM()
+            return True
+        print("Unable to reconnect.")
+        self.recovering_since = None
+        return False
+
+    def handle_YES_IAM(self, msg):
+        '''
+        The server has given the power back. The map is kept from
+        before, so only the position is asked for: HST for the turn
+        that was in play when the connection dropped, if its results
+        never arrived, then the current SCO and NOW.
+        '''
+        if self.map is None:
+            self.request_MAP()
+            return
+        turn = self.map.turn
+        if turn is not None and turn not in self.map.results:
+            self.history_nows += 1
+            self.send_dcsp(HST(*turn))
+        self.send_dcsp(+SCO)
+        self.send_dcsp(+NOW)
+
+    def handle_REJ_IAM(self, msg):
+        print("Server refused to resume the game.")
+        self.recovering_since = None
+        self.close()
+
+    def handle_REJ_HST(self, msg):
+        self.history_nows = max(0, self.history_nows - 1)
+
+    def next_message(self):
+        '''
+        Returns the next message from the server, deferred ones first
+        (see poll_deadline), and notes when it was received.
+        '''
+        if self.deferred:
+            self.last_recv_time, msg = self.deferred.popleft()
+            return msg
+        return self.read_message()
+
+    def read_message(self):
+        '''
+        Reads a message from the socket, or from the inbound queue in
+        threaded mode, and notes when it was received.
+        '''
+        if self.inbound is None:
+            msg = self.recv_msg()
+            self.last_recv_time = time.monotonic()
+            return msg
+        item = self.inbound.get()
+        if item is None:
+            self.connected = False
+            return None
+        self.last_recv_time, msg = item
+        return msg
+
+    # Messages the reader thread puts at the front of the inbound queue.
+    # Only those that change no game state may skip ahead: a DRW or SMR
+    # handled before the ORD in front of it would lose those results.
+    control_messages = {OFF, TME}
+
+    def start_io_threads(self):
+        '''
+        Starts the reader and writer threads for threaded mode.
+        '''
+        self.inbound = MessageQueue(self.inbound_size)
+        self.outbound = MessageQueue(float('inf'))
+        self.io_threads = [
+            threading.Thread(target=self.read_loop, name='pydip-reader', daemon=True),
+            threading.Thread(target=self.write_loop, name='pydip-writer', daemon=True),
+        ]
+        for thread in self.io_threads:
+            thread.start()
+
+    def stop_io_threads(self):
+        if self.outbound is not None:
+            self.outbound.close()
+        for thread in self.io_threads:
+            if thread is not threading.current_thread():
+                thread.join(5.0)
+        self.io_threads = []
+        self.inbound = None
+        self.outbound = None
+
+    def read_loop(self):
+        '''
+        Reader thread: frames incoming messages and queues them for the
+        logic thread, OFF and TME first.
+        '''
+        while self.connected:
+            msg = self.recv_msg()
+            if msg is None:
+                continue
+            msg_type, msg_len, message = msg
+            urgent = False
+            if msg_type == util.DM:
+                command = decoders.command(message)
+                # Press goes straight to its own queues, so a flood of
+                # it can't fill the inbound queue ahead of a NOW
+                if command is FRM:
+                    self.queue_press(message)
+                    continue
+                urgent = command in self.control_messages
+            self.inbound.put((time.monotonic(), (msg_type, msg_len, message)), urgent)
+        self.inbound.close()
+
+    def write_loop(self):
+        '''
+        Writer thread: sends queued frames until the queue is closed
+        and empty, then closes the socket.
+        '''
+        while True:
+            frame = self.outbound.get()
+            if frame is None:
+                break
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                print(e)
+                break
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def readable(self):
+        '''
+        True if a message is waiting to be read from the server.
+        '''
+        return bool(self.deferred) or self.input_waiting()
+
+    def input_waiting(self):
+        '''
+        True if a message is waiting on the socket or the inbound queue,
+        not counting deferred ones.
+        '''
+        if self.inbound is not None:
+            return len(self.inbound) > 0
+        if self.sock is None:
+            return False
+        return bool(select.select([self.sock], [], [], 0)[0])
+
+    def poll_deadline(self):
+        '''
+        Reads the messages already waiting while orders are being
+        generated. TME is handled at once, so the server's reply to the
+        TME sent at the start of the phase moves the deadline the
+        generation is working to; the rest are deferred to the main
+        loop, in order.
+        '''
+        while self.connected and self.input_waiting():
+            msg = self.read_message()
+            if msg is None:
+                return
+            msg_type, msg_len, message = msg
+            if msg_type == util.DM and decoders.command(message) is TME:
+                if self.verbose:
+                    self.print_incoming_message(msg)
+                self.handle_incoming_message(msg)
+            else:
+                self.deferred.append((self.last_recv_time, msg))
+
     def request_MAP(self):
-        self.send_dcsp(+MAP)
+        return self.request(+MAP)
 
     def reply_YES(self, msg):
         self.send_dcsp(YES(msg))
@@ -137,6 +551,8 @@ class BaseClient():
 
     def handle_incoming_message(self, msg):
         msg_type, msg_len, message = msg
+        if self.metrics:
+            self.metrics.dispatched()
 
         if (msg_type == util.RM):
             self.handle_representation_message(message)
@@ -147,17 +563,32 @@ class BaseClient():
 
     def print_incoming_message(self, msg):
         msg_type, msg_len, message = msg
-        message = Message.translate_from_bytes(message)
+        if not isinstance(message, Message):
+            try:
+                message = Message.translate_from_bytes(message)
+            except ValueError as e:
+                message = '%s: %r' % (e, message)
         print(message)
 
+    # Commands whose handlers get the raw bytes, for decoders.py
+    raw_commands = {MDF, HLO, NOW, SCO, ORD, FRM}
+
     def handle_diplomacy_message(self, msg):
-        msg = Message.translate_from_bytes(msg)
-        method_name = 'handle_' + str(msg[0])
-        if msg[0] in (YES, REJ):
+        command = decoders.command(msg)
+        if self.requests.pending and command in correlation.REPLIES:
+            self.requests.handle(msg)
+        if command not in self.raw_commands and not isinstance(msg, Message):
+            try:
+                msg = Message.translate_from_bytes(msg)
+            except ValueError as e:
+                print(e)
+                return
+        method_name = 'handle_' + str(command)
+        if command in (YES, REJ):
             method_name += '_' + str(msg[2])
         method = getattr(self, method_name, None)
         if method:
-            return method(msg)
+            return self.timed(method_name, method, msg)
 
     def handle_representation_message(self, msg):
         raise NotImplementedError
@@ -166,7 +597,10 @@ class BaseClient():
         raise NotImplementedError
 
     def handle_MDF(self, MDF_msg):
-        self.map = Gameboard(self.power, MDF_msg)
+        if self.shared_map:
+            self.map = Gameboard(self.power, MDF_msg, maptables.attach(MDF_msg))
+        else:
+            self.map = Gameboard(self.power, MDF_msg)
         self.send_dcsp(YES(MAP(self.variant)))
 
     def handle_MAP(self, msg):
@@ -178,25 +612,99 @@ class BaseClient():
             self.reply_YES(msg)
 
     def handle_HLO(self, msg):
-        # TODO: right now very basic handling of variant options
-        folded_HLO = msg.fold()
-        self.power = folded_HLO[1][0]
+        hello = decode_HLO(msg)
+        self.power = hello.power
         self.map.power_played = self.power
-        self.passcode = folded_HLO[2][0]
-        self.press = folded_HLO[3][0][1]
+        self.passcode = hello.passcode
+        self.variant_options = hello.variant
+        self.press = hello.variant.get(LVL, 0)
+
+    def handle_FRM(self, msg):
+        self.queue_press(msg)
+
+    def queue_press(self, msg):
+        try:
+            self.press_queues.put(press.decode_FRM(msg))
+        except ValueError as e:
+            print(e)
+
+    def press_step(self):
+        '''
+        Handles one queued press message.
+        '''
+        received = self.press_queues.get()
+        if received is not None:
+            self.timed('handle_press', self.handle_press, received)
+
+    def handle_press(self, received):
+        '''
+        Called with each incoming press.Press when the client is
+        otherwise idle. Bots that negotiate override this; replies are
+        sent with send_press.
+        '''
+        pass
 
     def handle_SCO(self, msg):
         self.map.process_SCO(msg)
 
     def handle_NOW(self, msg):
+        if self.history_nows:
+            # The position that ends an HST reply; only its ORDs matter
+            self.history_nows -= 1
+            return
+        if self.profiler is None:
+            self.play_phase(msg)
+        else:
+            with self.profiler.phase(self.power, decoders.peek_turn(msg)):
+                self.play_phase(msg)
+        if self.recovering_since is not None:
+            self.recovered()
+
+    def recovered(self):
+        '''
+        Notes the time from losing the connection to having orders in
+        for the current phase again.
+        '''
+        seconds = time.monotonic() - self.recovering_since
+        self.recovering_since = None
+        self.recovery_times.append(seconds)
+        if self.metrics:
+            self.metrics.record('recover', seconds)
+        if self.verbose:
+            print("Recovered in %.2f s" % seconds)
+
+    def play_phase(self, msg):
         self.map.process_NOW(msg)
-        if self.map.missing_orders():
-            self.generate_orders()
-        self.submit_orders()
+        self.submissions.new_phase(self.map.turn)
+        # THX for the last phase's orders would have come before its end
+        self.requests.abandon(orders_only=True)
+        self.start_phase_clock()
+        pondered = self.pondering and self.use_pondered()
+        if not pondered and self.map.missing_orders():
+            self.run_generation()
+        self.timed('submit_orders', self.submit_orders)
+        if self.pondering:
+            self.start_pondering()
+
+    def handle_TME(self, msg):
+        seconds = msg.fold()[1][0]
+        self.deadline = time.monotonic() + seconds
 
     def handle_ORD(self, msg):
         self.map.process_ORD(msg)
 
+    def handle_THX(self, msg):
+        if self.incremental_orders:
+            self.submissions.handle_THX(msg, AOA in self.variant_options)
+
+    def handle_YES_NOT(self, msg):
+        if self.incremental_orders:
+            self.submissions.handle_NOT(msg, True)
+
+    def handle_REJ_NOT(self, msg):
+        if self.incremental_orders:
+            self.submissions.handle_NOT(msg, False)
+
     # End of game
     def handle_OFF(self, msg):
         self.close()
@@ -207,18 +715,231 @@ class BaseClient():
     def handle_SMR(self, msg):
         self.close()
 
-    def generate_orders(self):
+    def start_pondering(self):
+        '''
+        Queues the likeliest next positions, given the orders just
+        submitted, for ponder_step to generate orders for. Nothing is
+        queued while an overrunning generation still holds the CPU, or
+        for a bot whose generate_orders only works on self.map.
+        '''
+        self.pondered = {}
+        self.ponder_queue = []
+        if self.generation_thread is not None and self.generation_thread.is_alive():
+            return
+        if self.legacy_generation():
+            return
+        self.ponder_queue = ponder.predict(self.map, self.map.orders[self.map.turn], self.ponder_limit)
+
+    def ponder_step(self):
+        '''
+        Generates orders for one predicted position on a forked
+        Gameboard. Results are keyed by the position hash, which covers
+        SC ownership as well as units, so orders pondered on a predicted
+        SCO are only used if the real one matches.
+        '''
+        now, sco = self.ponder_queue.pop(0)
+        board = self.map.fork()
+        if sco is not None:
+            board.process_SCO(sco)
+        board.process_NOW(now)
+        self.generating = board
+        try:
+            self.timed('ponder', self.generate_orders, board, None)
+        finally:
+            self.generating = None
+        self.pondered[board.position_hash] = list(board.orders[board.turn])
+
+    def use_pondered(self):
+        '''
+        Adds the orders pondered for the position that has arrived, if
+        it was predicted. Returns True on a hit.
+        '''
+        self.ponder_queue = []
+        if not self.pondered:
+            return False
+        orders = self.pondered.get(self.map.position_hash)
+        self.pondered = {}
+        if orders is None:
+            self.ponder_misses += 1
+            return False
+        self.ponder_hits += 1
+        for order in orders:
+            self.map.add(order)
+        return True
+
+    def ponder_hit_rate(self):
+        '''
+        Fraction of phases whose position had been pondered, or None
+        before the first pondered phase.
+        '''
+        total = self.ponder_hits + self.ponder_misses
+        if not total:
+            return None
+        return self.ponder_hits / total
+
+    def phase_time_limit(self):
+        '''
+        Returns the time limit in seconds for the current phase, from the
+        MTL, RTL and BTL variant options, or None if there is none.
+        '''
+        if self.map.season in (SPR, FAL):
+            option = MTL
+        elif self.map.season in (SUM, AUT):
+            option = RTL
+        else:
+            option = BTL
+        return self.variant_options.get(option) or None
+
+    def start_phase_clock(self):
+        '''
+        Sets the deadline for the phase that has just started, counting
+        from when its NOW message was received.
+        '''
+        limit = self.phase_time_limit()
+        if limit is None:
+            self.deadline = None
+        else:
+            start = self.last_recv_time or time.monotonic()
+            self.deadline = start + limit
+            # The server only sends TME when asked; its reply corrects
+            # the deadline for any lag before the NOW reached us.
+            if self.sync_deadlines:
+                self.send_TME()
+
+    def time_left(self):
+        '''
+        Seconds left before orders must be submitted, i.e. before the
+        phase deadline less the safety margin. None if there is no
+        deadline.
+        '''
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.deadline_margin - time.monotonic())
+
+    def should_stop(self, board):
+        '''
+        True once generation for board should give up: its budget is
+        spent, or it has been abandoned after an overrun. Each call
+        also checkpoints board's orders, which are what gets submitted
+        if the generation overruns.
+        '''
+        if board is not self.generating:
+            return True
+        self.save_checkpoint(board)
+        return self.time_left() == 0
+
+    def save_checkpoint(self, board):
+        '''
+        Notes a copy of board's orders for the current turn, unless they
+        are unchanged since the last checkpoint. Called on the thread
+        generating on board, so the copy is never taken mid-update.
+        '''
+        checkpoint = self.checkpoint
+        if checkpoint is not None and checkpoint[0] is board and checkpoint[1] == board.orders_hash:
+            return
+        self.checkpoint = (board, board.orders_hash, list(board.orders.get(board.turn, ())))
+
+    def legacy_generation(self):
+        '''
+        True if generate_orders has the original signature,
+        generate_orders(self), and adds its orders to self.map.
+        '''
+        try:
+            return not inspect.signature(self.generate_orders).parameters
+        except (TypeError, ValueError):
+            return False
+
+    def generate(self, board, budget):
+        '''
+        Runs generate_orders on board and checkpoints the result, unless
+        board has been abandoned meanwhile.
+        '''
+        try:
+            self.timed('generate_orders', self.generate_orders, board, budget)
+        finally:
+            if board is self.generating:
+                self.save_checkpoint(board)
+
+    def run_generation(self):
+        '''
+        Runs generate_orders on a fork of the Gameboard, with the time
+        left as its budget, then adds the orders it produced to
+        self.map. Without a deadline it runs to completion. With one,
+        it runs in a worker thread while this thread waits, applying
+        any TME that arrives (see poll_deadline); once the budget is
+        spent the orders of the worker's last checkpoint (see
+        should_stop) are taken instead. An overrunning thread is
+        abandoned: should_stop tells it to give up, and whatever it adds
+        later stays on its fork.
+        A bot with the original generate_orders(self) is run to
+        completion on self.map, as before.
+        '''
+        if self.legacy_generation():
+            self.timed('generate_orders', self.generate_orders)
+            return
+        board = self.map.fork()
+        budget = self.time_left()
+        self.generating = board
+        self.checkpoint = None
+        if budget is None:
+            self.generate(board, None)
+        else:
+            target = self.generate
+            if self.profiler is not None:
+                target = self.profiler.wrap_thread(target)
+            thread = threading.Thread(target=target, args=(board, budget), daemon=True)
+            thread.start()
+            while thread.is_alive():
+                left = self.time_left()
+                if left == 0:
+                    break
+                thread.join(min(left, self.poll_interval))
+                self.poll_deadline()
+            if thread.is_alive():
+                self.overruns += 1
+            self.generation_thread = thread
+        self.generating = None
+        checkpoint = self.checkpoint
+        self.checkpoint = None
+        if checkpoint is not None and checkpoint[0] is board:
+            for order in checkpoint[2]:
+                self.map.add(order)
+
+    def generate_orders(self, board, budget=None):
+        '''
+        Adds orders for the current phase to board, a private fork of
+        self.map. budget is the number of seconds available when
+        generation starts, or None if there is no deadline; the deadline
+        may still move when the server's TME arrives. Long-running
+        implementations should add a complete order set early and
+        refine it (adding a new order for a unit replaces its old one),
+        checking self.should_stop(board) as they go; if the budget runs
+        out, the orders board had at the last should_stop call are
+        submitted.
+        Bots written for the original generate_orders(self), which adds
+        orders to self.map, still work; they are run to completion.
+        '''
         raise NotImplementedError
 
-    def submit_orders(self):
+    def submit_orders(self, board=None):
         '''
         Submit orders to the server. The Message takes the form of
         'SUB (order) (order) ...'
         See section 3 of the DAIDE syntax document for more details.
+        With incremental_orders, only the orders that changed since the
+        last submission this phase are sent. An anytime bot can submit
+        the orders on its fork, board, as it improves them.
+        Returns a Future for each message sent, resolving to the THX
+        notes (or the YES/REJ of a withdrawal).
         '''
-        orders = self.map.get_orders()
+        if board is None:
+            board = self.map
+        if self.incremental_orders:
+            return [self.request(msg) for msg in self.submissions.update(board.orders[board.turn])]
+        orders = board.get_orders()
         if orders != Message():
-            self.send_dcsp(+SUB + orders)
+            return [self.request(+SUB + orders)]
+        return []
 
 
 if __name__ == '__main__':
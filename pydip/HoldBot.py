@@ -14,34 +14,34 @@ class HoldBot(BaseClient):
         self.name = 'HoldBot'
         self.version = '1.0'
 
-    def generate_orders(self):
-        units = self.map.get_own_units()
+    def generate_orders(self, board, budget=None):
+        units = board.get_own_units()
 
         # Movement phase
-        if self.map.season in [SPR, FAL]:
+        if board.season in [SPR, FAL]:
             for unit in units:
-                self.map.add(HoldOrder(unit))
+                board.add(HoldOrder(unit))
 
         # Retreat phase
-        elif self.map.season in [SUM, AUT]:
-            for unit, opts in self.map.get_dislodged():
+        elif board.season in [SUM, AUT]:
+            for unit, opts in board.get_dislodged():
                 # No retreat options; disband unit.
                 if opts == []:
-                    self.map.add(DisbandOrder(unit))
+                    board.add(DisbandOrder(unit))
                 # There is at least one province to retreat to.
                 # Just choose the first province available.
                 else:
-                    self.map.add(RetreatOrder(unit, opts[0]))
+                    board.add(RetreatOrder(unit, opts[0]))
 
         # Adjustment phase
         else:
-            build_num = self.map.build_number()
+            build_num = board.build_number()
             # More units than sc's; need to remove some units
             if build_num < 0:
-                unordered = self.map.get_unordered()
+                unordered = board.get_unordered()
                 for i in range(abs(build_num)):
-                    self.map.add(RemoveOrder(unordered[i]))
+                    board.add(RemoveOrder(unordered[i]))
             # Somehow got more sc's; need to waive all builds
             elif build_num > 0:
                 for i in range(build_num):
-                    self.map.add(WaiveOrder(self.power))
+                    board.add(WaiveOrder(self.power))
@@ -1,14 +1,63 @@
 from BaseClient import BaseClient
+from fanout import FanOut, PUBLISHED
+import decoders
+from language import *
 
 
 class Observer(BaseClient):
-    def __init__(self, host='127.0.0.1', port=16713):
+    '''
+    Watches a game with OBS. If fanout_path is given, the game is also
+    republished to local subscribers on a Unix-domain socket at that
+    path (see fanout.py), so that many tools can share one observer
+    connection.
+    '''
+    def __init__(self, host='127.0.0.1', port=16713, fanout_path=None):
         BaseClient.__init__(self, host, port)
         self.name = 'ObserverBot'
         self.version = '1.0'
+        self.fanout_path = fanout_path
+        self.fanout = None
+        # The latest SCO and NOW that came before the map, by command
+        self.early_position = {}
 
     def register(self):
         if not self.connected:
             self.connect()
+        if self.fanout_path and self.fanout is None:
+            self.fanout = FanOut(self.fanout_path)
         self.send_initial_msg()
         self.send_OBS()
+
+    def handle_diplomacy_message(self, msg):
+        if self.fanout is not None and decoders.command(msg) in PUBLISHED:
+            self.fanout.publish(msg if isinstance(msg, bytes) else msg.pack())
+        return BaseClient.handle_diplomacy_message(self, msg)
+
+    def handle_MDF(self, MDF_msg):
+        BaseClient.handle_MDF(self, MDF_msg)
+        early, self.early_position = self.early_position, {}
+        if SCO in early:
+            self.map.process_SCO(early[SCO])
+        if NOW in early:
+            self.map.process_NOW(early[NOW])
+
+    def handle_SCO(self, msg):
+        if self.map is None:
+            self.early_position[SCO] = msg
+        else:
+            self.map.process_SCO(msg)
+
+    def handle_NOW(self, msg):
+        # There are no orders to generate for an observer. A game in
+        # progress may send the position before the map; it is kept
+        # until MDF arrives.
+        if self.map is None:
+            self.early_position[NOW] = msg
+        else:
+            self.map.process_NOW(msg)
+
+    def close(self):
+        BaseClient.close(self)
+        if self.fanout is not None:
+            self.fanout.close()
+            self.fanout = None
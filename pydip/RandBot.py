@@ -17,54 +17,54 @@ class RandBot(BaseClient):
         self.name = 'HoldBot'
         self.version = '1.0'
 
-    def generate_orders(self):
-        units = self.map.get_own_units()
-        season = self.map.season
+    def generate_orders(self, board, budget=None):
+        units = board.get_own_units()
+        season = board.season
 
         # Movement phase
         if season in [SPR, FAL]:
-            self.generate_movement_orders()
+            self.generate_movement_orders(board)
         # Retreat phase
         elif season in [SUM, AUT]:
-            self.generate_retreat_orders()
+            self.generate_retreat_orders(board)
         # Adjustment phase
         else:
-            self.generate_adjustment_orders()
+            self.generate_adjustment_orders(board)
 
-    def generate_movement_orders(self):
-        for unit in self.map.get_own_units():
+    def generate_movement_orders(self, board):
+        for unit in board.get_own_units():
             order = random.choice(self.movement_phase_orders)
             if order == MoveOrder:
-                adj_provs = self.map.get_moveable_adjacencies(unit)
+                adj_provs = board.get_moveable_adjacencies(unit)
                 destination = random.choice(adj_provs)
-                self.map.add(order(unit, destination))
+                board.add(order(unit, destination))
             else:
-                self.map.add(order(unit))
+                board.add(order(unit))
 
-    def generate_retreat_orders(self):
-        for unit, opts in self.map.get_dislodged():
+    def generate_retreat_orders(self, board):
+        for unit, opts in board.get_dislodged():
             # No retreat options; disband unit.
             if opts == []:
-                self.map.add(DisbandOrder(unit))
+                board.add(DisbandOrder(unit))
             # There is at least one province to retreat to.
             # Choose a random one.
             else:
                 retreat_dest = random.choice(opts)
-                self.map.add(RetreatOrder(unit, retreat_dest))
+                board.add(RetreatOrder(unit, retreat_dest))
 
-    def generate_adjustment_orders(self):
-        units = self.map.get_own_units()
-        surplus = self.map.sc_surplus()
+    def generate_adjustment_orders(self, board):
+        units = board.get_own_units()
+        surplus = board.sc_surplus()
 
         # More units than supply centers; randomly remove units
         if surplus < 0:
             random.shuffle(units)
             for i in range(abs(surplus)):
-                self.map.add(RemoveOrder(units[i]))
+                board.add(RemoveOrder(units[i]))
 
         elif surplus > 0:
-            builds, waives = self.map.build_numbers()
-            homes = self.map.open_home_centers()
+            builds, waives = board.build_numbers()
+            homes = board.open_home_centers()
             random.shuffle(homes)
             for i in range(builds):
                 province = homes[i]
@@ -72,14 +72,14 @@ class RandBot(BaseClient):
                 if province.is_coastal():
                     unit_type = random.choice([AMY, FLT])
                     if unit_type == FLT and province.is_bicoastal():
-                        coast = random.choice(self.map.coasts[province])
+                        coast = random.choice(board.coasts[province])
                 else:
                     unit_type = AMY
                 unit = Unit(self.power, unit_type, (province, coast))
-                self.map.add(BuildOrder(unit))
+                board.add(BuildOrder(unit))
 
             for i in range(waives):
-                self.map.add(WaiveOrder(self.power))
+                board.add(WaiveOrder(self.power))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+'''
+Thread-safe message queue used between the network threads and the bot
+logic in BaseClient's threaded mode.
+'''
+import collections
+import threading
+
+
+class MessageQueue():
+    '''
+    Bounded FIFO queue in which urgent items skip ahead of normal ones
+    (but stay in order among themselves). Normal puts block while the
+    queue is full; urgent puts never block. Once closed, get returns the
+    remaining items and then None.
+    '''
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.urgent = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item, urgent=False):
+        with self.cond:
+            if urgent:
+                self.items.insert(self.urgent, item)
+                self.urgent += 1
+            else:
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self.cond.wait()
+                self.items.append(item)
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None
+            if self.urgent:
+                self.urgent -= 1
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
@@ -0,0 +1,258 @@
+'''
+Replies matched to the requests that caused them.
+
+DAIDE has no request ids, but nearly every reply says what it answers:
+YES (message) and REJ (message) echo the request, HUH (message) echoes
+it with ERR where parsing failed, and THX (order) (note) echoes one
+order of a SUB. Queries (+MAP, +MDF, +NOW, +SCO, +HLO, +MIS, +TME) are
+answered by a message of the same command. PendingRequests keeps the
+requests in flight and resolves each one's Future when its reply
+arrives, so a bot can have orders, press and queries outstanding at
+once and wait on whichever it needs:
+
+    future = client.request(+SCO, timeout=5.0)
+    ...
+    reply = future.result()     # Reply(command=SCO, message=...)
+
+A request resolves to a Reply:
+- YES, REJ      Reply(YES or REJ, the reply Message)
+- a query       Reply(command, the reply as dispatched: raw bytes for
+                BaseClient.raw_commands, a Message otherwise)
+- SUB           Reply(THX, [(order key, note), ...]) once every order
+                in it has had its THX
+A HUH fails the Future with RequestError, and a request with a timeout
+that gets no reply in time fails with concurrent.futures.TimeoutError.
+
+Requests with the same content are answered in the order they were
+sent. A reply that answers no request is left to the usual handlers,
+which see every message either way.
+'''
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+
+from language import *
+import decoders
+from decoders import Reader
+
+
+Reply = collections.namedtuple('Reply', 'command message')
+
+# Queries and the command that answers them
+QUERIES = {MAP: MAP, MDF: MDF, NOW: NOW, SCO: SCO, HLO: HLO, MIS: MIS, TME: TME}
+# Commands that can answer a request
+REPLIES = {YES, REJ, HUH, THX} | set(QUERIES.values())
+
+_SUB = SUB._hex
+_ERR = ERR._hex
+_seasons = {SPR, SUM, FAL, AUT, WIN}
+
+
+class RequestError(Exception):
+    '''
+    The server could not parse a request; reply is its HUH, with ERR
+    where the error is.
+    '''
+    def __init__(self, reply):
+        Exception.__init__(self, 'server could not parse: %s' % reply)
+        self.reply = reply
+
+
+class Request():
+    '''
+    - message       the request, a Message or its packed bytes
+    - values        its token values, as echoed in replies
+    - answer        command of the reply to a query, or None
+    - orders        keys of a SUB's orders still waiting for THX
+    - notes         (order key, note) for a SUB's orders so far
+    '''
+    def __init__(self, message, deadline):
+        self.message = message
+        self.values = values = tuple(Reader(message).values)
+        self.deadline = deadline
+        self.future = concurrent.futures.Future()
+        self.answer = None
+        self.orders = None
+        self.notes = None
+        if len(values) == 1:
+            self.answer = QUERIES.get(tokens_by_value.get(values[0]))
+        elif values[0] == _SUB:
+            reader = Reader.from_values(values)
+            reader.next()
+            self.orders = []
+            while not reader.done():
+                group = reader.group()
+                # SUB (turn) (order) ...
+                if not self.orders and len(group) == 2 and group[0] in _seasons:
+                    continue
+                self.orders.append(group)
+            self.notes = []
+
+
+class PendingRequests():
+    '''
+    The requests awaiting replies. add() is called before a request is
+    sent and handle() with every diplomacy message received; requests
+    may be added from any thread. Timeouts are enforced by a thread
+    started with the first request that has one.
+    '''
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.pending = []
+        self.deadlines = []
+        self.sequence = itertools.count()
+        self.timer = None
+        self.stats = {
+            'requests': 0,
+            'replies': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'abandoned': 0,
+            'in_flight_max': 0,
+        }
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, msg, timeout=None, callback=None):
+        '''
+        Notes msg, a Message or its packed bytes, as sent. Returns a
+        concurrent.futures.Future for its Reply; callback, if given, is
+        called with the Future when it is done.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        request = Request(msg, deadline)
+        if callback is not None:
+            request.future.add_done_callback(callback)
+        with self.lock:
+            self.pending.append(request)
+            self.stats['requests'] += 1
+            self.stats['in_flight_max'] = max(self.stats['in_flight_max'], len(self.pending))
+            if deadline is not None:
+                heapq.heappush(self.deadlines, (deadline, next(self.sequence), request))
+                if self.timer is None:
+                    self.timer = threading.Thread(target=self.run, name='pydip-requests', daemon=True)
+                    self.timer.start()
+                elif self.deadlines[0][2] is request:
+                    self.lock.notify()
+        return request.future
+
+    def discard(self, future):
+        '''
+        Forgets the request for future, e.g. when sending it failed.
+        '''
+        with self.lock:
+            self.pending = [request for request in self.pending if request.future is not future]
+
+    def handle(self, msg):
+        '''
+        Resolves the request msg, a reply given as a Message or raw
+        bytes, answers. Returns True if it answered one.
+        '''
+        command = decoders.command(msg)
+        if command not in REPLIES:
+            return False
+        reader = Reader(msg)
+        values = reader.values
+        if command in (YES, REJ, HUH):
+            echoed = tuple(values[2:-1])
+            if command is HUH:
+                echoed = tuple(value for value in echoed if value != _ERR)
+            with self.lock:
+                request = self.take(lambda request: request.values == echoed)
+                if request is not None and command is HUH:
+                    self.stats['errors'] += 1
+            if request is None:
+                return False
+            if command is HUH:
+                request.future.set_exception(RequestError(self.as_message(msg)))
+            else:
+                request.future.set_result(Reply(command, self.as_message(msg)))
+            return True
+        if command is THX:
+            reader.next()
+            key = reader.group()
+            note = reader.group()
+            with self.lock:
+                request = next((request for request in self.pending
+                                if request.orders and key in request.orders), None)
+                if request is None:
+                    return False
+                request.orders.remove(key)
+                request.notes.append((key, note[0] if len(note) == 1 else note))
+                if request.orders:
+                    return True
+                self.pending.remove(request)
+                self.stats['replies'] += 1
+            request.future.set_result(Reply(THX, request.notes))
+            return True
+        with self.lock:
+            request = self.take(lambda request: request.answer is command)
+        if request is None:
+            return False
+        request.future.set_result(Reply(command, msg))
+        return True
+
+    def take(self, match):
+        '''
+        Removes and returns the oldest pending request that matches, or
+        None. Called with the lock held.
+        '''
+        for i, request in enumerate(self.pending):
+            if match(request):
+                del self.pending[i]
+                self.stats['replies'] += 1
+                return request
+        return None
+
+    @staticmethod
+    def as_message(msg):
+        if isinstance(msg, Message):
+            return msg
+        return Message.translate_from_bytes(msg)
+
+    def expire(self, now=None):
+        '''
+        Fails the requests whose timeouts have run out, returning how
+        many there were.
+        '''
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                deadline, _, request = heapq.heappop(self.deadlines)
+                if request in self.pending:
+                    self.pending.remove(request)
+                    expired.append(request)
+            self.stats['timeouts'] += len(expired)
+        for request in expired:
+            request.future.set_exception(concurrent.futures.TimeoutError(
+                'no reply to %s' % self.as_message(request.message)))
+        return len(expired)
+
+    def run(self):
+        while True:
+            self.expire()
+            with self.lock:
+                if not self.deadlines:
+                    self.lock.wait()
+                else:
+                    wait = self.deadlines[0][0] - time.monotonic()
+                    if wait > 0:
+                        self.lock.wait(wait)
+
+    def abandon(self, orders_only=False):
+        '''
+        Cancels the pending requests, or only the SUBs, e.g. those of a
+        phase that has ended without every THX arriving.
+        '''
+        with self.lock:
+            abandoned = [request for request in self.pending
+                         if not orders_only or request.orders is not None]
+            self.pending = [request for request in self.pending if request not in abandoned]
+            self.stats['abandoned'] += len(abandoned)
+        for request in abandoned:
+            request.future.cancel()
@@ -0,0 +1,368 @@
+'''
+Decoders for the messages a client spends most of its time on
+(MDF, HLO, NOW, SCO and ORD).
+
+Each decoder walks the 16-bit token values of a message following its
+grammar in the DAIDE syntax document and returns typed records, without
+going through a Token list and Message.fold(). A decoder accepts either
+the raw bytes of a diplomacy message or an already translated Message.
+'''
+import collections
+import hashlib
+import struct
+
+from language import *
+
+
+Turn = collections.namedtuple('Turn', 'season year')
+UnitPosition = collections.namedtuple('UnitPosition', 'power unit_type province coast retreats')
+Now = collections.namedtuple('Now', 'turn units')
+Hello = collections.namedtuple('Hello', 'power passcode variant')
+MapDefinition = collections.namedtuple('MapDefinition', 'powers home_centers non_home_centers adjacencies')
+OrderResult = collections.namedtuple('OrderResult', 'turn order result')
+
+_BRA = BRA._hex
+_KET = KET._hex
+_TEXT = 0x4B
+_tokens = tokens_by_value
+
+
+class Reader():
+    '''
+    Cursor over the token values of a single message.
+    '''
+    def __init__(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            if len(data) % 2:
+                raise ValueError('message of odd length %d' % len(data))
+            self.values = struct.unpack('!%dH' % (len(data) // 2), data)
+        else:
+            self.values = [token._hex for token in data]
+        self.pos = 0
+
+    @classmethod
+    def from_values(cls, values):
+        '''
+        Returns a Reader over a sequence of token values, e.g. a slice
+        of a memoryview, without copying it.
+        '''
+        reader = cls.__new__(cls)
+        reader.values = values
+        reader.pos = 0
+        return reader
+
+    def done(self):
+        return self.pos >= len(self.values)
+
+    def peek(self):
+        if self.pos < len(self.values):
+            return self.values[self.pos]
+        return None
+
+    def next(self):
+        try:
+            value = self.values[self.pos]
+        except IndexError:
+            raise ValueError('message ended unexpectedly')
+        self.pos += 1
+        return value
+
+    def expect(self, token):
+        value = self.next()
+        if value != token._hex:
+            raise ValueError('expected %s at %d, got 0x%04X' % (token.tla, self.pos - 1, value))
+
+    def open(self):
+        self.expect(BRA)
+
+    def close(self):
+        self.expect(KET)
+
+    def at_close(self):
+        return self.peek() == _KET
+
+    @staticmethod
+    def atom(value):
+        '''
+        Converts a single non-bracket value to an int, str or Token.
+        '''
+        if value < 0x4000:
+            return value
+        token = _tokens.get(value)
+        if token is not None:
+            return token
+        if value >> 8 == _TEXT:
+            return chr(value & 0xFF)
+        raise ValueError('unknown token 0x%04X' % value)
+
+    def token(self):
+        value = self.next()
+        token = _tokens.get(value)
+        if token is None or value in (_BRA, _KET):
+            raise ValueError('expected a token at %d, got 0x%04X' % (self.pos - 1, value))
+        return token
+
+    def integer(self):
+        value = self.next()
+        if value >= 0x4000:
+            raise ValueError('expected an integer at %d, got 0x%04X' % (self.pos - 1, value))
+        return value
+
+    def text(self):
+        '''
+        Reads a run of TEXT tokens as one string.
+        '''
+        start = self.pos
+        values = self.values
+        while self.pos < len(values) and values[self.pos] >> 8 == _TEXT:
+            self.pos += 1
+        return bytes(v & 0xFF for v in values[start:self.pos]).decode('latin-1')
+
+    def location(self):
+        '''
+        Reads either 'province' or '(province coast)'.
+        Returns a (province, coast) tuple; coast is None if absent.
+        '''
+        if self.peek() == _BRA:
+            self.pos += 1
+            province = self.token()
+            coast = self.token()
+            self.close()
+            return (province, coast)
+        return (self.token(), None)
+
+    def group(self):
+        '''
+        Reads a bracketed group of any shape into nested tuples, in the
+        same layout Message.fold() produces lists: runs of text become
+        one str, integers become ints.
+        '''
+        self.open()
+        items = []
+        while True:
+            value = self.next()
+            if value >> 8 == _TEXT:
+                self.pos -= 1
+                items.append(self.text())
+            elif value == _KET:
+                return tuple(items)
+            elif value == _BRA:
+                self.pos -= 1
+                items.append(self.group())
+            else:
+                items.append(self.atom(value))
+
+    def turn(self):
+        self.open()
+        season = self.token()
+        year = self.integer()
+        self.close()
+        return Turn(season, year)
+
+
+def _place(location):
+    '''
+    (province, None) -> province, (province, coast) unchanged,
+    matching the layout of Gameboard.adjacencies.
+    '''
+    province, coast = location
+    return province if coast is None else location
+
+
+def decode_NOW(data):
+    '''
+    NOW (turn) (unit) (unit) ...
+    where a unit is (power unit_type province [MRT (province ...)]).
+    Retreat options are None for units that were not dislodged.
+    '''
+    reader = Reader(data)
+    reader.expect(NOW)
+    turn = reader.turn()
+    units = []
+    while not reader.done():
+        reader.open()
+        power = reader.token()
+        unit_type = reader.token()
+        province, coast = reader.location()
+        retreats = None
+        if reader.peek() == MRT._hex:
+            reader.pos += 1
+            reader.open()
+            retreats = []
+            while not reader.at_close():
+                retreats.append(_place(reader.location()))
+            reader.close()
+        reader.close()
+        units.append(UnitPosition(power, unit_type, province, coast, retreats))
+    return Now(turn, units)
+
+
+def decode_SCO(data):
+    '''
+    SCO (power centre centre ...) (power centre ...) ...
+    Returns a dict of power to list of centres. Unowned centres are
+    listed against UNO.
+    '''
+    reader = Reader(data)
+    reader.expect(SCO)
+    owners = {}
+    while not reader.done():
+        reader.open()
+        power = reader.token()
+        centers = []
+        while not reader.at_close():
+            centers.append(reader.token())
+        reader.close()
+        owners[power] = centers
+    return owners
+
+
+def decode_ORD(data):
+    '''
+    ORD (turn) (order) (result)
+    The order is returned as nested tuples, the same shape as an
+    Order's key, and the result as a tuple of result tokens,
+    e.g. (SUC,) or (BNC, RET).
+    '''
+    reader = Reader(data)
+    reader.expect(ORD)
+    turn = reader.turn()
+    order = reader.group()
+    result = reader.group()
+    return OrderResult(turn, order, result)
+
+
+def decode_HLO(data):
+    '''
+    HLO (power) (passcode) (variant)
+    where variant is a list of options such as (LVL 10) (MTL 60) (AOA).
+    Options are returned as a dict of parameter token to its value, or
+    True for options without one.
+    '''
+    reader = Reader(data)
+    reader.expect(HLO)
+    reader.open()
+    power = reader.token()
+    reader.close()
+    reader.open()
+    passcode = reader.integer()
+    reader.close()
+    variant = {}
+    reader.open()
+    while not reader.at_close():
+        reader.open()
+        option = reader.token()
+        if reader.at_close():
+            variant[option] = True
+        else:
+            variant[option] = reader.integer()
+        reader.close()
+    reader.close()
+    return Hello(power, passcode, variant)
+
+
+def decode_MDF(data):
+    '''
+    MDF (powers) (provinces) (adjacencies)
+    See the MDF section of the DAIDE syntax document.
+    - home_centers      power -> list of home centres, including UNO
+    - non_home_centers  list of provinces that are not supply centres
+    - adjacencies       province -> {unit_type: [province ...]}, where
+                        unit_type is AMY, FLT or (FLT, coast), and an
+                        adjacent province is either a province or a
+                        (province, coast) tuple
+    '''
+    reader = Reader(data)
+    reader.expect(MDF)
+    reader.open()
+    powers = []
+    while not reader.at_close():
+        powers.append(reader.token())
+    reader.close()
+
+    reader.open()
+    home_centers = {}
+    for centers in reader.group():
+        if not isinstance(centers, tuple) or not centers:
+            raise ValueError('expected (power centre ...) in MDF, got %r' % (centers,))
+        owners = centers[0] if isinstance(centers[0], tuple) else (centers[0],)
+        for power in owners:
+            home_centers.setdefault(power, []).extend(centers[1:])
+    non_home_centers = list(reader.group())
+    reader.close()
+
+    adjacencies = {}
+    reader.open()
+    while not reader.at_close():
+        reader.open()
+        province = reader.token()
+        adjacencies[province] = {}
+        while not reader.at_close():
+            adj = reader.group()
+            if not adj:
+                raise ValueError('empty adjacency list for %s in MDF' % province)
+            adjacencies[province][adj[0]] = list(adj[1:])
+        reader.close()
+    reader.close()
+    return MapDefinition(powers, home_centers, non_home_centers, adjacencies)
+
+
+def map_id(data):
+    '''
+    Returns a 64-bit id for a map: a digest of its MDF message, given
+    as raw bytes or a Message.
+    '''
+    if isinstance(data, Message):
+        data = data.pack()
+    return int.from_bytes(hashlib.sha1(data).digest()[:8], 'big')
+
+
+decoders = {
+    MDF: decode_MDF,
+    HLO: decode_HLO,
+    NOW: decode_NOW,
+    SCO: decode_SCO,
+    ORD: decode_ORD,
+}
+
+
+def command(data):
+    '''
+    Returns the first token of a message, given as raw bytes or a
+    Message, without decoding the rest. None for an empty message.
+
+    >>> command(NOW(SPR, 1901).pack())
+    Token(18446, NOW)
+    '''
+    if not data:
+        return None
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return _tokens.get(struct.unpack_from('!H', data)[0])
+    return data[0]
+
+
+def peek_turn(data):
+    '''
+    Returns the turn of a NOW or ORD message without decoding the rest.
+
+    >>> peek_turn(NOW(SPR, 1901).pack())
+    Turn(season=Token(18176, SPR), year=1901)
+    '''
+    reader = Reader(data)
+    reader.next()
+    return reader.turn()
+
+
+def decode(data):
+    '''
+    Decodes any message with a registered decoder, or returns None.
+
+    >>> decode(SCO(ENG, LON, EDI)(UNO, BEL).pack())
+    {Token(16641, ENG): [Token(21818, LON), Token(21814, EDI)], Token(18699, UNO): [Token(21809, BEL)]}
+    >>> decode(YES(OBS).pack()) is None
+    True
+    '''
+    decoder = decoders.get(command(data))
+    if decoder is None:
+        return None
+    return decoder(data)
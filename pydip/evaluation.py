@@ -0,0 +1,218 @@
+'''
+Batched evaluation shared by every bot hosted in one process.
+
+A bot that scores its candidates one position at a time pays the full
+per-call cost of a NumPy or model-based evaluator for each of them.
+EvaluationQueue collects the requests of all the bots (and games) in
+the process and hands them to the evaluator in batches: a batch is run
+as soon as it has max_batch items, or once its oldest item has waited
+max_delay seconds, whichever comes first.
+
+    queue = evaluation.shared(model)
+    future = queue.submit(board.fork())     # from any thread
+    score = future.result()
+    scores = queue.evaluate_many(boards)    # submitted together
+
+The evaluator is called with a list of items and returns a list of
+results in the same order; items are whatever it understands, e.g.
+Gameboards, or (Gameboard, orders) pairs for candidate order sets.
+Items are evaluated on the queue's thread, so a bot must not change a
+Gameboard it has submitted until the result is back; submit a fork.
+
+stats() reports the batch-size distribution, the time items waited in
+the queue and the time spent evaluating.
+'''
+import concurrent.futures
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import instrument
+
+
+class EvaluationQueue():
+    '''
+    Micro-batches items submitted from any thread and evaluates them on
+    a worker thread.
+    - evaluate      function from a list of items to a list of results
+    - max_batch     largest batch passed to evaluate
+    - max_delay     seconds an item may wait for a batch to fill
+    '''
+    def __init__(self, evaluate, max_batch=64, max_delay=0.002):
+        self.evaluate_batch = evaluate
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.closed = False
+        self.cond = threading.Condition()
+
+        self.batch_sizes = {}
+        self.items = 0
+        self.batches = 0
+        self.full_batches = 0
+        self.queue_latency = instrument.Histogram()
+        self.evaluation_time = instrument.Histogram()
+
+        self.thread = threading.Thread(target=self.run, name='pydip-evaluation', daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        '''
+        Queues an item, returning a concurrent.futures.Future for its
+        result.
+        '''
+        future = concurrent.futures.Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError('evaluation queue is closed')
+            self.pending.append((time.monotonic(), item, future))
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self.cond.notify()
+        return future
+
+    def evaluate(self, item, timeout=None):
+        '''
+        Returns the result for one item, waiting at most timeout seconds
+        (raising concurrent.futures.TimeoutError after that).
+        '''
+        return self.submit(item).result(timeout)
+
+    def evaluate_many(self, items, timeout=None):
+        '''
+        Returns the results for a list of items, submitted together so
+        they share batches.
+        '''
+        with self.cond:
+            futures = [self.submit(item) for item in items]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return [future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                for future in futures]
+
+    def next_batch(self):
+        '''
+        Waits for a full batch, or for the oldest item's delay to run
+        out, and takes it off the queue. Returns None once closed and
+        drained.
+        '''
+        with self.cond:
+            while True:
+                if len(self.pending) >= self.max_batch:
+                    break
+                if self.pending:
+                    wait = self.pending[0][0] + self.max_delay - time.monotonic()
+                    if wait <= 0 or self.closed:
+                        break
+                    self.cond.wait(wait)
+                elif self.closed:
+                    return None
+                else:
+                    self.cond.wait()
+            batch = self.pending[:self.max_batch]
+            del self.pending[:self.max_batch]
+            return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                break
+            start = time.monotonic()
+            size = len(batch)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.batches += 1
+            self.items += size
+            if size == self.max_batch:
+                self.full_batches += 1
+            for submitted, item, future in batch:
+                self.queue_latency.record(start - submitted)
+            live = [(item, future) for submitted, item, future in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                results = self.evaluate_batch([item for item, future in live])
+                if len(results) != len(live):
+                    raise ValueError('evaluator returned %d results for %d items' % (len(results), len(live)))
+            except Exception as e:
+                for item, future in live:
+                    future.set_exception(e)
+            else:
+                for (item, future), result in zip(live, results):
+                    future.set_result(result)
+            self.evaluation_time.record(time.monotonic() - start)
+
+    def close(self):
+        '''
+        Evaluates whatever is queued, then stops the worker thread.
+        '''
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+    def stats(self):
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'full_batches': self.full_batches,
+            'mean_batch': self.items / self.batches if self.batches else None,
+            'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            'queue_latency': self.queue_latency.snapshot(),
+            'evaluation_time': self.evaluation_time.snapshot(),
+        }
+
+
+# One queue per evaluator, shared by every client in the process
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared(evaluate, **options):
+    '''
+    Returns the process's EvaluationQueue for evaluate, creating it
+    with options (max_batch, max_delay) the first time.
+    '''
+    with _shared_lock:
+        queue = _shared.get(evaluate)
+        if queue is None or queue.closed:
+            queue = _shared[evaluate] = EvaluationQueue(evaluate, **options)
+        return queue
+
+
+class LinearModel():
+    '''
+    A linear evaluator over the feature planes of features.Layout: the
+    score of a Gameboard for each power is the dot product of its
+    features with that power's weights, a provinces x channels list.
+    With NumPy a batch is scored with one matrix product.
+    - layout        features.Layout for the map
+    - weights       {power: weights}
+    '''
+    def __init__(self, layout, weights):
+        self.layout = layout
+        self.powers = list(weights)
+        self.weights = [list(weights[power]) for power in self.powers]
+        size = len(layout.provinces) * len(layout.channels)
+        for power, w in zip(self.powers, self.weights):
+            if len(w) != size:
+                raise ValueError('%s: %d weights, expected %d' % (power, len(w), size))
+        if numpy is not None:
+            self.matrix = numpy.array(self.weights, dtype=numpy.float64).T
+
+    def __call__(self, boards):
+        '''
+        Returns a {power: score} dict for each Gameboard in boards.
+        '''
+        planes = [self.layout.features(board) for board in boards]
+        if numpy is not None:
+            features = numpy.frombuffer(b''.join(planes), dtype=numpy.uint8).reshape(len(planes), -1)
+            scores = features @ self.matrix
+            return [dict(zip(self.powers, row.tolist())) for row in scores]
+        results = []
+        for plane in planes:
+            hot = [i for i, value in enumerate(plane) if value]
+            results.append({power: float(sum(w[i] for i in hot)) for power, w in zip(self.powers, self.weights)})
+        return results
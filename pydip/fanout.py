@@ -0,0 +1,185 @@
+'''
+Republishes one observer connection's game to any number of local
+subscribers over a Unix-domain socket, so that dashboards, loggers and
+analysis tools don't each take an observer slot on the DAIDE server.
+
+Subscribers read the same framing as the DAIDE protocol (a 4-byte
+header, then the message), so anything that can parse a server stream
+can parse this one. On connecting, a subscriber is sent the current
+state: the MDF, the latest SCO and NOW, and the ORDs of the last turn
+adjudicated. After that it gets every NOW, SCO and ORD as it arrives,
+and the messages that end the game.
+
+Each subscriber has its own buffer and writer thread. publish() only
+appends to the buffers and never waits on a subscriber; one that falls
+more than max_buffer bytes behind is dropped.
+'''
+import collections
+import os
+import socket
+import struct
+import threading
+
+from language import *
+import decoders
+import util
+
+# Messages republished to subscribers
+PUBLISHED = {MDF, SCO, NOW, ORD, OFF, SMR, DRW, SLO}
+
+
+class Subscriber():
+    def __init__(self, conn, max_buffer):
+        self.conn = conn
+        self.max_buffer = max_buffer
+        self.frames = collections.deque()
+        self.size = 0
+        self.closed = False
+        self.finishing = False
+        self.overflowed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.write_loop, name='pydip-subscriber', daemon=True)
+
+    def put(self, frame):
+        '''
+        Buffers a frame. Returns False, and closes the subscriber, if
+        its buffer would overflow.
+        '''
+        with self.cond:
+            if self.closed:
+                return False
+            if self.size + len(frame) > self.max_buffer:
+                self.overflowed = True
+                self.close_locked()
+                return False
+            self.frames.append(frame)
+            self.size += len(frame)
+            self.cond.notify()
+            return True
+
+    def write_loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.frames or self.closed or self.finishing)
+                if self.closed or not self.frames:
+                    break
+                frame = self.frames.popleft()
+                self.size -= len(frame)
+            try:
+                self.conn.sendall(frame)
+            except OSError:
+                self.close()
+                break
+        self.conn.close()
+
+    def close_locked(self):
+        self.closed = True
+        self.frames.clear()
+        self.size = 0
+        # Unblock a sendall stuck on a subscriber that stopped reading
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            if not self.closed:
+                self.close_locked()
+
+    def finish(self):
+        '''
+        Closes the connection once the buffered frames are sent.
+        '''
+        with self.cond:
+            self.finishing = True
+            self.cond.notify()
+
+
+class FanOut():
+    '''
+    Listens on a Unix-domain socket at path and republishes frames
+    passed to publish() to every subscriber.
+    - subscribers   the Subscribers currently connected
+    - published     number of frames published
+    - dropped       number of subscribers dropped for falling behind
+    '''
+    def __init__(self, path, max_buffer=1 << 20):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.subscribers = []
+        self.published = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+        # The state sent to new subscribers: the ORDs are those of the
+        # last turn adjudicated
+        self.state = {}
+        self.orders = []
+        self.orders_turn = None
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen(16)
+        self.thread = threading.Thread(target=self.accept_loop, name='pydip-fanout', daemon=True)
+        self.thread.start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                break
+            self.subscribe(conn)
+
+    def subscribe(self, conn):
+        subscriber = Subscriber(conn, self.max_buffer)
+        with self.lock:
+            for command in (MDF, SCO, NOW):
+                if command in self.state:
+                    subscriber.put(self.state[command])
+            for frame in self.orders:
+                subscriber.put(frame)
+            self.subscribers.append(subscriber)
+        subscriber.thread.start()
+
+    def publish(self, message, msg_type=util.DM):
+        '''
+        Sends a message, as raw bytes, to every subscriber, and keeps
+        it for new ones if it is part of the game state.
+        '''
+        frame = struct.pack('!bxh', msg_type, len(message)) + message
+        command = decoders.command(message)
+        with self.lock:
+            self.published += 1
+            if command is ORD:
+                turn = decoders.peek_turn(message)
+                if turn != self.orders_turn:
+                    self.orders = []
+                    self.orders_turn = turn
+                self.orders.append(frame)
+            elif command in (MDF, SCO, NOW):
+                self.state[command] = frame
+            live = []
+            for subscriber in self.subscribers:
+                if subscriber.put(frame):
+                    live.append(subscriber)
+                elif subscriber.overflowed:
+                    self.dropped += 1
+            self.subscribers = live
+
+    def close(self):
+        '''
+        Stops accepting subscribers, and disconnects the current ones
+        once they have been sent everything published.
+        '''
+        self.listener.close()
+        with self.lock:
+            for subscriber in self.subscribers:
+                subscriber.finish()
+            self.subscribers = []
+        if os.path.exists(self.path):
+            os.unlink(self.path)
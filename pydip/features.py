@@ -0,0 +1,357 @@
+'''
+Exports recorded games as fixed-shape feature tensors, for training
+evaluation models.
+
+A game is a stream of the server's MDF, SCO, NOW and ORD messages: a
+log in DAIDE notation (one message per line, as notation.iter_packed
+reads it), or any iterable of packed messages or Messages. Each is fed
+through a Gameboard, and every NOW becomes one position: a provinces x
+channels plane of uint8 features, and a provinces x label-channels
+plane of uint16 labels filled in from the ORDs for that turn.
+
+Feature channels, for N powers (see Layout.channels for the names):
+
+    unit_<power>            N   power of the unit in the province
+    unit_AMY, unit_FLT      2   its type
+    coast_<coast>           one per coast on the map, for a fleet on it
+    sc_<owner>              N+1 owner of a supply centre, UNO included
+    dislodged_<power>       N   power of a unit dislodged from it
+    dislodged_AMY, _FLT     2   the dislodged unit's type
+
+Label channels, 0 where there is no order:
+
+    order       1 + index into ORDER_TYPES of the unit's order
+    target      1 + province index of the destination of a move, a
+                retreat, a supported move or a convoy, or of the unit
+                supported to hold
+    result      1 + index into RESULTS of the order's result
+    retreat     1 if the unit was dislodged (the result had RET)
+
+Provinces are in token value order, as in a ThreatMap. Positions are
+written in chunks of at most chunk_size, each chunk as three .npy files
+(features, labels, and the season and year of each position), so memory
+is bounded by one chunk per game being exported. The files are written
+without NumPy, and open with numpy.load(path, mmap_mode='r') as
+memory-mapped arrays; see open_chunk. export() runs games in parallel
+worker processes and writes a manifest.json describing the chunks and
+channels.
+'''
+import argparse
+import ast
+import array
+import json
+import multiprocessing
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from language import *
+import decoders
+import notation
+from gameboard import Gameboard
+
+ORDER_TYPES = [HLD, MTO, SUP, CVY, CTO, RTO, DSB, BLD, REM]
+RESULTS = [SUC, BNC, CUT, DSR, NSO]
+LABELS = ['order', 'target', 'result', 'retreat']
+
+_order_codes = {order: i + 1 for i, order in enumerate(ORDER_TYPES)}
+_result_codes = {result: i + 1 for i, result in enumerate(RESULTS)}
+
+
+class Layout():
+    '''
+    The channel layout for one map.
+    - provinces     province Tokens, in row order
+    - channels      feature channel names
+    - labels        label channel names
+    '''
+    def __init__(self, board):
+        if board.tables is not None:
+            self.provinces = board.tables.province_list
+            self.province_index = board.tables.province_index
+        else:
+            self.provinces = sorted(board.adjacencies, key=lambda p: p._hex)
+            self.province_index = {province: i for i, province in enumerate(self.provinces)}
+        powers = list(board.powers)
+        owners = powers + [UNO]
+        coasts = sorted({coast for cs in board.coasts.values() for coast in cs}, key=lambda c: c._hex)
+
+        self.channels = []
+
+        def block(prefix, tokens):
+            start = len(self.channels)
+            self.channels += ['%s_%s' % (prefix, token) for token in tokens]
+            return {token: start + i for i, token in enumerate(tokens)}
+
+        self.unit_power = block('unit', powers)
+        self.unit_type = block('unit', [AMY, FLT])
+        self.coast = block('coast', coasts)
+        self.center_owner = block('sc', owners)
+        self.dislodged_power = block('dislodged', powers)
+        self.dislodged_type = block('dislodged', [AMY, FLT])
+        self.labels = list(LABELS)
+        self.map_id = board.map_id
+
+    def describe(self):
+        return {
+            'map_id': '%016x' % self.map_id,
+            'provinces': [str(province) for province in self.provinces],
+            'channels': self.channels,
+            'labels': self.labels,
+            'order_types': [str(order) for order in ORDER_TYPES],
+            'results': [str(result) for result in RESULTS],
+        }
+
+    def features(self, board):
+        '''
+        Returns the feature plane of board's position, as a bytearray
+        of provinces x channels.
+        '''
+        width = len(self.channels)
+        plane = bytearray(len(self.provinces) * width)
+        index = self.province_index
+        for power, units in board.units.items():
+            for unit in units:
+                row = index[unit.province] * width
+                if unit in board.retreat_opts:
+                    plane[row + self.dislodged_power[power]] = 1
+                    plane[row + self.dislodged_type[unit.unit_type]] = 1
+                else:
+                    plane[row + self.unit_power[power]] = 1
+                    plane[row + self.unit_type[unit.unit_type]] = 1
+                    if unit.coast is not None:
+                        plane[row + self.coast[unit.coast]] = 1
+        for center, owner in board.center_owner.items():
+            plane[index[center] * width + self.center_owner[owner]] = 1
+        return plane
+
+    def label(self, labels, order, result):
+        '''
+        Writes the labels of one ORD's order and result into labels, an
+        array('H') of provinces x label channels.
+        '''
+        unit = order[0]
+        if not isinstance(unit, tuple):
+            # (power WVE)
+            return
+        location = unit[2]
+        row = self.province_index[location[0] if isinstance(location, tuple) else location] * len(LABELS)
+        labels[row] = _order_codes.get(order[1], 0)
+        target = _target(order)
+        if target is not None:
+            labels[row + 1] = self.province_index[target[0] if isinstance(target, tuple) else target] + 1
+        labels[row + 2] = _result_codes.get(result[0], 0) if result else 0
+        labels[row + 3] = 1 if RET in result else 0
+
+
+def _target(order):
+    '''
+    Returns the destination an order names, or None.
+    '''
+    kind = order[1]
+    if kind in (MTO, CTO, RTO):
+        return order[2]
+    if kind is SUP:
+        # (unit) SUP (unit) MTO province, or (unit) SUP (unit)
+        if len(order) > 3:
+            return order[4]
+        return order[2][2]
+    if kind is CVY:
+        # (fleet) CVY (army) CTO province
+        return order[4]
+    return None
+
+
+def _npy_header(descr, shape):
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %r, }" % (descr, tuple(shape))
+    # The magic, version and length take 10 bytes; pad to a multiple of 64
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def write_npy(path, data, descr, shape):
+    '''
+    Writes data, bytes or an array, as a version 1.0 .npy file.
+    '''
+    if isinstance(data, array.array) and data.itemsize > 1 and sys.byteorder == 'big':
+        data = array.array(data.typecode, data)
+        data.byteswap()
+    with open(path, 'wb') as f:
+        f.write(_npy_header(descr, shape))
+        f.write(data)
+
+
+def read_npy(path):
+    '''
+    Returns (shape, values) for a .npy file write_npy wrote, values as
+    an array of the file's type, for reading chunks without NumPy.
+    '''
+    with open(path, 'rb') as f:
+        if f.read(8) != b'\x93NUMPY\x01\x00':
+            raise ValueError('%s: not a version 1.0 .npy file' % path)
+        length, = struct.unpack('<H', f.read(2))
+        header = ast.literal_eval(f.read(length).decode('latin1'))
+        values = array.array({'|u1': 'B', '<u2': 'H'}[header['descr']])
+        values.frombytes(f.read())
+    if values.itemsize > 1 and sys.byteorder == 'big':
+        values.byteswap()
+    return header['shape'], values
+
+
+def open_chunk(path):
+    '''
+    Returns a chunk's .npy file as a read-only memory-mapped NumPy array.
+    '''
+    if numpy is None:
+        raise ImportError('open_chunk needs NumPy')
+    return numpy.load(path, mmap_mode='r')
+
+
+# One template Gameboard per map, per process, forked for every game so
+# the MDF is decoded once
+_templates = {}
+
+
+def _board(MDF_message):
+    k = bytes(MDF_message) if not isinstance(MDF_message, Message) else MDF_message.pack()
+    if k not in _templates:
+        board = Gameboard(None, k)
+        _templates[k] = (board, Layout(board))
+    template, layout = _templates[k]
+    return template.fork(), layout
+
+
+class ChunkWriter():
+    '''
+    Collects positions and writes them out every chunk_size positions.
+    '''
+    def __init__(self, directory, stem, layout, chunk_size):
+        self.directory = directory
+        self.stem = stem
+        self.layout = layout
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.reset()
+
+    def reset(self):
+        self.features = bytearray()
+        self.labels = array.array('H')
+        self.turns = array.array('H')
+        self.count = 0
+
+    def add(self, features, labels, turn):
+        self.features += features
+        self.labels += labels
+        self.turns.extend((turn[0]._hex, turn[1]))
+        self.count += 1
+        if self.count == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.count:
+            return
+        provinces = len(self.layout.provinces)
+        name = '%s-%04d' % (self.stem, len(self.chunks))
+        base = os.path.join(self.directory, name)
+        write_npy(base + '.features.npy', self.features, '|u1',
+                  (self.count, provinces, len(self.layout.channels)))
+        write_npy(base + '.labels.npy', self.labels, '<u2', (self.count, provinces, len(LABELS)))
+        write_npy(base + '.turns.npy', self.turns, '<u2', (self.count, 2))
+        self.chunks.append({'name': name, 'positions': self.count, 'map_id': '%016x' % self.layout.map_id})
+        self.reset()
+
+
+def export_game(messages, directory, stem, chunk_size=1024):
+    '''
+    Streams one game's messages through a Gameboard and writes its
+    positions to chunk files named after stem. Returns (layout, chunk
+    descriptions); the layout is None if the game had no MDF.
+    '''
+    board = layout = writer = None
+    features = labels = None
+    for message in messages:
+        command = decoders.command(message)
+        if command is MDF:
+            if writer is not None:
+                raise ValueError('%s: more than one MDF' % stem)
+            board, layout = _board(message)
+            writer = ChunkWriter(directory, stem, layout, chunk_size)
+        elif board is None:
+            continue
+        elif command is SCO:
+            board.process_SCO(message)
+        elif command is NOW:
+            if features is not None:
+                writer.add(features, labels, turn)
+            board.process_NOW(message)
+            features = layout.features(board)
+            labels = array.array('H', bytes(2 * len(layout.provinces) * len(LABELS)))
+            turn = board.turn
+        elif command is ORD and features is not None:
+            result = decoders.decode_ORD(message)
+            if tuple(result.turn) == turn:
+                layout.label(labels, result.order, result.result)
+    if features is not None:
+        writer.add(features, labels, turn)
+    if writer is None:
+        return None, []
+    writer.flush()
+    return layout, writer.chunks
+
+
+def _export_file(task):
+    path, directory, stem, chunk_size = task
+    with open(path) as f:
+        layout, chunks = export_game(notation.iter_packed(f), directory, stem, chunk_size)
+    return path, layout.describe() if layout else None, chunks
+
+
+def export(paths, directory, workers=None, chunk_size=1024):
+    '''
+    Exports the games logged in paths to directory, in workers processes
+    (os.cpu_count() by default; 0 for this process), and writes
+    manifest.json there. Returns the manifest.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(path, directory, '%05d-%s' % (i, os.path.splitext(os.path.basename(path))[0]), chunk_size)
+             for i, path in enumerate(paths)]
+    manifest = {'maps': {}, 'games': []}
+
+    def collect(results):
+        for path, layout, chunks in results:
+            if layout is not None:
+                manifest['maps'].setdefault(layout['map_id'], layout)
+            manifest['games'].append({'path': path, 'chunks': chunks})
+
+    if workers == 0:
+        collect(map(_export_file, tasks))
+    else:
+        # A worker handles one game at a time, so each holds at most one
+        # chunk in memory
+        with multiprocessing.Pool(workers) as pool:
+            collect(pool.imap_unordered(_export_file, tasks))
+    manifest['games'].sort(key=lambda game: game['path'])
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export logged games as feature tensors.')
+    parser.add_argument('directory', help='where to write the chunks and manifest.json')
+    parser.add_argument('games', nargs='+', help='game logs in DAIDE notation, one message per line')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    args = parser.parse_args()
+    manifest = export(args.games, args.directory, args.workers, args.chunk_size)
+    positions = sum(chunk['positions'] for game in manifest['games'] for chunk in game['chunks'])
+    print('%d positions from %d games' % (positions, len(manifest['games'])))
+
+
+if __name__ == '__main__':
+    main()
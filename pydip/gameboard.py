@@ -1,11 +1,34 @@
+import array
 import collections
+import copy
 
 from language import *
+import zobrist
+from threats import ThreatMap
+from memo import memoized, QueryCache, STATIC, POSITION
+from decoders import decode_MDF, decode_NOW, decode_SCO, decode_ORD, map_id
 
 
 Location = collections.namedtuple('Location', 'province coast')
 
 
+UnitChanges = collections.namedtuple('UnitChanges', 'moved dislodged built removed')
+
+
+class CenterChange(collections.namedtuple('CenterChange', 'province old new')):
+    '''
+    A supply center changing hands in an SCO. old is None the first
+    time a center is seen, new if it is no longer listed.
+
+    >>> print(CenterChange(BEL, UNO, FRA))
+    BEL: UNO->FRA
+    '''
+    __slots__ = ()
+
+    def __str__(self):
+        return '%s: %s->%s' % (self.province, self.old, self.new)
+
+
 class Gameboard():
     '''
     Stores info about current turn and current unit positions.
@@ -21,11 +44,34 @@ class Gameboard():
                         for more details.
     - coasts            Dictionary of coastal provinces mapped to their
                         coast options.
+    - map_id            64-bit digest of the MDF, identifying the map
+                        (see snapshot.py)
+    - tables            The MapTables these are read from, if the map is
+                        shared between processes (see maptables.py);
+                        home_centers, adjacencies and coasts are then
+                        read-only views, and the MDF isn't decoded.
 
     The following instance variables are updated as the game progresses,
     (probably) by being passed NOW and SCO messages from the DAIDE server.
     - supply_centers    Mapping from powers to a list of SCs they have
                         after each Fall Retreat turn
+    - center_owner      Mapping from SCs to their owner (UNO if none)
+    - center_counts     Mapping from powers to the number of SCs owned
+    - center_history    List of (year, owners) for every SCO, owners an
+                        array of owner token values, one per SC in
+                        center_order (0 for a SC not yet seen)
+    - sco_listeners     Callbacks called as f(gameboard, changes) with
+                        the CenterChanges of each SCO
+
+    NOW messages are applied as a diff against the current position:
+    units that stayed put keep their Unit objects, and the changes are
+    summed up as UnitChanges (moved as (old, new) pairs, dislodged,
+    built and removed; see match_changes).
+    - unit_by_key       Mapping from Unit keys to the current Units
+    - unit_changes      UnitChanges of the last NOW, or None until
+                        get_unit_changes works them out
+    - now_listeners     Callbacks called as f(gameboard, unit_changes)
+                        on each NOW
     - units             Mapping from powers to a list of Units, each of
                         the form (power, unit_type, province)
     - year              Current year, e.g. 1901, 1902, etc.
@@ -46,10 +92,37 @@ class Gameboard():
                         of provinces they're able to retreat to. An
                         empty list signals the unit has no possible
                         retreats.
+    - results           Mapping from turns to {order key: result}, as
+                        reported in ORD messages
+
+    Units and Orders are immutable values, and the Gameboard interns
+    them per position (see intern), so the many equal instances a bot
+    creates while searching collapse to one.
+    - interned          Mapping from (type, key) to the interned value
+
+    Positions are hashed incrementally (see zobrist.py), so two Gameboards
+    holding the same position can be compared cheaply.
+    - position_hash     64-bit hash of units, SC ownership and turn
+    - orders_hash       64-bit hash of the orders for the current turn
+
+    Queries that bots call repeatedly are memoized (see memo.py). Those
+    that only depend on the map are cached for the whole game, those that
+    depend on the position until the next NOW or SCO. A board reading
+    shared tables has no STATIC cache; the tables' views are cached.
+    - caches            Mapping from scope (STATIC, POSITION) to QueryCache
+
+    The threat map (see threats.py) is built on the first call to
+    get_threat_map, and from then on updated on every NOW.
+    - threat_map        ThreatMap, or None until asked for
 
     '''
-    def __init__(self, power_played, MDF_message):
+    static_cache_size = 4096
+    position_cache_size = 1024
+
+    def __init__(self, power_played, MDF_message, tables=None):
         self.power_played = power_played
+        self.tables = tables
+        self.map_id = map_id(MDF_message) if MDF_message is not None else tables.map_id
         self.powers = []
         self.home_centers = {}
         self.adjacencies = {}
@@ -63,49 +136,95 @@ class Gameboard():
 
         self.orders = {}
         self.retreat_opts = {}
-
-        folded_msg = MDF_message.fold()
+        self.results = {}
+        self.interned = {}
+
+        self.position_hash = 0
+        self.orders_hash = 0
+        self.unit_by_key = {}
+        self._unit_hashes = {}
+        self.unit_changes = UnitChanges([], [], [], [])
+        self.now_listeners = []
+        self.threat_map = None
+
+        self.center_owner = {}
+        self.center_counts = {}
+        self.center_order = []
+        self._center_column = {}
+        self.center_history = []
+        self.sco_listeners = []
+
+        # Shared tables already serve map queries from views cached per
+        # process, so a STATIC cache would only hold a second copy
+        self.caches = {POSITION: QueryCache(self.position_cache_size)}
+        if tables is None:
+            self.caches[STATIC] = QueryCache(self.static_cache_size)
+
+        if tables is not None:
+            self.powers = tables.get_powers()
+            self.units = {power: [] for power in self.powers}
+            self.home_centers = tables.home_centers
+            self.adjacencies = tables.adjacencies
+            self.coasts = tables.coasts
+            return
+
+        mdf = decode_MDF(MDF_message)
 
         # Adding powers
-        for power in folded_msg[1]:
+        for power in mdf.powers:
             self.powers.append(power)
             # Initializing self.units to power<->[]
             self.units[power] = []
 
         # Adding supply center tuples
-        sc_section = folded_msg[2][0]
-        for sc_lst in sc_section:
-            power = sc_lst[0]
-            self.home_centers[power] = sc_lst[1:]
+        self.home_centers = mdf.home_centers
 
         # Adding adjacencies
         # See MDF section of DAIDE Syntax document
-        adjacencies = folded_msg[3]
-        for prov_adj in adjacencies:
-            province = prov_adj[0]
-            self.adjacencies[province] = {}
-            adjs = prov_adj[1:]
-            for adj in adjs:
-                self.coasts[province] = []
-
-                # adj[0] is one of
-                #   - AMY
-                #   - FLT
-                #   - [FLT, coast]
-                if isinstance(adj[0], list):
-                    unit_type = tuple(adj[0])
-                    self.coasts[province].append(unit_type[1])
-                else:
-                    unit_type = adj[0]
-
-                # [province, [province, coast]] -> [province, (province, coast)]
-                adj_provs = [tuple(p) if isinstance(p, list) else p
-                             for p in adj[1:]]
-
-                self.adjacencies[province][unit_type] = adj_provs
-
-        # Clear out empty coast lists
-        self.coasts = {k: v for k, v in self.coasts.items() if v != []}
+        # unit_type is one of
+        #   - AMY
+        #   - FLT
+        #   - (FLT, coast)
+        self.adjacencies = mdf.adjacencies
+        for province, adjs in self.adjacencies.items():
+            coasts = [unit_type[1] for unit_type in adjs if isinstance(unit_type, tuple)]
+            if coasts:
+                self.coasts[province] = coasts
+
+    def fork(self):
+        '''
+        Returns a Gameboard sharing this one's static map data and
+        static query cache, with its own copy of the current position,
+        for exploring hypothetical positions.
+        '''
+        board = copy.copy(self)
+        board.units = {power: list(units) for power, units in self.units.items()}
+        board.supply_centers = {power: list(centers) for power, centers in self.supply_centers.items()}
+        board.orders = {turn: list(orders) for turn, orders in self.orders.items()}
+        board.results = {turn: dict(results) for turn, results in self.results.items()}
+        board.retreat_opts = dict(self.retreat_opts)
+        board.interned = dict(self.interned)
+        board.unit_by_key = dict(self.unit_by_key)
+        board._unit_hashes = dict(self._unit_hashes)
+        board.now_listeners = []
+        board.center_owner = dict(self.center_owner)
+        board.center_counts = dict(self.center_counts)
+        board.center_order = list(self.center_order)
+        board._center_column = dict(self._center_column)
+        board.center_history = list(self.center_history)
+        board.sco_listeners = []
+        if self.threat_map is not None:
+            board.threat_map = self.threat_map.copy()
+        board.caches = dict(self.caches)
+        board.caches[POSITION] = QueryCache(self.position_cache_size)
+        return board
+
+    def intern(self, value):
+        '''
+        Returns the interned Unit or Order equal to value, interning
+        value if there is none yet. The table is emptied on every NOW.
+        '''
+        return self.interned.setdefault((type(value), value.key), value)
 
     def current_turn(self):
         '''
@@ -115,21 +234,81 @@ class Gameboard():
 
     def process_SCO(self, SCO_message):
         '''
-        Updates the current supply center ownership by traversing an
-        SCO message from the DAIDE server. Unowned centers are listed
-        against the power name UNO.
+        Updates the current supply center ownership from an SCO message
+        from the DAIDE server. Unowned centers are listed against the
+        power name UNO. Only the centers that changed hands are touched;
+        they are returned as a list of CenterChanges, which are also
+        passed to every callback in sco_listeners.
         '''
-        # Clear out old supply centers
-        for power, _ in self.supply_centers.items():
-            self.supply_centers[power] = []
+        self.caches[POSITION].clear()
 
-        folded_SCO = SCO_message.fold()
-        for position in folded_SCO[1:]:
-            power = position[0]
-            centers = position[1:]
-            self.supply_centers[power] = []
+        owners = {}
+        for power, centers in decode_SCO(SCO_message).items():
+            self.supply_centers.setdefault(power, [])
             for center in centers:
-                self.supply_centers[power].append(center)
+                owners[center] = power
+
+        changes = []
+        center_owner = self.center_owner
+        for center, power in owners.items():
+            old = center_owner.get(center)
+            if old is not power:
+                changes.append(CenterChange(center, old, power))
+        for center in center_owner:
+            if center not in owners:
+                changes.append(CenterChange(center, center_owner[center], None))
+
+        # Only centers that changed hands touch the hash
+        for center, old, new in changes:
+            if old is not None:
+                self.supply_centers[old].remove(center)
+                self.center_counts[old] -= 1
+                self.position_hash ^= zobrist.center_key(old, center)
+                del center_owner[center]
+            if new is not None:
+                self.supply_centers[new].append(center)
+                self.center_counts[new] = self.center_counts.get(new, 0) + 1
+                self.position_hash ^= zobrist.center_key(new, center)
+                center_owner[center] = new
+
+        self.record_centers()
+        for listener in self.sco_listeners:
+            listener(self, changes)
+        return changes
+
+    def record_centers(self):
+        '''
+        Appends the current ownership to center_history, as an array of
+        owner token values in center_order.
+        '''
+        for center in self.center_owner:
+            if center not in self._center_column:
+                self._center_column[center] = len(self.center_order)
+                self.center_order.append(center)
+        owners = array.array('H', bytes(2 * len(self.center_order)))
+        column = self._center_column
+        for center, power in self.center_owner.items():
+            owners[column[center]] = power._hex
+        self.center_history.append((self.year, owners))
+
+    def get_center_owner(self, province):
+        '''
+        Returns the owner of a supply center (UNO if unowned), or None
+        if province isn't one.
+        '''
+        return self.center_owner.get(province)
+
+    def get_center_history(self, province):
+        '''
+        Returns [(year, owner)] for a supply center, one entry per SCO.
+        The year is None for the SCO sent before the game starts.
+        '''
+        column = self._center_column.get(province)
+        history = []
+        for year, owners in self.center_history:
+            value = owners[column] if column is not None and column < len(owners) else 0
+            history.append((year, Token.from_value(value) if value else None))
+        return history
 
     def process_NOW(self, NOW_message):
         '''
@@ -138,48 +317,140 @@ class Gameboard():
         Also adds a new entry for orders to be added for the current
         turn.
         '''
-        folded_NOW = NOW_message.fold()
-        self.season = folded_NOW[1][0]
-        self.year = folded_NOW[1][1]
+        now = decode_NOW(NOW_message)
+        self.caches[POSITION].clear()
+        previous_season = self.season
+        self.position_hash ^= zobrist.turn_key(self.turn)
+        self.season, self.year = now.turn
         self.turn = (self.season, self.year)
+        self.position_hash ^= zobrist.turn_key(self.turn)
 
-        # clear out old unit positions
-        self.clear_units()
-
-        positions = folded_NOW[2:]
-        for position in positions:
-            power = position[0]
-
-            # add updated unit
-            unit_type = position[1]
-            province = position[2]
-            unit = Unit(power, unit_type, province)
-            self.units[power].append(unit)
+        # Units that stayed put keep their Unit objects
+        previous = self.unit_by_key
+        unit_by_key = {}
+        for power in self.powers:
+            self.units[power] = []
+        self.retreat_opts = {}
+        self.interned = interned = {}
+
+        for position in now.units:
+            if position.coast is not None:
+                k = (position.power, position.unit_type, (position.province, position.coast))
+            else:
+                k = (position.power, position.unit_type, position.province)
+            unit = previous.get(k)
+            if unit is None:
+                unit = Unit(position.power, position.unit_type, k[2])
+            interned[(Unit, k)] = unit
+            unit_by_key[k] = unit
+            self.units[position.power].append(unit)
 
             # Update MRT retreat options, if necessary
-            if MRT in position:
-                m_index = position.index(MRT)
-                self.retreat_opts[unit] = position[m_index+1:]
+            if position.retreats is not None:
+                self.retreat_opts[unit] = position.retreats
+
+        # Only units that moved, appeared or vanished touch the hash
+        hashes = self._unit_hashes
+        vanished = []
+        for k, unit in previous.items():
+            if k not in unit_by_key:
+                vanished.append(unit)
+                self.position_hash ^= hashes.pop(k)
+        appeared = []
+        for k, unit in unit_by_key.items():
+            if k not in previous:
+                appeared.append(unit)
+                hashes[k] = zobrist.unit_key(unit)
+                self.position_hash ^= hashes[k]
+        self.unit_by_key = unit_by_key
+        self.unit_changes = None
+        self._unit_diff = (vanished, appeared, previous_season)
+        if self.threat_map is not None:
+            self.threat_map.update(self, vanished, appeared)
 
         # Add a new entry for orders to be added
         self.orders[self.turn] = []
+        self.orders_hash = 0
+
+        if self.now_listeners:
+            changes = self.get_unit_changes()
+            for listener in self.now_listeners:
+                listener(self, changes)
+
+    def get_unit_changes(self):
+        '''
+        Returns the UnitChanges made by the last NOW, working them out
+        the first time they are asked for.
+        '''
+        if self.unit_changes is None:
+            self.unit_changes = self.match_changes(*self._unit_diff)
+        return self.unit_changes
+
+    def match_changes(self, vanished, appeared, previous_season):
+        '''
+        Returns the UnitChanges between two positions, given the units
+        that vanished and appeared. A vanished unit is taken to have
+        moved to an appeared unit of the same power and type it is
+        adjacent to, or failing that (a convoy) any such unit, except
+        after an adjustment phase, when units are only built and removed.
+        '''
+        moved = []
+        built = list(appeared)
+        removed = []
+        if previous_season is not None and previous_season is not WIN:
+            unmatched = []
+            for old in vanished:
+                reach = set(adj[0] if isinstance(adj, tuple) else adj
+                            for adj in self.get_moveable_adjacencies(old))
+                for new in built:
+                    if new.power is old.power and new.unit_type is old.unit_type and new.province in reach:
+                        moved.append((old, new))
+                        built.remove(new)
+                        break
+                else:
+                    unmatched.append(old)
+            for old in unmatched:
+                for new in built:
+                    if new.power is old.power and new.unit_type is old.unit_type:
+                        moved.append((old, new))
+                        built.remove(new)
+                        break
+                else:
+                    removed.append(old)
+        else:
+            removed = list(vanished)
+        dislodged = list(self.retreat_opts)
+        return UnitChanges(moved, dislodged, built, removed)
 
     def process_ORD(self, ORD_message):
         '''
         Updates the corresponding Order with the result.
         See section (iv) of the DAIDE Syntax document for more details.
         '''
-        folded_ORD = ORD_message.fold()
-        turn = tuple(folded_ORD[1])
-        ORD_key = tuple(folded_ORD[2])
-        result = folded_ORD[3] if len(folded_ORD[3]) == 3 else tuple(folded_ORD[3])
-        for order in self.orders[turn]:
-            if order.key == ORD_key:
-                order.result = result
+        ord_result = decode_ORD(ORD_message)
+        self.results.setdefault(tuple(ord_result.turn), {})[ord_result.order] = ord_result.result
+
+    def get_result(self, order, turn=None):
+        '''
+        Returns the result reported for order, e.g. (SUC,) or (BNC, RET),
+        or None if there has been no ORD for it.
+        '''
+        if turn is None:
+            turn = self.turn
+        return self.results.get(turn, {}).get(order.key)
 
     def clear_units(self):
+        self.caches[POSITION].clear()
+        self.interned = {}
         for power in self.powers:
             self.units[power] = []
+        for k in self._unit_hashes.values():
+            self.position_hash ^= k
+        self.unit_changes = UnitChanges([], [], [], list(self.unit_by_key.values()))
+        self.unit_by_key = {}
+        self._unit_hashes = {}
+        if self.threat_map is not None:
+            self.threat_map.update(self, self.unit_changes.removed, [])
 
     def get_units(self, power):
         return self.units[power]
@@ -190,6 +461,22 @@ class Gameboard():
     def get_supply_centers(self, power):
         return self.supply_centers[power]
 
+    def get_threat_map(self):
+        '''
+        Returns the ThreatMap for the current position.
+        '''
+        if self.threat_map is None:
+            self.threat_map = ThreatMap(self)
+            self.threat_map.update(self)
+        return self.threat_map
+
+    def cache_stats(self):
+        '''
+        Returns {scope: {query: (hits, misses)}} for the memoized queries.
+        '''
+        return {scope: cache.stats() for scope, cache in self.caches.items()}
+
+    @memoized(STATIC, key=lambda self, unit: (unit.unit_type, unit.province, unit.coast))
     def get_moveable_adjacencies(self, unit):
         '''
         Returns a list of provinces able to be moved to
@@ -199,23 +486,30 @@ class Gameboard():
         province = unit.province
         coast = unit.coast
         if coast is not None:
-            return self.adjacencies[province][(unit_type, coast)]
+            return list(self.adjacencies[province][(unit_type, coast)])
         else:
-            return self.adjacencies[province][unit_type]
+            return list(self.adjacencies[province][unit_type])
 
+    @memoized(STATIC)
     def get_adjacent_provinces(self, province, coast):
         '''
         Returns a list of all adjacent provinces to the province
-        parameter.
+        parameter, reachable by either an army or a fleet (on the
+        given coast, if any). Coasts are stripped from the result.
         '''
+        adjs = self.adjacencies[province]
         if coast is not None:
-            flt_adjs = self.adjacencies[province][(FLT, coast)]
-            amy_adjs = self.adjacencies[province][(AMY, coast)]
-            return list(set(flt_adjs) & set(amy_adjs))
+            adj_lists = [adjs.get((FLT, coast), []), adjs.get(AMY, [])]
         else:
-            flt_adjs = self.adjacencies[province][FLT]
-            amy_adjs = self.adjacencies[province][AMY]
-            return list(set(flt_adjs) & set(amy_adjs))
+            adj_lists = adjs.values()
+        provinces = []
+        for adj_provs in adj_lists:
+            for prov in adj_provs:
+                if isinstance(prov, tuple):
+                    prov = prov[0]
+                if prov not in provinces:
+                    provinces.append(prov)
+        return provinces
 
     '''
     def get_adjacencies(self, province, unit_type=None):
@@ -250,6 +544,7 @@ class Gameboard():
         units = len(self.get_own_units())
         return sc - units
 
+    @memoized(POSITION, key=lambda self: self.power_played)
     def build_numbers(self):
         '''
         Returns tuple of (builds, waives)
@@ -262,7 +557,8 @@ class Gameboard():
         return (builds, waives)
 
     def missing_orders(self):
-        units_ordered = [order.unit for order in self.orders[self.turn]]
+        units_ordered = set(order.unit for order in self.orders[self.turn]
+                            if not isinstance(order, WaiveOrder))
         for unit in self.get_own_units():
             if unit not in units_ordered:
                 return True
@@ -273,13 +569,17 @@ class Gameboard():
         Adds Order to the self.orders mapping, removing
         any prior order that command the same unit.
         '''
+        order = self.intern(order)
+        orders = self.orders[self.turn]
         if not isinstance(order, WaiveOrder):
-            for x in self.orders[self.turn]:
+            for x in list(orders):
                 # Exclude WaiveOrder from order set
                 if not isinstance(x, WaiveOrder):
                     if x.unit == order.unit:
-                        self.orders[turn].remove(x)
-        self.orders[self.turn].append(order)
+                        orders.remove(x)
+                        self.orders_hash = (self.orders_hash - zobrist.order_key(x)) & zobrist.MASK
+        orders.append(order)
+        self.orders_hash = (self.orders_hash + zobrist.order_key(order)) & zobrist.MASK
 
     def is_ordered(self, unit):
         '''
@@ -291,6 +591,7 @@ class Gameboard():
                 return True
         return False
 
+    @memoized(POSITION, key=lambda self: self.power_played)
     def get_dislodged(self):
         '''
         Returns list of tuples of all owned units that need to
@@ -299,7 +600,7 @@ class Gameboard():
         dislodged = []
         for unit, opts in self.retreat_opts.items():
             if unit.power == self.power_played:
-                dislodged.append((unit, opts[0]))
+                dislodged.append((unit, opts))
         return dislodged
 
     def get_ordered(self):
@@ -363,6 +664,7 @@ class Gameboard():
         else:
             return None
 
+    @memoized(POSITION)
     def get_adjacent_armies(self, province, coast):
         '''
         Returns a list of all adjacent army Units.
@@ -376,6 +678,7 @@ class Gameboard():
                     armies.append(adj_unit)
         return armies
 
+    @memoized(POSITION)
     def get_adjacent_fleets(self, province, coast):
         '''
         Returns a list of adjacent fleet Units.
@@ -413,18 +716,15 @@ class Gameboard():
                     return unit
         return None
 
+    @memoized(POSITION, key=lambda self: self.power_played)
     def open_home_centers(self):
         '''
         Returns list of open home supply centers.
         '''
-        home = self.home_centers[self.power_played]
-        # home centers that are still owned by power
-        owned_home = [p for p in home if p in self.supply_centers[self.power_played]]
-        # remove centers that a Unit is occupying
-        for unit in self.get_own_units():
-            if unit.province in owned_home:
-                owned_home.remove(unit.province)
-        return owned_home
+        power = self.power_played
+        occupied = set(unit.province for unit in self.get_own_units())
+        return [p for p in self.home_centers[power]
+                if self.center_owner.get(p) is power and p not in occupied]
 
 
 def unpack_province(province):
@@ -434,6 +734,16 @@ def unpack_province(province):
         return (province, None)
 
 
+def province_key(province, coast):
+    '''
+    The hashable form of a destination in order keys, as for Unit keys:
+    the province Token, or (province, coast) for a coast.
+    '''
+    if coast is not None:
+        return (province, coast)
+    return province
+
+
 def location_of_province(province):
     if isinstance(province, list) or isinstance(province, tuple):
         return Location(province=province[0], coast=province[1])
@@ -442,17 +752,36 @@ def location_of_province(province):
 
 
 class Unit():
+    '''
+    Immutable value type; two Units with the same power, type and
+    location are equal and hash alike.
+
+    >>> Unit(ENG, FLT, (STP, NCS)) == Unit(ENG, FLT, (STP, NCS))
+    True
+    >>> len({Unit(ENG, AMY, LON), Unit(ENG, AMY, LON)})
+    1
+    '''
+    __slots__ = ('power', 'unit_type', 'province', 'coast', 'key')
+
     def __init__(self, power, unit_type, province):
-        self.power = power
-        self.unit_type = unit_type
-        self.province, self.coast = unpack_province(province)
-        if self.coast is not None:
-            self.key = (self.power, self.unit_type, (self.province, self.coast))
+        province, coast = unpack_province(province)
+        if coast is not None:
+            key = (power, unit_type, (province, coast))
         else:
-            self.key = (self.power, self.unit_type, self.province)
+            key = (power, unit_type, province)
+        _init_fields(self, power=power, unit_type=unit_type, province=province, coast=coast, key=key)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Unit is immutable")
+
+    def __reduce__(self):
+        return (Unit, self.key)
 
     def __eq__(self, other):
-        self.key == other.key
+        return isinstance(other, Unit) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
 
     def __repr__(self):
         return "Unit(%s, %s, %s, coast=%s)" % (self.power, self.unit_type, self.province, self.coast)
@@ -479,10 +808,37 @@ class Unit():
         return self.tokenize().wrap()
 
 
+def _init_fields(value, **fields):
+    '''
+    Sets the fields of an immutable value type from its __init__.
+    '''
+    for name, field in fields.items():
+        object.__setattr__(value, name, field)
+
+
 class BaseOrder():
-    def __init__(self):
-        self.result = None
-        self.key = None
+    '''
+    Immutable base of all orders. An order's key is its DAIDE form as
+    nested tuples (see decoders.decode_ORD), and orders compare and hash
+    by key. Results reported by the server are kept by the Gameboard
+    (see Gameboard.get_result), not on the order.
+
+    >>> HoldOrder(Unit(ENG, AMY, LON)) == HoldOrder(Unit(ENG, AMY, LON))
+    True
+    '''
+    __slots__ = ('key',)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __reduce__(self):
+        return (type(self), self.args())
+
+    def __eq__(self, other):
+        return isinstance(other, BaseOrder) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
 
     def __str__(self):
         raise NotImplementedError
@@ -490,18 +846,21 @@ class BaseOrder():
     def __repr__(self):
         raise NotImplementedError
 
-    def __eq__(self, other):
-        return self.key == other.key
+    def args(self):
+        '''
+        Returns the arguments this order was constructed with.
+        '''
+        raise NotImplementedError
 
     def message(self):
         raise NotImplementedError
 
 
 class HoldOrder(BaseOrder):
+    __slots__ = ('unit',)
+
     def __init__(self, unit):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.key = (unit.key, HLD)
+        _init_fields(self, unit=unit, key=(unit.key, HLD))
 
     def __repr__(self):
         return "HoldOrder(%s)" % (repr(self.unit))
@@ -509,16 +868,20 @@ class HoldOrder(BaseOrder):
     def __str__(self):
         return "Hold(%s)" % (self.unit)
 
+    def args(self):
+        return (self.unit,)
+
     def message(self):
         return (self.unit.wrap() ++ HLD).wrap()
 
 
-class MoveOrder():
+class MoveOrder(BaseOrder):
+    __slots__ = ('unit', 'dest', 'dest_coast')
+
     def __init__(self, unit, destination):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.dest, self.dest_coast = unpack_province(destination)
-        self.key = (unit.key, MTO, destination)
+        dest, dest_coast = unpack_province(destination)
+        _init_fields(self, unit=unit, dest=dest, dest_coast=dest_coast,
+                     key=(unit.key, MTO, province_key(dest, dest_coast)))
 
     def __repr__(self):
         return "MoveOrder(%s, (%s, %s))" % (repr(self.unit), self.dest, self.dest_coast)
@@ -529,6 +892,9 @@ class MoveOrder():
         else:
             return "Move(%s -> %s)" % (self.unit, self.dest)
 
+    def args(self):
+        return (self.unit, self.key[2])
+
     def message(self):
         if self.dest_coast is not None:
             destination = Message(self.dest, self.dest_coast).wrap()
@@ -537,12 +903,11 @@ class MoveOrder():
             return (self.unit.wrap() ++ MTO ++ self.dest).wrap()
 
 
-class SupportHoldOrder():
+class SupportHoldOrder(BaseOrder):
+    __slots__ = ('unit', 'supported')
+
     def __init__(self, unit, supported):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.supported = supported
-        self.key = (unit.key, SUP, supported.key)
+        _init_fields(self, unit=unit, supported=supported, key=(unit.key, SUP, supported.key))
 
     def __repr__(self):
         return "SupportHoldOrder(%s, %s)" % (repr(self.unit), repr(self.supported))
@@ -550,11 +915,14 @@ class SupportHoldOrder():
     def __str__(self):
         return "SupportHold(%s | %s)" % (self.unit, self.supported)
 
+    def args(self):
+        return (self.unit, self.supported)
+
     def message(self):
         return (self.unit.wrap() ++ SUP + self.supported.wrap()).wrap()
 
 
-class SupportMoveOrder():
+class SupportMoveOrder(BaseOrder):
     '''
     Support-to-move orders take a destination province without a coast
     specification.
@@ -565,15 +933,14 @@ class SupportMoveOrder():
     >>> h = SupportMoveOrder(unit, sup_unit, STP)
     >>> print(h)
     SupportMove(ENG FLT NWY | ENG FLT BAR -> STP)
-    >>> print(h.message())
+    >>> print(str(h.message()).strip())
     ( ( ENG FLT NWY ) SUP ( ENG FLT BAR ) MTO STP )
     '''
+    __slots__ = ('unit', 'supported', 'dest')
+
     def __init__(self, unit, supported, destination):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.supported = supported
-        self.dest = destination
-        self.key = (unit.key, SUP, supported.key, MTO, destination)
+        _init_fields(self, unit=unit, supported=supported, dest=destination,
+                     key=(unit.key, SUP, supported.key, MTO, destination))
 
     def __repr__(self):
         return "SupportMoveOrder(%s, %s, %s)" % (repr(self.unit), repr(self.supported), self.dest)
@@ -581,23 +948,25 @@ class SupportMoveOrder():
     def __str__(self):
         return "SupportMove(%s | %s -> %s)" % (self.unit, self.supported, self.dest)
 
+    def args(self):
+        return (self.unit, self.supported, self.dest)
+
     def message(self):
         return (self.unit.wrap() ++ SUP + self.supported.wrap() ++ MTO ++ self.dest).wrap()
 
 
-class ConvoyOrder():
+class ConvoyOrder(BaseOrder):
     '''
     The destination province doesn't need a coast specified, since the army
     being convoyed doesn't care about coasts, and the sea provinces also
     don't have coasts specified, e.g. a fleet capable of convoying must not
     be in a coastal province.
     '''
+    __slots__ = ('unit', 'cvy_unit', 'dest')
+
     def __init__(self, unit, cvy_unit, destination):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.cvy_unit = cvy_unit
-        self.dest = destination
-        self.key = (unit.key, CVY, cvy_unit.key, CTO, destination)
+        _init_fields(self, unit=unit, cvy_unit=cvy_unit, dest=destination,
+                     key=(unit.key, CVY, cvy_unit.key, CTO, destination))
 
     def __repr__(self):
         return "ConvoyOrder(%s, %s, %s)" % (repr(self.unit), repr(self.cvy_unit), self.dest)
@@ -605,26 +974,50 @@ class ConvoyOrder():
     def __str__(self):
         return "Convoy(%s ^ %s -> %s)" % (self.unit, self.cvy_unit, self.dest)
 
+    def args(self):
+        return (self.unit, self.cvy_unit, self.dest)
+
     def message(self):
         return (self.unit.wrap() ++ CVY + self.cvy_unit.wrap() ++ CTO ++ self.dest).wrap()
 
 
-class MoveByConvoyOrder():
+class MoveByConvoyOrder(BaseOrder):
+    '''
+    path is the list of sea provinces the army is convoyed through,
+    followed by its destination.
+
+    >>> order = MoveByConvoyOrder(Unit(ENG, AMY, LON), [ECH, BRE])
+    >>> print(str(order.message()).strip())
+    ( ( ENG AMY LON ) CTO BRE VIA ( ECH ) )
+    '''
+    __slots__ = ('unit', 'path', 'dest')
+
     def __init__(self, unit, path):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.path = path
+        path = tuple(path)
+        _init_fields(self, unit=unit, path=path, dest=path[-1],
+                     key=(unit.key, CTO, path[-1], VTA, path[:-1]))
 
     def __repr__(self):
-        raise NotImplementedError
+        return "MoveByConvoyOrder(%s, %s)" % (repr(self.unit), list(self.path))
+
+    def __str__(self):
+        return "MoveByConvoy(%s -> %s via %s)" % (self.unit, self.dest, " ".join(map(str, self.path[:-1])))
+
+    def args(self):
+        return (self.unit, self.path)
+
+    def message(self):
+        seas = Message(*self.path[:-1]).wrap()
+        return (self.unit.wrap() ++ CTO ++ self.dest ++ VTA + seas).wrap()
+
 
+class RetreatOrder(BaseOrder):
+    __slots__ = ('unit', 'dest', 'dest_coast')
 
-class RetreatOrder():
     def __init__(self, unit, destination):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.dest, self.dest_coast = unpack_province(destination)
-        self.key = (unit.key, RTO, destination)
+        dest, dest_coast = unpack_province(destination)
+        _init_fields(self, unit=unit, dest=dest, dest_coast=dest_coast,
+                     key=(unit.key, RTO, province_key(dest, dest_coast)))
 
     def __repr__(self):
         return "RetreatOrder(%s, (%s, %s))" % (repr(self.unit), self.dest, self.dest_coast)
@@ -635,6 +1028,9 @@ class RetreatOrder():
         else:
             return "Retreat(%s -> %s)" % (self.unit, self.dest)
 
+    def args(self):
+        return (self.unit, self.key[2])
+
     def message(self):
         if self.dest_coast is not None:
             destination = Message(self.dest, self.dest_coast).wrap()
@@ -643,11 +1039,11 @@ class RetreatOrder():
             return (self.unit.wrap() ++ RTO ++ self.dest).wrap()
 
 
-class DisbandOrder():
+class DisbandOrder(BaseOrder):
+    __slots__ = ('unit',)
+
     def __init__(self, unit):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.key = (unit.key, DSB)
+        _init_fields(self, unit=unit, key=(unit.key, DSB))
 
     def __repr__(self):
         return "DisbandOrder(%s)" % repr(self.unit)
@@ -655,15 +1051,18 @@ class DisbandOrder():
     def __str__(self):
         return "Disband(%s)" % self.unit
 
+    def args(self):
+        return (self.unit,)
+
     def message(self):
         return (self.unit.wrap() ++ DSB).wrap()
 
 
-class BuildOrder():
+class BuildOrder(BaseOrder):
+    __slots__ = ('unit',)
+
     def __init__(self, unit):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.key = (unit.key, BLD)
+        _init_fields(self, unit=unit, key=(unit.key, BLD))
 
     def __repr__(self):
         return "BuildOrder(%s)" % repr(self.unit)
@@ -671,15 +1070,18 @@ class BuildOrder():
     def __str__(self):
         return "Build(%s)" % self.unit
 
+    def args(self):
+        return (self.unit,)
+
     def message(self):
         return (self.unit.wrap() ++ BLD).wrap()
 
 
-class RemoveOrder():
+class RemoveOrder(BaseOrder):
+    __slots__ = ('unit',)
+
     def __init__(self, unit):
-        BaseOrder.__init__(self)
-        self.unit = unit
-        self.key = (unit.key, REM)
+        _init_fields(self, unit=unit, key=(unit.key, REM))
 
     def __repr__(self):
         return "RemoveOrder(%s)" % repr(self.unit)
@@ -687,15 +1089,18 @@ class RemoveOrder():
     def __str__(self):
         return "Remove(%s)" % self.unit
 
+    def args(self):
+        return (self.unit,)
+
     def message(self):
         return (self.unit.wrap() ++ REM).wrap()
 
 
-class WaiveOrder():
+class WaiveOrder(BaseOrder):
+    __slots__ = ('power',)
+
     def __init__(self, power):
-        BaseOrder.__init__(self)
-        self.power = power
-        self.key = (power, WVE)
+        _init_fields(self, power=power, key=(power, WVE))
 
     def __repr__(self):
         return "WaiveOrder(%s)" % self.power
@@ -703,10 +1108,48 @@ class WaiveOrder():
     def __str__(self):
         return "Waive(%s)" % self.power
 
+    def args(self):
+        return (self.power,)
+
     def message(self):
         return (self.power + WVE).wrap()
 
 
+def order_from_key(key):
+    '''
+    Returns the Order with the given key, in the nested tuple layout of
+    Order.key and decoders.decode_ORD.
+
+    >>> order_from_key(((ENG, FLT, LON), MTO, ECH))
+    MoveOrder(Unit(ENG, FLT, LON, coast=None), (ECH, None))
+    '''
+    if key[1] is WVE:
+        return WaiveOrder(key[0])
+    unit = Unit(*key[0])
+    kind = key[1]
+    if kind is HLD:
+        return HoldOrder(unit)
+    if kind is MTO:
+        return MoveOrder(unit, key[2])
+    if kind is SUP and len(key) == 3:
+        return SupportHoldOrder(unit, Unit(*key[2]))
+    if kind is SUP:
+        return SupportMoveOrder(unit, Unit(*key[2]), key[4])
+    if kind is CVY:
+        return ConvoyOrder(unit, Unit(*key[2]), key[4])
+    if kind is CTO:
+        return MoveByConvoyOrder(unit, tuple(key[4]) + (key[2],))
+    if kind is RTO:
+        return RetreatOrder(unit, key[2])
+    if kind is DSB:
+        return DisbandOrder(unit)
+    if kind is BLD:
+        return BuildOrder(unit)
+    if kind is REM:
+        return RemoveOrder(unit)
+    raise ValueError('not an order: %r' % (key,))
+
+
 if __name__ == "__main__":
     unit = Unit(ENG, FLT, ECH)
     c_unit = Unit(ENG, AMY, LON)
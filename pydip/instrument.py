@@ -0,0 +1,317 @@
+'''
+Latency and throughput instrumentation for BaseClient.
+
+Metrics collects
+- per-handler latency histograms (handle_NOW, generate_orders, ...)
+- frame and byte counters per message kind, in each direction
+- the time from receiving NOW to sending SUB
+and can write periodic snapshots to a file, one JSON object per line.
+Counters are updated from the reader, writer and generation threads
+as well as the logic thread, so Metrics guards them with a lock, and
+periodic snapshots are written by a timer thread of their own, so a
+quiet connection still reports.
+
+PhaseProfiler runs cProfile and/or tracemalloc over selected phases
+and writes one set of files per profiled turn.
+'''
+import contextlib
+import json
+import os
+import struct
+import threading
+import time
+
+import util
+from language import tokens_by_value
+
+_tlas = {value: token.tla for value, token in tokens_by_value.items()}
+_frame_kinds = {util.IM: 'IM', util.RM: 'RM', util.FM: 'FM', util.EM: 'EM'}
+
+
+def frame_kind(msg_type, message):
+    '''
+    Names a frame by its command token for diplomacy messages (NOW,
+    SUB, ...) and by its message type otherwise.
+    '''
+    if msg_type == util.DM and len(message) >= 2:
+        return _tlas.get(struct.unpack_from('!H', message)[0], 'DM')
+    return _frame_kinds.get(msg_type, str(msg_type))
+
+
+class Histogram():
+    '''
+    Latency histogram with power-of-two microsecond buckets.
+    '''
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        micros = int(seconds * 1e6)
+        bound = 1 << micros.bit_length()
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        '''
+        Upper bound, in seconds, of the bucket holding the given fraction
+        of samples.
+        '''
+        if not self.count:
+            return None
+        needed = fraction * self.count
+        seen = 0
+        for bound in sorted(self.buckets):
+            seen += self.buckets[bound]
+            if seen >= needed:
+                return bound / 1e6
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets_us': {str(k): v for k, v in sorted(self.buckets.items())},
+        }
+
+
+class Metrics():
+    '''
+    - dump_path         File that snapshots are appended to, or None
+    - dump_interval     Seconds between periodic dumps, or None for
+                        none (dump() can still be called)
+    '''
+    def __init__(self, dump_path=None, dump_interval=60.0):
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.started = time.monotonic()
+        self.last_dump = self.started
+        self.histograms = {}
+        self.frames_in = {}
+        self.bytes_in = {}
+        self.frames_out = {}
+        self.bytes_out = {}
+        self.last_recv = None
+        self.last_dispatch = None
+        self.last_send = None
+        self.now_received = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.timer = None
+        if dump_path is not None and dump_interval:
+            self.timer = threading.Thread(target=self.dump_loop, name='pydip-metrics', daemon=True)
+            self.timer.start()
+
+    def histogram(self, name):
+        try:
+            return self.histograms[name]
+        except KeyError:
+            hist = self.histograms[name] = Histogram()
+            return hist
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.histogram(name).record(seconds)
+
+    def frame_in(self, kind, nbytes):
+        now = time.monotonic()
+        with self.lock:
+            self.last_recv = now
+            self.frames_in[kind] = self.frames_in.get(kind, 0) + 1
+            self.bytes_in[kind] = self.bytes_in.get(kind, 0) + nbytes
+            if kind == 'NOW':
+                self.now_received = now
+
+    def frame_out(self, kind, nbytes):
+        now = time.monotonic()
+        with self.lock:
+            self.last_send = now
+            self.frames_out[kind] = self.frames_out.get(kind, 0) + 1
+            self.bytes_out[kind] = self.bytes_out.get(kind, 0) + nbytes
+            if kind == 'SUB' and self.now_received is not None:
+                self.histogram('NOW->SUB').record(now - self.now_received)
+                self.now_received = None
+
+    def dispatched(self):
+        self.last_dispatch = time.monotonic()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'uptime': time.monotonic() - self.started,
+                'last_recv': self.last_recv,
+                'last_dispatch': self.last_dispatch,
+                'last_send': self.last_send,
+                'frames_in': dict(self.frames_in),
+                'bytes_in': dict(self.bytes_in),
+                'frames_out': dict(self.frames_out),
+                'bytes_out': dict(self.bytes_out),
+                'histograms': {name: hist.snapshot() for name, hist in self.histograms.items()},
+            }
+
+    def dump_loop(self):
+        while not self.stopped.wait(self.dump_interval):
+            self.dump()
+
+    def dump(self):
+        self.last_dump = time.monotonic()
+        if self.dump_path is None:
+            return
+        record = self.snapshot()
+        record['time'] = time.time()
+        with open(self.dump_path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def close(self):
+        '''
+        Stops periodic dumps and writes a last snapshot.
+        '''
+        self.stopped.set()
+        if self.timer is not None and self.timer is not threading.current_thread():
+            self.timer.join()
+        self.timer = None
+        self.dump()
+
+
+class PhaseProfiler():
+    '''
+    Profiles the handling of selected phases, writing per-turn files
+    named <game>_<power>_<season><year> to directory:
+    - .prof         cProfile stats, loadable with pstats
+    - .alloc.txt    peak traced memory and the top allocation sites
+
+    Phases are selected by season and/or by turn. Of the phases that
+    match, only every Nth is profiled, and at most limit in all, which
+    keeps the overhead bounded over a long tournament.
+    - seasons       set of seasons to profile, or None for any
+    - turns         set of (season, year) turns to profile, or None
+    - every         profile every Nth matching phase
+    - limit         maximum number of phases to profile, or None
+    - cprofile      whether to run cProfile
+    - allocations   whether to trace allocations with tracemalloc
+    '''
+    def __init__(self, directory, game=None, seasons=None, turns=None, every=1, limit=None,
+                 cprofile=True, allocations=False, top=25):
+        self.directory = directory
+        self.game = game or 'game-%s-%d' % (time.strftime('%Y%m%d%H%M%S'), os.getpid())
+        self.seasons = seasons
+        self.turns = turns
+        self.every = every
+        self.limit = limit
+        self.cprofile = cprofile
+        self.allocations = allocations
+        self.top = top
+        self.matched = 0
+        self.profiled = 0
+        self.written = []
+        self.profiles = None
+        self.lock = threading.Lock()
+
+    def selects(self, turn):
+        '''
+        Counts a phase and returns True if it should be profiled.
+        '''
+        if self.limit is not None and self.profiled >= self.limit:
+            return False
+        if self.seasons is not None and turn[0] not in self.seasons:
+            return False
+        if self.turns is not None and tuple(turn) not in self.turns:
+            return False
+        self.matched += 1
+        return (self.matched - 1) % self.every == 0
+
+    @contextlib.contextmanager
+    def phase(self, power, turn):
+        '''
+        Profiles the body of the with statement if the turn is selected.
+        '''
+        if not self.selects(turn):
+            yield
+            return
+        self.profiled += 1
+        # Imported here: they would roughly double the time it takes
+        # to import BaseClient, and most bots never profile
+        import cProfile
+        import pstats
+        import tracemalloc
+        profile = None
+        with self.lock:
+            self.profiles = []
+        started_tracing = False
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        if self.allocations:
+            tracemalloc.reset_peak()
+        if self.cprofile:
+            profile = cProfile.Profile()
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self.lock:
+                profiles, self.profiles = self.profiles, None
+            base = os.path.join(self.directory, '%s_%s_%s%s' % (self.game, power or 'OBS', turn[0], turn[1]))
+            os.makedirs(self.directory, exist_ok=True)
+            if profile is not None:
+                stats = pstats.Stats(profile)
+                for thread_profile in profiles:
+                    stats.add(thread_profile)
+                stats.dump_stats(base + '.prof')
+                self.written.append(base + '.prof')
+            if self.allocations:
+                self.write_allocations(base + '.alloc.txt')
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def write_allocations(self, path):
+        import tracemalloc
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        with open(path, 'w') as f:
+            f.write('peak traced memory: %d bytes\n' % peak)
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                f.write('%s\n' % stat)
+        self.written.append(path)
+
+    def wrap_thread(self, func):
+        '''
+        Returns func wrapped to be profiled in its own thread, if a phase
+        is being profiled when it starts. Its stats are merged into the
+        phase's if it finishes before the phase does.
+        '''
+        def run(*args):
+            with self.lock:
+                profiles = self.profiles
+            if profiles is None or not self.cprofile:
+                return func(*args)
+            import cProfile
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return func(*args)
+            finally:
+                profile.disable()
+                with self.lock:
+                    if self.profiles is profiles:
+                        profiles.append(profile)
+        return run
@@ -0,0 +1,431 @@
+'''
+Static map tables in a flat, read-only layout that every bot process on
+a host can share.
+
+A Gameboard built from an MDF holds the map as nested dicts and lists
+of Tokens, one copy per process. MapTables compiles the same data into
+arrays of unsigned 16-bit integers, written once to a file that each
+process maps into memory (see attach), so the operating system keeps a
+single copy of the pages however many bots are running. The Gameboard
+reads the map through Mapping views over the arrays, and only the
+position is held per process.
+
+Provinces are numbered by token value. The layout, one array after
+another, is
+
+    header          MAGIC, VERSION, powers, owners, provinces, rows,
+                    edges, reach, mask words, map id (4 words, most
+                    significant first)
+    powers          token values, in MDF order
+    owners          token values of the powers with home centres
+                    (including UNO if it has any)
+    provinces       token values, sorted; a province's id is its index
+    province_rows   CSR offsets: the rows of province i are
+                    province_rows[i] to province_rows[i + 1]
+    row_type        AMY, FLT, or the coast of a fleet on that coast
+    row_edges       CSR offsets: the adjacencies of row j are
+                    edge_province[row_edges[j]:row_edges[j + 1]]
+    edge_province   province ids
+    edge_coast      coast token values, or 0
+    reach_rows      CSR offsets: the provinces a unit on row j can move
+                    to are reach_province[reach_rows[j]:reach_rows[j + 1]]
+    reach_province  province ids, without coasts or repeats
+    home_masks      one bitmask over province ids per owner
+    center_mask     bitmask of all supply centres
+
+The map id is the same digest of the MDF as Gameboard.map_id, so a
+board reads the same id whichever way it was built.
+
+A process attaches each map once. The Mappings it reads through look up
+rows by unit type and hand out tuples, both cached per process, so a
+bot pays for the Tokens of the adjacencies it actually uses once rather
+than on every lookup. ThreatMap and features.Layout read the province
+index and each row's reach from the same MapTables.
+
+The attachment is done with an mmap'd file rather than
+multiprocessing.shared_memory: a segment has to outlive the process
+that created it, which the shared memory resource tracker doesn't allow.
+Files not used for max_age seconds, tables of other versions and
+temporary files left by a crash are removed whenever a new table is
+written.
+'''
+import array
+import collections.abc
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+
+from language import *
+from decoders import decode_MDF, map_id
+
+MAGIC = 0x5044
+VERSION = 2
+_HEADER = 13
+
+
+def _mask_words(provinces):
+    return (provinces + 15) // 16
+
+
+def build_tables(MDF_message):
+    '''
+    Returns the packed tables for a map, as bytes in native byte order.
+    '''
+    mdf = decode_MDF(MDF_message)
+    # UNO's home centres are the neutral ones
+    centers = set()
+    for homes in mdf.home_centers.values():
+        centers.update(homes)
+    provinces = sorted(set(mdf.adjacencies) | centers | set(mdf.non_home_centers), key=lambda p: p._hex)
+    ids = {province: i for i, province in enumerate(provinces)}
+    owners = [power for power in mdf.powers if power in mdf.home_centers]
+    owners += [power for power in mdf.home_centers if power not in owners]
+
+    province_rows = [0]
+    row_type = []
+    row_edges = [0]
+    edge_province = []
+    edge_coast = []
+    reach_rows = [0]
+    reach_province = []
+    for province in provinces:
+        for unit_type, adjs in mdf.adjacencies.get(province, {}).items():
+            row_type.append(unit_type[1]._hex if isinstance(unit_type, tuple) else unit_type._hex)
+            reach = []
+            for adj in adjs:
+                if isinstance(adj, tuple):
+                    edge_province.append(ids[adj[0]])
+                    edge_coast.append(adj[1]._hex)
+                else:
+                    edge_province.append(ids[adj])
+                    edge_coast.append(0)
+                if edge_province[-1] not in reach:
+                    reach.append(edge_province[-1])
+            row_edges.append(len(edge_province))
+            reach_province += reach
+            reach_rows.append(len(reach_province))
+        province_rows.append(len(row_type))
+    if len(edge_province) > 0xFFFF:
+        raise ValueError('map too large for 16-bit tables: %d adjacencies' % len(edge_province))
+
+    words = _mask_words(len(provinces))
+
+    def mask(members):
+        bits = [0] * words
+        for province in members:
+            i = ids[province]
+            bits[i // 16] |= 1 << (i % 16)
+        return bits
+
+    home_masks = []
+    for owner in owners:
+        home_masks += mask(mdf.home_centers[owner])
+
+    digest = map_id(MDF_message)
+    table = array.array('H', [MAGIC, VERSION, len(mdf.powers), len(owners), len(provinces),
+                              len(row_type), len(edge_province), len(reach_province), words])
+    table.extend((digest >> shift) & 0xFFFF for shift in (48, 32, 16, 0))
+    for values in ([p._hex for p in mdf.powers], [p._hex for p in owners], [p._hex for p in provinces],
+                   province_rows, row_type, row_edges, edge_province, edge_coast,
+                   reach_rows, reach_province, home_masks, mask(centers)):
+        table.extend(values)
+    return table.tobytes()
+
+
+class MapTables():
+    '''
+    Read-only view of packed tables, over any buffer (bytes, an mmap).
+    - map_id            digest of the map's MDF, as Gameboard.map_id
+    - province_list     province Tokens, in id order
+    - province_index    province Token -> id
+    - locations         (unit_type, province, coast) -> row, coast None
+                        for AMY and FLT rows
+    '''
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer).cast('H')
+        if len(view) < _HEADER or view[0] != MAGIC or view[1] != VERSION:
+            raise ValueError('not a version %d map table' % VERSION)
+        n_powers, n_owners, n_provinces, n_rows, n_edges, n_reach, words = view[2:9]
+        self.map_id = 0
+        for word in view[9:_HEADER]:
+            self.map_id = self.map_id << 16 | word
+        pos = _HEADER
+        sections = {}
+        for name, size in (('powers', n_powers), ('owners', n_owners), ('provinces', n_provinces),
+                           ('province_rows', n_provinces + 1), ('row_type', n_rows),
+                           ('row_edges', n_rows + 1), ('edge_province', n_edges), ('edge_coast', n_edges),
+                           ('reach_rows', n_rows + 1), ('reach_province', n_reach),
+                           ('home_masks', n_owners * words), ('center_mask', words)):
+            sections[name] = view[pos:pos + size]
+            pos += size
+        if pos != len(view):
+            raise ValueError('map table has %d values, expected %d' % (len(view), pos))
+        self.__dict__.update(sections)
+        self.mask_words = words
+
+        self.province_list = [Token.from_value(value) for value in self.provinces]
+        self.province_index = {province: i for i, province in enumerate(self.province_list)}
+        self.row_keys = [self.row_key(row) for row in range(n_rows)]
+        self.locations = {}
+        for i, province in enumerate(self.province_list):
+            for row in range(self.province_rows[i], self.province_rows[i + 1]):
+                key = self.row_keys[row]
+                if isinstance(key, tuple):
+                    self.locations[(key[0], province, key[1])] = row
+                else:
+                    self.locations[(key, province, None)] = row
+        self.row_cache = {}
+
+        self.adjacencies = _Adjacencies(self)
+        self.home_centers = _HomeCenters(self)
+        self.coasts = _Coasts(self)
+
+    def province_id(self, province):
+        '''
+        Returns the id of a province Token, or raises KeyError.
+        '''
+        return self.province_index[province]
+
+    def province(self, i):
+        return self.province_list[i]
+
+    def get_powers(self):
+        return [Token.from_value(value) for value in self.powers]
+
+    def row_key(self, row):
+        '''
+        Returns the unit type of a row as Gameboard.adjacencies keys it:
+        AMY, FLT or (FLT, coast).
+        '''
+        value = self.row_type[row]
+        if value == AMY._hex:
+            return AMY
+        if value == FLT._hex:
+            return FLT
+        return (FLT, Token.from_value(value))
+
+    def row_adjacencies(self, row):
+        '''
+        Returns a tuple of the provinces adjacent along a row, each a
+        province Token or a (province, coast) tuple. The tuple is built
+        on first use and shared by later calls.
+        '''
+        adjs = self.row_cache.get(row)
+        if adjs is None:
+            province_list = self.province_list
+            edge_province = self.edge_province
+            edge_coast = self.edge_coast
+            adjs = []
+            for e in range(self.row_edges[row], self.row_edges[row + 1]):
+                province = province_list[edge_province[e]]
+                coast = edge_coast[e]
+                adjs.append((province, Token.from_value(coast)) if coast else province)
+            adjs = self.row_cache.setdefault(row, tuple(adjs))
+        return adjs
+
+    def row_reach(self, row):
+        '''
+        Returns the ids of the provinces a unit on a row can move to,
+        without coasts or repeats, as a view into the tables.
+        '''
+        return self.reach_province[self.reach_rows[row]:self.reach_rows[row + 1]]
+
+    def rows(self, province):
+        i = self.province_id(province)
+        return range(self.province_rows[i], self.province_rows[i + 1])
+
+    def mask_members(self, mask):
+        '''
+        Returns the province Tokens in a bitmask, in province id order.
+        '''
+        return [self.province(w * 16 + bit)
+                for w, word in enumerate(mask) if word
+                for bit in range(16) if word >> bit & 1]
+
+    def is_center(self, province):
+        i = self.province_id(province)
+        return bool(self.center_mask[i // 16] >> (i % 16) & 1)
+
+
+class _Adjacencies(collections.abc.Mapping):
+    '''
+    province -> {unit_type: (province ...)}, as Gameboard.adjacencies
+    but with tuples. The per-province Mappings are cached.
+    '''
+    def __init__(self, tables):
+        self.tables = tables
+        self.views = {}
+
+    def __getitem__(self, province):
+        view = self.views.get(province)
+        if view is None:
+            rows = self.tables.rows(province)
+            if not rows:
+                raise KeyError(province)
+            view = self.views.setdefault(province, _ProvinceAdjacencies(self.tables, rows))
+        return view
+
+    def __iter__(self):
+        tables = self.tables
+        for i in range(len(tables.provinces)):
+            if tables.province_rows[i] != tables.province_rows[i + 1]:
+                yield tables.province(i)
+
+    def __len__(self):
+        rows = self.tables.province_rows
+        return sum(1 for i in range(len(rows) - 1) if rows[i] != rows[i + 1])
+
+
+class _ProvinceAdjacencies(collections.abc.Mapping):
+    '''
+    unit_type -> (province ...) for one province, with its rows indexed
+    by unit type.
+    '''
+    def __init__(self, tables, rows):
+        self.tables = tables
+        self.row_index = {tables.row_keys[row]: row for row in rows}
+
+    def __getitem__(self, unit_type):
+        return self.tables.row_adjacencies(self.row_index[unit_type])
+
+    def __iter__(self):
+        return iter(self.row_index)
+
+    def __len__(self):
+        return len(self.row_index)
+
+
+class _HomeCenters(collections.abc.Mapping):
+    '''
+    power -> [province ...], as Gameboard.home_centers. Centres are
+    listed in province order.
+    '''
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __getitem__(self, power):
+        tables = self.tables
+        try:
+            i = list(tables.owners).index(power._hex)
+        except (ValueError, AttributeError):
+            raise KeyError(power)
+        words = tables.mask_words
+        return tables.mask_members(tables.home_masks[i * words:(i + 1) * words])
+
+    def __iter__(self):
+        return (Token.from_value(value) for value in self.tables.owners)
+
+    def __len__(self):
+        return len(self.tables.owners)
+
+
+class _Coasts(collections.abc.Mapping):
+    '''
+    province -> [coast ...] for provinces with coasts, as Gameboard.coasts.
+    '''
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __getitem__(self, province):
+        try:
+            rows = self.tables.rows(province)
+        except KeyError:
+            raise KeyError(province)
+        coasts = [key[1] for key in (self.tables.row_keys[row] for row in rows) if isinstance(key, tuple)]
+        if not coasts:
+            raise KeyError(province)
+        return coasts
+
+    def __iter__(self):
+        for province in self.tables.adjacencies:
+            if province in self:
+                yield province
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def default_directory():
+    return os.path.join(tempfile.gettempdir(), 'pydip-maps')
+
+
+# Seconds a table file may go unused before it is removed
+max_age = 7 * 24 * 3600
+
+# path -> MapTables attached by this process
+_attached = {}
+_attach_lock = threading.Lock()
+
+_table_name = re.compile(r'map-[0-9a-f]+-v(\d+)\.tables$')
+
+
+def attach(MDF_message, directory=None):
+    '''
+    Returns the MapTables for a map, mapping the file that other bot
+    processes on this host share if it exists, and writing it first if
+    not. Files are named by a digest of the MDF, so every variant gets
+    its own, and are replaced atomically so a reader never sees half a
+    file. Within a process, every board of a map gets the same
+    MapTables.
+    '''
+    data = MDF_message if isinstance(MDF_message, (bytes, bytearray)) else MDF_message.pack()
+    directory = directory or default_directory()
+    path = os.path.join(directory, 'map-%s-v%d.tables' % (hashlib.sha1(data).hexdigest()[:20], VERSION))
+    with _attach_lock:
+        tables = _attached.get(path)
+        if tables is not None:
+            return tables
+        if os.path.exists(path):
+            # Marks the file as in use, so that prune leaves it alone
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        else:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(build_tables(data))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            prune(directory, keep=path)
+        with open(path, 'rb') as f:
+            tables = _attached[path] = MapTables(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return tables
+
+
+def prune(directory, keep=None, now=None):
+    '''
+    Removes the files in directory that attach wrote and nothing has
+    used for max_age seconds, the tables of other versions, and
+    temporary files older than an hour. Processes that still have a
+    removed file mapped keep reading it. Returns the paths removed.
+    '''
+    now = time.time() if now is None else now
+    removed = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if path == keep:
+            continue
+        match = _table_name.match(name)
+        try:
+            age = now - os.stat(path).st_mtime
+            if match:
+                stale = int(match.group(1)) != VERSION or age > max_age
+            else:
+                stale = name.startswith('tmp') and age > 3600
+            if stale:
+                os.unlink(path)
+                removed.append(path)
+        except OSError:
+            # Removed by another process meanwhile
+            pass
+    return removed
@@ -0,0 +1,106 @@
+'''
+Bounded memoization for Gameboard queries.
+
+Queries are cached in one of two scopes:
+- STATIC    results that only depend on the map, kept for the whole game
+- POSITION  results that depend on the current position, dropped
+            whenever the Gameboard processes a NOW or SCO message
+
+A STATIC cache is shared by a Gameboard's forks, which may be searched
+on other threads, so every cache guards its entries with a lock. The
+query itself runs outside the lock; two threads missing on the same key
+both compute it, and the second result replaces the first.
+'''
+import collections
+import functools
+import threading
+
+STATIC = 'static'
+POSITION = 'position'
+
+
+class QueryCache():
+    '''
+    Least-recently-used cache with per-query hit and miss counters.
+    '''
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        '''
+        Returns {query: (hits, misses)}.
+        '''
+        with self.lock:
+            names = set(self.hits) | set(self.misses)
+            return {name: (self.hits[name], self.misses[name]) for name in sorted(names)}
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits.clear()
+            self.misses.clear()
+
+    def lookup(self, name, key):
+        '''
+        Returns (True, result) for a cached key, (False, None) for a
+        miss, counting either against the query name.
+        '''
+        with self.lock:
+            try:
+                result = self.entries[key]
+            except KeyError:
+                self.misses[name] += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits[name] += 1
+            return True, result
+
+    def store(self, key, result):
+        '''
+        Caches result under key, dropping the least recently used entry
+        once there are more than maxsize.
+        '''
+        with self.lock:
+            self.entries[key] = result
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+def memoized(scope, key=None):
+    '''
+    Decorates a Gameboard method so its results are cached in
+    self.caches[scope]. key(self, *args) builds the cache key from the
+    arguments, for arguments that aren't hashable themselves; by
+    default the arguments are used as they are.
+    Lists are copied on the way out so that callers may shuffle or
+    modify what they get back. If self has no cache for the scope, the
+    method is simply called.
+    '''
+    def decorator(method):
+        name = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            cache = self.caches.get(scope)
+            if cache is None:
+                return method(self, *args)
+            k = (name, key(self, *args) if key else args)
+            found, result = cache.lookup(name, k)
+            if not found:
+                result = method(self, *args)
+                cache.store(k, result)
+            if isinstance(result, list):
+                return list(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+'''
+Parser for the human DAIDE notation that Message.__str__ produces, e.g.
+
+    SUB ( ( ENG FLT LON ) HLD )
+    NME ( 'HoldBot' ) ( '1.0' )
+
+for turning fixtures and logs back into Messages or packed bytes. TLAs,
+brackets, integers and quoted strings are recognised; a quote only
+closes a string when followed by a space, a bracket or the end of the
+line, so "'it's'" is one string.
+
+>>> parse("SUB ( ( ENG FLT LON ) HLD )") == SUB(Message(ENG, FLT, LON).wrap() ++ HLD)
+True
+>>> parse(str(NME('HoldBot')('1.0'))) == NME('HoldBot')('1.0')
+True
+'''
+import re
+import struct
+
+from language import *
+
+
+_words = re.compile(r"(\()|(\))|'(.*?)'(?=[\s()]|$)|(\d+)|([^\s()']+)|(\S)")
+_BRA = BRA._hex
+_KET = KET._hex
+
+# Word -> token value, for the common case of a line without strings.
+# Integers are added as they are met; there are at most 0x4000 of them.
+_lookup = {tla: token._hex for tla, token in tokens_by_tla.items()}
+_lookup['('] = _BRA
+_lookup[')'] = _KET
+
+
+def _integer(word, pos):
+    value = int(word)
+    if value >= 0x4000:
+        raise ValueError('integer out of range at %d: %s' % (pos, word))
+    return value
+
+
+def _scan(text):
+    '''
+    Yields the token values of text, matching one word at a time.
+    '''
+    for match in _words.finditer(text):
+        kind = match.lastindex
+        if kind == 1:
+            yield _BRA
+        elif kind == 2:
+            yield _KET
+        elif kind == 3:
+            for c in match.group(3):
+                yield 0x4B00 + ord(c)
+        elif kind == 4:
+            yield _integer(match.group(4), match.start())
+        elif kind == 5:
+            try:
+                yield _lookup[match.group(5)]
+            except KeyError:
+                raise ValueError('unknown token at %d: %s' % (match.start(), match.group(5)))
+        else:
+            raise ValueError('unexpected character at %d: %s' % (match.start(), match.group(6)))
+
+
+def _values(text):
+    '''
+    Returns the list of 16-bit token values of a message in DAIDE
+    notation. Text without strings is split on whitespace and looked
+    up word by word; anything else goes through the full scanner.
+    '''
+    if "'" not in text:
+        words = text.replace('(', ' ( ').replace(')', ' ) ').split()
+        try:
+            return [_lookup[word] for word in words]
+        except KeyError:
+            for word in words:
+                if word not in _lookup and word.isdigit() and int(word) < 0x4000:
+                    _lookup[word] = int(word)
+            try:
+                return [_lookup[word] for word in words]
+            except KeyError:
+                pass
+    return list(_scan(text))
+
+
+def parse(text):
+    '''
+    Returns the Message for one message in DAIDE notation.
+    '''
+    msg = Message()
+    msg.extend(map(Token.from_value, _values(text)))
+    return msg
+
+
+def parse_packed(text):
+    '''
+    Returns the packed bytes for one message in DAIDE notation, without
+    building a Message.
+    '''
+    values = _values(text)
+    return struct.pack('!%dH' % len(values), *values)
+
+
+def iter_messages(lines):
+    '''
+    Parses an iterable of lines (e.g. an open log file), one message per
+    line, yielding a Message for each non-blank line.
+    '''
+    for line in lines:
+        if line.strip():
+            yield parse(line)
+
+
+def iter_packed(lines):
+    '''
+    As iter_messages, but yields packed bytes.
+    '''
+    for line in lines:
+        if line.strip():
+            yield parse_packed(line)
@@ -0,0 +1,142 @@
+'''
+Predicts the positions most likely to follow the current one, so that a
+client can generate orders for them while it waits for adjudication.
+
+Only our own orders are taken into account: other powers' units are
+assumed to stay where they are, and their dislodged units to disband.
+'''
+from language import *
+from gameboard import Unit, MoveOrder, RetreatOrder, DisbandOrder, RemoveOrder, BuildOrder
+
+
+def next_turns(turn):
+    '''
+    Returns the turns that may follow turn, most likely first.
+    Retreat phases are skipped, since positions are predicted without
+    dislodgements.
+    '''
+    season, year = turn
+    if season in (SPR, SUM):
+        return [(FAL, year)]
+    if season in (FAL, AUT):
+        return [(WIN, year), (SPR, year + 1)]
+    return [(SPR, year + 1)]
+
+
+def _moved(order):
+    return isinstance(order, (MoveOrder, RetreatOrder))
+
+
+def apply_orders(board, orders, succeed=True):
+    '''
+    Returns the list of Units that results from the orders. A move
+    bounces if its destination is held by a unit that isn't leaving,
+    is contested by another move, or is a head-to-head swap. With
+    succeed=False every move bounces.
+    '''
+    ordered = {}
+    for order in orders:
+        if hasattr(order, 'unit'):
+            ordered[order.unit.key] = order
+
+    # Other powers' dislodged units are assumed to disband
+    dislodged = [unit.key for unit in board.retreat_opts if unit.power != board.power_played]
+
+    units = []
+    for power in board.powers:
+        for unit in board.get_units(power):
+            order = ordered.get(unit.key)
+            if unit.key in dislodged or isinstance(order, (DisbandOrder, RemoveOrder)):
+                continue
+            units.append(unit)
+
+    moves = {}
+    if succeed:
+        for unit in units:
+            order = ordered.get(unit.key)
+            if _moved(order):
+                moves[unit.province] = order
+    while moves:
+        held = set(unit.province for unit in units if unit.province not in moves)
+        targets = {}
+        for order in moves.values():
+            targets[order.dest] = targets.get(order.dest, 0) + 1
+        bounced = []
+        for province, order in moves.items():
+            swap = moves.get(order.dest)
+            if (order.dest in held or targets[order.dest] > 1
+                    or (swap is not None and swap.dest is province)):
+                bounced.append(province)
+        if not bounced:
+            break
+        for province in bounced:
+            del moves[province]
+
+    result = []
+    for unit in units:
+        order = moves.get(unit.province)
+        if order is not None and order.unit.key == unit.key:
+            result.append(Unit(unit.power, unit.unit_type, (order.dest, order.dest_coast)))
+        else:
+            result.append(unit)
+    for order in orders:
+        if isinstance(order, BuildOrder):
+            result.append(order.unit)
+    return result
+
+
+def now_message(turn, units):
+    '''
+    Builds the NOW message the server would send for a position.
+    '''
+    season, year = turn
+    msg = NOW(season, year)
+    for unit in units:
+        msg += unit.wrap()
+    return msg
+
+
+def predict_centers(board, units):
+    '''
+    Returns the SC ownership that follows a FAL/AUT turn ending with
+    units in place: an occupied centre passes to the occupier, an empty
+    one stays with its current owner.
+    '''
+    owners = dict(board.center_owner)
+    for unit in units:
+        if unit.province in owners:
+            owners[unit.province] = unit.power
+    centers = {}
+    for center, power in owners.items():
+        centers.setdefault(power, []).append(center)
+    return centers
+
+
+def sco_message(centers):
+    '''
+    Builds the SCO message the server would send for an ownership.
+    '''
+    msg = Message(SCO)
+    for power, provinces in centers.items():
+        msg += Message(power, *provinces).wrap()
+    return msg
+
+
+def predict(board, orders, limit=4):
+    '''
+    Returns up to limit (NOW, SCO) message pairs for the likeliest next
+    positions, given our orders for the current turn. SCO is None when
+    ownership cannot change, i.e. after any turn but FAL and AUT.
+    '''
+    outcomes = [apply_orders(board, orders)]
+    if any(_moved(order) for order in orders):
+        outcomes.append(apply_orders(board, orders, succeed=False))
+    changes_hands = board.season in (FAL, AUT)
+    predictions = []
+    for turn in next_turns(board.turn):
+        for units in outcomes:
+            sco = None
+            if changes_hands:
+                sco = sco_message(predict_centers(board, units))
+            predictions.append((now_message(turn, units), sco))
+    return predictions[:limit]
@@ -0,0 +1,250 @@
+'''
+Press: parsing FRM messages into typed records, building SND messages,
+and queueing incoming press so that it never holds up the messages
+orders depend on.
+
+A press message such as
+
+    FRM ( FRA 12 ) ( ENG ) ( PRP ( ALY ( ENG FRA ) VSS ( GER ) ) )
+
+is decoded into
+
+    Press(sender=FRA, number=12, recipients=(ENG,),
+          message=Statement(PRP, Alliance((ENG, FRA), (GER,))))
+
+Arrangements that have no record type here (and press_message kinds
+beyond the common ones) are kept as nested tuples, in the layout
+decoders.Reader.group() produces, so nothing is lost.
+'''
+import collections
+import struct
+import threading
+
+from language import *
+from decoders import Reader
+from memo import QueryCache
+
+
+Press = collections.namedtuple('Press', 'sender number recipients message')
+Statement = collections.namedtuple('Statement', 'kind content')
+
+Peace = collections.namedtuple('Peace', 'powers')
+Alliance = collections.namedtuple('Alliance', 'allies enemies')
+Draw = collections.namedtuple('Draw', '')
+Solo = collections.namedtuple('Solo', 'power')
+Demilitarize = collections.namedtuple('Demilitarize', 'powers provinces')
+OrderArrangement = collections.namedtuple('OrderArrangement', 'order')
+Compound = collections.namedtuple('Compound', 'operator arrangements')
+Negation = collections.namedtuple('Negation', 'arrangement')
+
+# press_message kinds whose content is an arrangement
+_arrangement_kinds = {PRP, FCT, INS, QRY, SUG, THK, IDK}
+# press_message kinds whose content is another press_message
+_reply_kinds = {YES, REJ, BWX, HUH}
+
+# Queue policies for a sender whose queue is full
+DROP_OLDEST = 'drop-oldest'
+DROP_NEWEST = 'drop-newest'
+COALESCE = 'coalesce'
+
+
+def arrangement(group):
+    '''
+    Converts an arrangement, as nested tuples, to its record type.
+    '''
+    head = group[0]
+    if head is PCE:
+        return Peace(group[1])
+    if head is ALY and len(group) == 4 and group[2] is VSS:
+        return Alliance(group[1], group[3])
+    if head is DRW and len(group) == 1:
+        return Draw()
+    if head is SLO:
+        return Solo(group[1][0] if isinstance(group[1], tuple) else group[1])
+    if head is DMZ:
+        return Demilitarize(group[1], group[2])
+    if head is XDO:
+        return OrderArrangement(group[1])
+    if head in (AND, ORR):
+        return Compound(head, tuple(arrangement(arr) for arr in group[1:]))
+    if head is NOT:
+        return Negation(arrangement(group[1]))
+    return group
+
+
+def statement(group):
+    '''
+    Converts a press_message, as nested tuples, to a Statement.
+    '''
+    kind = group[0]
+    if kind in _arrangement_kinds and len(group) == 2:
+        return Statement(kind, arrangement(group[1]))
+    if kind in _reply_kinds and len(group) == 2:
+        return Statement(kind, statement(group[1]))
+    return Statement(kind, group[1:])
+
+
+def decode_FRM(data):
+    '''
+    FRM (power [number]) (power power ...) (press_message)
+    Returns a Press. number is None if the server doesn't send one.
+    '''
+    reader = Reader(data)
+    reader.expect(FRM)
+    reader.open()
+    sender = reader.token()
+    number = None
+    if not reader.at_close():
+        number = reader.integer()
+    reader.close()
+    recipients = reader.group()
+    message = statement(reader.group())
+    return Press(sender, number, recipients, message)
+
+
+def as_tuple(value):
+    '''
+    The inverse of statement() and arrangement(): returns the nested
+    tuple form of a Statement or arrangement record.
+    '''
+    if isinstance(value, Statement):
+        if value.kind in _arrangement_kinds or value.kind in _reply_kinds:
+            return (value.kind, as_tuple(value.content))
+        return (value.kind,) + tuple(value.content)
+    if isinstance(value, Peace):
+        return (PCE, value.powers)
+    if isinstance(value, Alliance):
+        return (ALY, value.allies, VSS, value.enemies)
+    if isinstance(value, Draw):
+        return (DRW,)
+    if isinstance(value, Solo):
+        return (SLO, value.power)
+    if isinstance(value, Demilitarize):
+        return (DMZ, value.powers, value.provinces)
+    if isinstance(value, OrderArrangement):
+        return (XDO, value.order)
+    if isinstance(value, Compound):
+        return (value.operator,) + tuple(as_tuple(arr) for arr in value.arrangements)
+    if isinstance(value, Negation):
+        return (NOT, as_tuple(value.arrangement))
+    return value
+
+
+def _values(value, out):
+    '''
+    Appends the token values of value (a Token, int, str or nested
+    tuple) to out. Tuples are bracketed.
+    '''
+    if isinstance(value, tuple):
+        out.append(BRA._hex)
+        for item in value:
+            _values(item, out)
+        out.append(KET._hex)
+    elif isinstance(value, Token):
+        out.append(value._hex)
+    elif isinstance(value, int):
+        out.append(value)
+    elif isinstance(value, str):
+        out.extend(0x4B00 + ord(c) for c in value)
+    else:
+        raise ValueError('cannot encode %r' % (value,))
+
+
+def _frozen(value):
+    '''
+    value with its lists turned into tuples, at any depth, so that it
+    can be hashed; lists and tuples are bracketed alike.
+    '''
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+class Encoder():
+    '''
+    Builds packed SND messages. A bot tends to send the same few
+    proposals over and over, so encodings are cached, keyed by the
+    recipients and the Statement.
+    '''
+    def __init__(self, maxsize=256):
+        self.cache = QueryCache(maxsize)
+
+    def encode_SND(self, recipients, message):
+        '''
+        SND (power power ...) (press_message)
+        message is a Statement (or its nested tuple form). Returns the
+        packed bytes.
+        '''
+        recipients = tuple(recipients)
+        content = _frozen(as_tuple(message))
+        k = (recipients, content)
+        found, data = self.cache.lookup('SND', k)
+        if found:
+            return data
+        values = [SND._hex]
+        _values(recipients, values)
+        _values(content, values)
+        data = struct.pack('!%dH' % len(values), *values)
+        self.cache.store(k, data)
+        return data
+
+
+class PressQueues():
+    '''
+    Bounded per-sender queues of incoming Press, shared between the
+    reader thread and the logic thread. get() takes from each sender in
+    turn, so one chatty power can't starve the others. When a sender's
+    queue is full, policy decides what gives:
+    - DROP_OLDEST   the oldest queued press from that sender is dropped
+    - DROP_NEWEST   the new press is dropped
+    - COALESCE      a press identical to one already queued is merged
+                    into it; otherwise as DROP_OLDEST
+    '''
+    def __init__(self, maxlen=32, policy=COALESCE):
+        self.maxlen = maxlen
+        self.policy = policy
+        self.queues = collections.OrderedDict()
+        self.size = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def put(self, press):
+        '''
+        Queues press. Returns False if it was dropped or coalesced.
+        '''
+        with self.lock:
+            queue = self.queues.get(press.sender)
+            if queue is None:
+                queue = self.queues[press.sender] = collections.deque()
+            if self.policy == COALESCE:
+                for queued in queue:
+                    if queued.message == press.message and queued.recipients == press.recipients:
+                        self.coalesced += 1
+                        return False
+            if len(queue) >= self.maxlen:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return False
+                queue.popleft()
+                self.size -= 1
+            queue.append(press)
+            self.size += 1
+            return True
+
+    def get(self):
+        '''
+        Returns the next Press, or None if all queues are empty.
+        '''
+        with self.lock:
+            for sender in list(self.queues):
+                queue = self.queues[sender]
+                # Rotate so the next get starts with the next sender
+                self.queues.move_to_end(sender)
+                if queue:
+                    self.size -= 1
+                    return queue.popleft()
+            return None
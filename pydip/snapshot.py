@@ -0,0 +1,239 @@
+'''
+Compact binary snapshots of a Gameboard's position, for checkpoints and
+for handing positions to worker processes.
+
+A snapshot holds only the dynamic state: the turn, units, supply centre
+ownership, retreat options, the current turn's orders and the latest
+order results. The map is referred to by Gameboard.map_id, and restore
+applies a snapshot to a fork of a Gameboard for the same map, so the
+static data is never copied. Everything is stored as unsigned 16-bit
+values in native byte order (snapshots are meant for processes on the
+same host), and restore reads them through a memoryview of the buffer
+it is given, without copying it.
+
+The layout is
+
+    header      MAGIC, VERSION, map id (4 words), power played (0 for
+                none), season, year
+    units       count, then power, unit type, province, coast (0 for
+                none) per unit
+    centres     count, then province, owner per centre
+    retreats    count, then per dislodged unit: unit index, number of
+                options, province and coast per option
+    orders      count, then per order: length, key as token values
+    results     turn (0, 0 for none), count, then per result: length,
+                order key as token values, length, result token values
+
+Order keys are written as token values with brackets, the same layout
+decoders.Reader.group() reads back into nested tuples.
+'''
+import array
+
+from language import *
+import zobrist
+from decoders import Reader
+from gameboard import Unit, UnitChanges, order_from_key
+
+MAGIC = 0x5053
+VERSION = 1
+_BRA = BRA._hex
+_KET = KET._hex
+_seasons = {SPR, SUM, FAL, AUT, WIN}
+
+# Units are immutable, so restored positions share them: one per
+# (power, unit type, province, coast) values seen
+_units = {}
+
+
+def _flatten(value, out):
+    '''
+    Appends the token values of a Token, int or nested tuple to out.
+    '''
+    if isinstance(value, tuple):
+        out.append(_BRA)
+        for item in value:
+            _flatten(item, out)
+        out.append(_KET)
+    elif isinstance(value, Token):
+        out.append(value._hex)
+    else:
+        out.append(value)
+
+
+def _group(out, value):
+    '''
+    Appends a length-prefixed group.
+    '''
+    start = len(out)
+    out.append(0)
+    _flatten(value, out)
+    out[start] = len(out) - start - 1
+
+
+def encode(board, results=True):
+    '''
+    Returns a snapshot of board's position as bytes. Leaving out the
+    results makes it smaller and quicker to restore.
+    '''
+    out = array.array('H', [MAGIC, VERSION])
+    out.extend((board.map_id >> shift) & 0xFFFF for shift in (48, 32, 16, 0))
+    out.append(board.power_played._hex if board.power_played is not None else 0)
+    if board.turn is not None:
+        out.extend((board.season._hex, board.year))
+    else:
+        out.extend((0, 0))
+
+    index = {}
+    units = [unit for power in board.powers for unit in board.units[power]]
+    out.append(len(units))
+    for i, unit in enumerate(units):
+        index[unit] = i
+        out.extend((unit.power._hex, unit.unit_type._hex, unit.province._hex,
+                    unit.coast._hex if unit.coast is not None else 0))
+
+    out.append(len(board.center_owner))
+    for center, owner in board.center_owner.items():
+        out.extend((center._hex, owner._hex))
+
+    out.append(len(board.retreat_opts))
+    for unit, options in board.retreat_opts.items():
+        out.extend((index[unit], len(options)))
+        for option in options:
+            if isinstance(option, tuple):
+                out.extend((option[0]._hex, option[1]._hex))
+            else:
+                out.extend((option._hex, 0))
+
+    orders = board.orders.get(board.turn, [])
+    out.append(len(orders))
+    for order in orders:
+        _group(out, order.key)
+
+    if results and board.results:
+        turn = next(reversed(board.results))
+        latest = board.results[turn]
+        out.extend((turn[0]._hex, turn[1], len(latest)))
+        for k, result in latest.items():
+            _group(out, k)
+            _group(out, result)
+    else:
+        out.extend((0, 0, 0))
+    return out.tobytes()
+
+
+def restore(data, board):
+    '''
+    Returns a fork of board, a Gameboard for the same map, holding the
+    position in a snapshot. Raises ValueError if the snapshot is for a
+    different map, isn't one, or is corrupt.
+    '''
+    values = memoryview(data).cast('H')
+    if len(values) < 10 or values[0] != MAGIC or values[1] != VERSION:
+        raise ValueError('not a version %d snapshot' % VERSION)
+    snapshot_map = values[2] << 48 | values[3] << 32 | values[4] << 16 | values[5]
+    if snapshot_map != board.map_id:
+        raise ValueError('snapshot is for map %016x, not %016x' % (snapshot_map, board.map_id))
+    power = tokens_by_value.get(values[6]) if values[6] else None
+    if values[6] and power not in board.powers:
+        raise ValueError('snapshot is for unknown power 0x%04X' % values[6])
+    season = tokens_by_value.get(values[7]) if values[7] else None
+    if values[7] and season not in _seasons:
+        raise ValueError('snapshot has unknown season 0x%04X' % values[7])
+    if season is None and values[8]:
+        raise ValueError('snapshot has a year but no season')
+    try:
+        return _restore(values, board.fork(), power, season)
+    except (KeyError, IndexError) as e:
+        raise ValueError('corrupt snapshot: %r' % (e,))
+
+
+def _restore(values, board, power, season):
+    '''
+    Applies the snapshot in values, whose header has been checked, to
+    board, a fork. Corrupt data raises KeyError or IndexError.
+    '''
+    board.power_played = power
+    if season is not None:
+        board.season, board.year = season, values[8]
+        board.turn = (board.season, board.year)
+    else:
+        board.season = board.year = board.turn = None
+    pos = 9
+
+    # Everything but the year is a token of the map's vocabulary
+    token = tokens_by_value.__getitem__
+    board.units = units_of = {power: [] for power in board.powers}
+    board.unit_by_key = unit_by_key = {}
+    board._unit_hashes = hashes = {}
+    board.interned = interned = {}
+    units = []
+    count = values[pos]
+    pos += 1
+    for p in range(pos, pos + 4 * count, 4):
+        k = tuple(values[p:p + 4])
+        unit = _units.get(k)
+        if unit is None:
+            power, unit_type, province, coast = k
+            unit = _units[k] = Unit(token(power), token(unit_type),
+                                    (token(province), token(coast)) if coast else token(province))
+        units_of[unit.power].append(unit)
+        unit_by_key[unit.key] = interned[(Unit, unit.key)] = unit
+        hashes[unit.key] = zobrist.unit_key(unit)
+        units.append(unit)
+    pos += 4 * count
+    board.unit_changes = UnitChanges([], [], list(units), [])
+
+    board.center_owner = {}
+    board.center_counts = {}
+    board.supply_centers = {power: [] for power in board.supply_centers}
+    count = values[pos]
+    pos += 1
+    for p in range(pos, pos + 2 * count, 2):
+        center, owner = token(values[p]), token(values[p + 1])
+        board.center_owner[center] = owner
+        board.center_counts[owner] = board.center_counts.get(owner, 0) + 1
+        board.supply_centers.setdefault(owner, []).append(center)
+    pos += 2 * count
+
+    board.retreat_opts = {}
+    count = values[pos]
+    pos += 1
+    for i in range(count):
+        unit, n = units[values[pos]], values[pos + 1]
+        options = []
+        for p in range(pos + 2, pos + 2 + 2 * n, 2):
+            province = token(values[p])
+            options.append((province, token(values[p + 1])) if values[p + 1] else province)
+        board.retreat_opts[unit] = options
+        pos += 2 + 2 * n
+
+    board.position_hash = zobrist.position_hash(units, board.supply_centers, board.turn)
+    board.orders_hash = 0
+    board.orders = {}
+    if board.turn is not None:
+        board.orders[board.turn] = []
+    count = values[pos]
+    pos += 1
+    if count and board.turn is None:
+        raise ValueError('snapshot has orders but no turn')
+    for i in range(count):
+        length = values[pos]
+        board.add(order_from_key(Reader.from_values(values[pos + 1:pos + 1 + length]).group()))
+        pos += 1 + length
+
+    board.results = {}
+    if values[pos]:
+        turn = (token(values[pos]), values[pos + 1])
+        results = board.results[turn] = {}
+        count = values[pos + 2]
+        pos += 3
+        for i in range(count):
+            length = values[pos]
+            k = Reader.from_values(values[pos + 1:pos + 1 + length]).group()
+            pos += 1 + length
+            length = values[pos]
+            results[k] = Reader.from_values(values[pos + 1:pos + 1 + length]).group()
+            pos += 1 + length
+    if board.threat_map is not None:
+        board.threat_map.update(board)
+    return board
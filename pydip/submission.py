@@ -0,0 +1,181 @@
+'''
+Incremental order submission.
+
+DAIDE lets a client submit orders as often as it likes before the
+deadline: an order for a unit replaces the one the server holds, and
+NOT (SUB (order)) withdraws one. A bot that refines its orders many
+times a phase need not resend the whole set each time. Submissions
+remembers what has been sent this phase, and turns the current order
+set into a SUB of only the new or changed orders plus a NOT (SUB) for
+each order dropped since. THX replies (and YES/REJ to the NOTs) say
+which orders the server holds; an order it refused is sent again on
+the next submission.
+
+Orders are compared per unit (waives per power, by count), so a
+changed order is one whose unit has a different order from last time.
+
+Each phase's savings are kept in history: messages and bytes sent
+against what resending the full set every time would have cost.
+'''
+import threading
+
+from language import *
+from decoders import Reader
+from gameboard import WaiveOrder, order_from_key
+
+
+def slot_of(key, waives=0):
+    '''
+    Returns what an order is an order for: its unit's key, or
+    (power, WVE, n) for a power's nth waive.
+    '''
+    if isinstance(key[0], tuple):
+        return key[0]
+    return (key[0], WVE, waives)
+
+
+class Submissions():
+    '''
+    - submitted     slot -> the order last sent for it this phase
+    - acknowledged  slot -> key of the order the server accepted
+    - stats         counters for the current phase
+    - history       stats of the finished phases
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history = []
+        self.stats = None
+        self.new_phase(None)
+
+    def new_phase(self, turn):
+        with self.lock:
+            if self.stats is not None and self.stats['submissions']:
+                self.history.append(self.stats)
+            self.submitted = {}
+            self.acknowledged = {}
+            self.stats = {
+                'turn': turn,
+                'submissions': 0,
+                'messages': 0,
+                'bytes': 0,
+                'full_messages': 0,
+                'full_bytes': 0,
+                'orders_sent': 0,
+                'retracted': 0,
+                'acknowledged': 0,
+                'rejected': 0,
+            }
+
+    def update(self, orders):
+        '''
+        Returns the messages that bring the server's orders in line with
+        orders, the complete current order set, and notes them as sent.
+        '''
+        current = {}
+        waives = {}
+        for order in orders:
+            if isinstance(order, WaiveOrder):
+                n = waives[order.power] = waives.get(order.power, 0) + 1
+                current[slot_of(order.key, n)] = order
+            else:
+                current[slot_of(order.key)] = order
+
+        with self.lock:
+            changed = [order for slot, order in current.items()
+                       if slot not in self.submitted or self.submitted[slot].key != order.key]
+            dropped = [order for slot, order in self.submitted.items() if slot not in current]
+            self.submitted = current
+
+            messages = []
+            if changed:
+                sub = Message(SUB)
+                for order in changed:
+                    sub += order.message()
+                messages.append(sub)
+            for order in dropped:
+                messages.append(NOT(+SUB + order.message()))
+
+            stats = self.stats
+            stats['submissions'] += 1
+            stats['orders_sent'] += len(changed)
+            stats['retracted'] += len(dropped)
+            stats['messages'] += len(messages)
+            # Each frame has a 4-byte header
+            stats['bytes'] += sum(2 * len(msg) + 4 for msg in messages)
+            if current:
+                stats['full_messages'] += 1
+                stats['full_bytes'] += 2 * (1 + sum(len(order.message()) for order in orders)) + 4
+            return messages
+
+    def find_slot(self, key):
+        '''
+        Returns the slot of the submitted order with the given key, or
+        None if it has since been replaced or dropped.
+        '''
+        if isinstance(key[0], tuple):
+            order = self.submitted.get(key[0])
+            return key[0] if order is not None and order.key == key else None
+        for slot, order in self.submitted.items():
+            if order.key == key and slot not in self.acknowledged:
+                return slot
+        return None
+
+    def handle_THX(self, msg, accept_all=False):
+        '''
+        THX (order) (note). MBV means the server holds the order; any
+        other note that it refused it, unless the game allows any
+        orders (AOA).
+        '''
+        reader = Reader(msg)
+        reader.expect(THX)
+        key = reader.group()
+        note = reader.group()
+        with self.lock:
+            slot = self.find_slot(key)
+            if slot is None:
+                return
+            if note[0] is MBV or accept_all:
+                self.acknowledged[slot] = key
+                self.stats['acknowledged'] += 1
+            else:
+                del self.submitted[slot]
+                self.acknowledged.pop(slot, None)
+                self.stats['rejected'] += 1
+
+    def handle_NOT(self, msg, accepted):
+        '''
+        YES or REJ (NOT (SUB (order))). A refused retraction leaves the
+        order with the server, so it is retracted again next time.
+        '''
+        reader = Reader(msg)
+        reader.next()
+        reader.open()
+        reader.expect(NOT)
+        reader.open()
+        reader.expect(SUB)
+        if reader.at_close():
+            return
+        key = reader.group()
+        with self.lock:
+            if accepted:
+                for slot, acknowledged in list(self.acknowledged.items()):
+                    if acknowledged == key:
+                        del self.acknowledged[slot]
+                        break
+                return
+            if isinstance(key[0], tuple):
+                slot = key[0]
+            else:
+                slot = slot_of(key, 1 + sum(1 for s in self.submitted if s[1] is WVE and s[0] is key[0]))
+            # Unless the unit has a new order, which will replace it
+            if slot not in self.submitted:
+                self.submitted[slot] = order_from_key(key)
+
+    def savings(self, stats=None):
+        '''
+        Returns (messages saved, bytes saved) for a phase's stats, the
+        current phase's by default. Negative if incremental submission
+        cost more.
+        '''
+        stats = stats or self.stats
+        return stats['full_messages'] - stats['messages'], stats['full_bytes'] - stats['bytes']
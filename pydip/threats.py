@@ -0,0 +1,228 @@
+'''
+Reachability and threat map: for every province, how many units of each
+power could move into it next turn, and so could also support a unit
+holding or moving there.
+
+The map is a provinces x powers matrix of counts, the sum over units of
+the reach of the unit's location. Reach vectors are computed once from
+the adjacencies; when a NOW arrives only the units that moved, appeared
+or vanished are subtracted or added, so a turn costs O(changes) vector
+additions rather than a walk over every unit's adjacencies. Dislodged
+units can neither move nor support, and don't count.
+
+NumPy is used for the matrix if it is installed; without it the same
+counts are kept in lists, adding along each location's adjacency list.
+It is imported when the first ThreatMap is built, as every Gameboard
+import goes through this module.
+
+    threat_map = board.get_threat_map()
+    threat_map.reach(BUR, FRA)      # French units that can reach BUR
+    threat_map.threat(BUR, FRA)     # everyone else's
+'''
+from language import *
+
+# The numpy module once load_numpy has looked for it, None if missing
+numpy = None
+_numpy_loaded = False
+
+
+def load_numpy():
+    '''
+    Imports NumPy the first time it is called; returns the module, or
+    None if it isn't installed.
+    '''
+    global numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_loaded = True
+    return numpy
+
+
+class ThreatMap():
+    '''
+    Counts of units able to reach each province, per power, for one
+    Gameboard's position. Use Gameboard.get_threat_map() rather than
+    building one directly, so it is kept up to date.
+    - provinces     provinces in row order
+    - powers        powers in column order
+    '''
+    def __init__(self, board, use_numpy=True):
+        self.powers = list(board.powers)
+        self.power_index = {power: i for i, power in enumerate(self.powers)}
+        self.numpy = use_numpy and load_numpy() is not None
+
+        # A location is where a unit can stand: (unit_type, province,
+        # coast). Its reach is the provinces it can move to, without
+        # coasts, as a sequence of indexes.
+        tables = board.tables
+        if tables is not None:
+            # Shared tables hold all of these already
+            self.provinces = tables.province_list
+            self.province_index = tables.province_index
+            self.location_index = tables.locations
+            self.location_reach = _TableReach(tables)
+        else:
+            self.provinces = sorted(board.adjacencies, key=lambda p: p._hex)
+            self.province_index = {province: i for i, province in enumerate(self.provinces)}
+            self.location_index = {}
+            self.location_reach = []
+            for province in self.provinces:
+                for unit_type, adjs in board.adjacencies[province].items():
+                    if isinstance(unit_type, tuple):
+                        location = (unit_type[0], province, unit_type[1])
+                    else:
+                        location = (unit_type, province, None)
+                    reach = []
+                    for adj in adjs:
+                        i = self.province_index[adj[0] if isinstance(adj, tuple) else adj]
+                        if i not in reach:
+                            reach.append(i)
+                    self.location_index[location] = len(self.location_reach)
+                    self.location_reach.append(reach)
+
+        n = len(self.provinces)
+        if self.numpy:
+            self.moves = numpy.zeros((len(self.location_reach), n), dtype=numpy.int16)
+            for loc, reach in enumerate(self.location_reach):
+                self.moves[loc, list(reach)] = 1
+            self.counts = numpy.zeros((n, len(self.powers)), dtype=numpy.int16)
+        else:
+            self.counts = [[0] * len(self.powers) for i in range(n)]
+        # (power index, location index) of each counted unit
+        self.placed = set()
+        # Units that were dislodged at the last update
+        self.dislodged = set()
+
+    def copy(self):
+        '''
+        Returns a ThreatMap with its own counts, sharing the reach tables.
+        '''
+        threat_map = object.__new__(ThreatMap)
+        threat_map.__dict__.update(self.__dict__)
+        if self.numpy:
+            threat_map.counts = self.counts.copy()
+        else:
+            threat_map.counts = [list(row) for row in self.counts]
+        threat_map.placed = set(self.placed)
+        threat_map.dislodged = set(self.dislodged)
+        return threat_map
+
+    def location(self, unit):
+        '''
+        Returns (power index, location index) for a unit.
+        '''
+        return (self.power_index[unit.power],
+                self.location_index[(unit.unit_type, unit.province, unit.coast)])
+
+    def update(self, board, vanished=None, appeared=None):
+        '''
+        Brings the counts up to date with board's units, adding and
+        removing only the units that changed. Given the units that
+        vanished and appeared since the last update, only those and the
+        dislodged units are looked at; otherwise every unit is.
+        '''
+        dislodged = set(board.retreat_opts)
+        if vanished is None:
+            placed = set()
+            for units in board.units.values():
+                for unit in units:
+                    if unit not in dislodged:
+                        placed.add(self.location(unit))
+            removed = self.placed - placed
+            added = placed - self.placed
+        else:
+            removed = set()
+            added = set()
+            for unit in self.dislodged.union(vanished, appeared, dislodged):
+                entry = self.location(unit)
+                counted = unit.key in board.unit_by_key and unit not in dislodged
+                if counted and entry not in self.placed:
+                    added.add(entry)
+                elif not counted and entry in self.placed:
+                    removed.add(entry)
+            placed = (self.placed - removed) | added
+        self.placed = placed
+        self.dislodged = dislodged
+        if self.numpy:
+            counts = self.counts
+            moves = self.moves
+            for p, loc in removed:
+                counts[:, p] -= moves[loc]
+            for p, loc in added:
+                counts[:, p] += moves[loc]
+        else:
+            counts = self.counts
+            location_reach = self.location_reach
+            for p, loc in removed:
+                for i in location_reach[loc]:
+                    counts[i][p] -= 1
+            for p, loc in added:
+                for i in location_reach[loc]:
+                    counts[i][p] += 1
+        return len(removed) + len(added)
+
+    def reach(self, province, power):
+        '''
+        Returns the number of power's units that could move into (or
+        support into) province.
+        '''
+        return int(self.counts[self.province_index[province]][self.power_index[power]])
+
+    def threat(self, province, power):
+        '''
+        Returns the number of other powers' units that could move into
+        province.
+        '''
+        row = self.counts[self.province_index[province]]
+        return int(sum(row)) - int(row[self.power_index[power]])
+
+    def powers_reaching(self, province):
+        '''
+        Returns {power: count} for the powers with a unit able to reach
+        province.
+        '''
+        row = self.counts[self.province_index[province]]
+        return {power: int(row[p]) for p, power in enumerate(self.powers) if row[p]}
+
+    def reachable(self, power):
+        '''
+        Returns the provinces at least one of power's units can reach.
+        '''
+        p = self.power_index[power]
+        return [province for i, province in enumerate(self.provinces) if self.counts[i][p]]
+
+    def contested(self, power):
+        '''
+        Returns the provinces that both power and another power can reach.
+        '''
+        p = self.power_index[power]
+        return [province for i, province in enumerate(self.provinces)
+                if self.counts[i][p] and sum(self.counts[i]) > self.counts[i][p]]
+
+    def matrix(self):
+        '''
+        Returns a copy of the provinces x powers counts: a NumPy array
+        if NumPy is in use, otherwise a list of lists.
+        '''
+        if self.numpy:
+            return self.counts.copy()
+        return [list(row) for row in self.counts]
+
+
+class _TableReach():
+    '''
+    The reach of every row of shared MapTables, as location_reach.
+    '''
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __len__(self):
+        return len(self.tables.row_type)
+
+    def __getitem__(self, row):
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.tables.row_reach(row)
@@ -0,0 +1,90 @@
+# DAIDE token vocabulary: one line per run of consecutive values,
+# "<first value> TLA TLA ...". The token tables in language.py are
+# generated from it with
+#     python tools/gen_token_tables.py
+# Category names, by the high byte of the value:
+%category 00-3F INTEGER
+%category 40 BRACKET
+%category 41 POWER
+%category 42 UNIT TYPE
+%category 43 ORDER
+%category 44 ORDER NOTE
+%category 45 RESULT
+%category 46 COAST
+%category 47 PHASE
+%category 48 COMMAND
+%category 49 PARAMETER
+%category 4A PRESS
+%category 4B TEXT
+%category 50-57 PROVINCE
+%category 58 RESERVED
+
+# Brackets
+4000 BRA KET
+
+# Powers
+4100 AUS ENG FRA GER ITA RUS TUR
+
+# Unit Types
+4200 AMY FLT
+
+# Orders
+4320 CTO CVY HLD MTO SUP VIA
+4340 DSB RTO
+4380 BLD REM WVE
+
+# Order Notes
+4400 MBV BPR CST ESC FAR HSC NAS NMB
+4409 NRN NRS NSA NSC NSF NSP NST NSU NVR NYU YSC
+
+# Results
+4500 SUC BNC CUT DSR FLD NSO RET
+
+# Coasts
+4600 NCS
+4602 NEC
+4604 ECS
+4606 SEC
+4608 SCS
+460A SWC
+460C WCS
+460E NWC
+
+# Phases
+4700 SPR SUM FAL AUT WIN
+
+# Commands
+4800 CCD DRW FRM GOF HLO HST HUH IAM LOD MAP MDF MIS
+480C NME NOT NOW OBS OFF ORD OUT PRN REJ SCO SLO SND
+4818 SUB SVE THX TME YES ADM SMR
+
+# Parameters
+4900 AOA BTL ERR LVL MRT MTL NPB NPR PDA PTL RTL UNO
+490D DSD
+
+# Press
+4A00 ALY AND BWX DMZ ELS EXP FWD FCT FOR HOW IDK IFF
+4A0C INS IOU OCC ORR PCE POB PPT PRP QRY SCD SRY SUG
+4A18 THK THN TRY UOM VSS WHT WHY XDO XOY YDO WRT
+
+# Provinces
+# Inland non-SC
+5000 BOH BUR GAL RUH SIL TYR UKR
+
+# Inland SC
+5107 BUD MOS MUN PAR SER VIE WAR
+
+# Sea non-SC
+520E ADR AEG BAL BAR BLA EAS ECH GOB GOL HEL ION IRI
+521A MAO NAO NTH NWG SKA TYS WES
+
+# Coastal non-SC
+5421 ALB APU ARM CLY FIN GAS LVN NAF PIC PIE PRU SYR
+542D TUS WAL YOR
+
+# Coastal SC
+5530 ANK BEL BER BRE CON DEN EDI GRE HOL KIE LON LVP
+553C MAR NAP NWY POR ROM RUM SEV SMY SWE TRI TUN VEN
+
+# Bicoastal SC
+5748 BUL SPA STP
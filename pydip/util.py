@@ -23,7 +23,7 @@ categories = {
     0x47: 'PHASE',
     0x48: 'COMMAND',
     0x49: 'PARAMETER',
-    0x5A: 'PRESS',
+    0x4A: 'PRESS',
     0x4B: 'TEXT',
     0x50: 'PROVINCE',
     0x58: 'RESERVED',
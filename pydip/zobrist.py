@@ -0,0 +1,132 @@
+'''
+Zobrist-style 64-bit keys for Gameboard positions and order sets.
+
+Every feature of a position (a unit, a supply center owner, the turn)
+has a fixed 64-bit key, and the hash of a position is the XOR of the
+keys of its features, so it can be updated one feature at a time.
+Order sets are hashed the same way with addition in place of XOR.
+Keys are derived from DAIDE token values with splitmix64 rather than
+Python's hash(), so they are the same in every process and can be used
+as shared cache keys.
+'''
+from language import *
+
+MASK = 0xFFFFFFFFFFFFFFFF
+
+UNIT = 1
+CENTER = 2
+TURN = 3
+ORDER = 4
+
+
+def mix(x):
+    '''
+    splitmix64 finalizer.
+    '''
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def key(*values):
+    '''
+    Returns the key for a feature given as a tag followed by
+    integer values (token values, years, ...).
+
+    >>> hex(key(UNIT, 0x4101, 0x4201, 0x553A, 0))
+    '0xbe94354934a13d8d'
+    >>> key(UNIT, 1, 2) == key(UNIT, 2, 1)
+    False
+    '''
+    h = 0
+    for value in values:
+        h = mix(h ^ value)
+    return h
+
+
+# Unit and center keys are looked up far more often than they are
+# computed, and a map has only a few thousand of them, so they are kept
+_unit_keys = {}
+_center_keys = {}
+
+
+def unit_key(unit):
+    try:
+        return _unit_keys[unit.key]
+    except KeyError:
+        coast = int(unit.coast) if unit.coast is not None else 0
+        k = _unit_keys[unit.key] = key(UNIT, int(unit.power), int(unit.unit_type), int(unit.province), coast)
+        return k
+
+
+def center_key(power, center):
+    try:
+        return _center_keys[power, center]
+    except KeyError:
+        k = _center_keys[power, center] = key(CENTER, int(power), int(center))
+        return k
+
+
+def turn_key(turn):
+    if turn is None:
+        return 0
+    season, year = turn
+    return key(TURN, int(season), year)
+
+
+def _flatten(value, out):
+    if isinstance(value, tuple):
+        out.append(0x4000)
+        for item in value:
+            _flatten(item, out)
+        out.append(0x4001)
+    elif isinstance(value, Token):
+        out.append(int(value))
+    else:
+        out.append(value)
+
+
+def order_key(order):
+    '''
+    Key of a single order, from its order.key tuple. Bracket values
+    are mixed in so that differently nested keys do not collide.
+    '''
+    values = [ORDER]
+    _flatten(order.key, values)
+    return key(*values)
+
+
+def position_hash(units, supply_centers, turn):
+    '''
+    Hashes a whole position from scratch. Gameboard keeps the same
+    value up to date incrementally; this is the reference.
+    - units             iterable of Units
+    - supply_centers    mapping of power to list of centers
+    - turn              (season, year) or None
+
+    >>> from gameboard import Unit
+    >>> units = [Unit(ENG, FLT, LON), Unit(FRA, FLT, (SPA, NCS))]
+    >>> position_hash(units, {ENG: [LON]}, (SPR, 1901)) == position_hash(units[::-1], {ENG: [LON]}, (SPR, 1901))
+    True
+    >>> position_hash(units, {ENG: [LON]}, (SPR, 1901)) == position_hash(units, {FRA: [LON]}, (SPR, 1901))
+    False
+    '''
+    h = turn_key(turn)
+    for unit in units:
+        h ^= unit_key(unit)
+    for power, centers in supply_centers.items():
+        for center in centers:
+            h ^= center_key(power, center)
+    return h
+
+
+def orders_hash(orders):
+    '''
+    Order sets are hashed by summing rather than XORing keys, since
+    they may hold the same order twice (e.g. two WaiveOrders).
+    '''
+    h = 0
+    for order in orders:
+        h = (h + order_key(order)) & MASK
+    return h
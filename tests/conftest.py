@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'pydip'))
+sys.path.insert(0, os.path.join(root, 'benchmarks'))
+
+import fixtures
+
+
+@pytest.fixture
+def board():
+    '''
+    Builds Gameboards of the standard map: board(power=ENG,
+    now=NOW_SPR, sco=SCO), see fixtures.board.
+    '''
+    return fixtures.board
@@ -0,0 +1,31 @@
+import json
+
+import suite
+
+
+def test_every_case_runs():
+    suite.reference()()
+    for name, setup in suite.CASES:
+        op = setup()
+        op()
+
+
+def test_baseline_covers_every_case():
+    with open(suite.BASELINE) as f:
+        results = json.load(f)['results']
+    assert set(results) == set(name for name, setup in suite.CASES)
+    assert all('relative' in result for result in results.values())
+
+
+def test_compare_flags_regressions():
+    baseline = {'case': {'ops': 1000.0, 'relative': 0.5, 'alloc': 4096}}
+    assert suite.compare('case', {'ops': 900.0, 'relative': 0.45, 'alloc': 4096}, baseline, 0.25, 0.25) == []
+    assert len(suite.compare('case', {'ops': 1000.0, 'relative': 0.25, 'alloc': 4096}, baseline, 0.25, 0.25)) == 1
+    assert len(suite.compare('case', {'ops': 1000.0, 'relative': 0.5, 'alloc': 8192}, baseline, 0.25, 0.25)) == 1
+    assert suite.compare('new case', {'ops': 1.0, 'relative': 0.1, 'alloc': 1}, baseline, 0.25, 0.25) == []
+
+
+def test_slower_machine_is_not_a_regression():
+    # Half the ops/s of the baseline, but so was the reference
+    baseline = {'case': {'ops': 1000.0, 'relative': 0.5, 'alloc': 4096}}
+    assert suite.compare('case', {'ops': 500.0, 'relative': 0.5, 'alloc': 4096}, baseline, 0.25, 0.25) == []
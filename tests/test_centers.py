@@ -0,0 +1,44 @@
+import fixtures
+import notation
+import zobrist
+from gameboard import CenterChange
+from language import *
+
+# 1901: Turkey takes BUL, Germany takes BEL from France
+SCO_1901 = ('SCO ( AUS BUD GRE TRI VIE ) ( ENG EDI LON LVP NWY ) ( FRA BRE MAR PAR POR SPA )'
+            ' ( GER BEL BER DEN HOL KIE MUN ) ( ITA NAP ROM TUN VEN ) ( RUS MOS RUM SEV STP SWE WAR )'
+            ' ( TUR ANK BUL CON SER SMY )')
+
+
+def test_changes_are_applied_as_a_diff(board):
+    gameboard = board(FRA, fixtures.NOW_WIN)
+    events = []
+    gameboard.sco_listeners.append(lambda b, changes: events.append(changes))
+    changes = gameboard.process_SCO(notation.parse_packed(SCO_1901))
+    assert sorted(map(str, changes)) == ['BEL: FRA->GER', 'BUL: UNO->TUR']
+    assert events == [changes]
+    assert gameboard.get_center_owner(BEL) is GER
+    assert gameboard.get_center_owner(BOH) is None
+    assert gameboard.center_counts[FRA] == 5 and gameboard.center_counts[UNO] == 0
+    assert BEL not in gameboard.get_supply_centers(FRA)
+    assert gameboard.process_SCO(notation.parse_packed(SCO_1901)) == []
+
+
+def test_hash_matches_full_recompute(board):
+    gameboard = board(FRA, fixtures.NOW_WIN)
+    gameboard.process_SCO(notation.parse_packed(SCO_1901))
+    units = [unit for units in gameboard.units.values() for unit in units]
+    assert gameboard.position_hash == zobrist.position_hash(units, gameboard.supply_centers, gameboard.turn)
+
+
+def test_history(board):
+    gameboard = board(FRA, fixtures.NOW_WIN)
+    gameboard.process_SCO(notation.parse_packed(SCO_1901))
+    assert gameboard.get_center_history(BEL) == [(None, FRA), (1901, GER)]
+    assert len(gameboard.center_history[0][1]) == 34
+
+
+def test_open_home_centers(board):
+    gameboard = board(FRA, fixtures.NOW_WIN)
+    assert sorted(gameboard.open_home_centers(), key=str) == [BRE, MAR, PAR]
+    assert CenterChange(BEL, UNO, FRA).new is FRA
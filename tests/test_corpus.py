@@ -0,0 +1,65 @@
+import pytest
+
+import corpus
+import decoders
+import notation
+from gameboard import Gameboard
+from language import *
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return corpus.Generator(seed=7)
+
+
+@pytest.fixture(scope='module')
+def board_map(generator):
+    return generator.map()
+
+
+def test_round_trip(generator, board_map):
+    for kind, msg in generator.corpus(board_map, 500):
+        data = msg.pack()
+        translated = Message.translate_from_bytes(data)
+        assert translated == msg
+        assert translated.pack() == data
+        assert translated.fold() == msg.fold()
+        assert notation.parse_packed(str(msg)) == data
+        decoded = decoders.decode(data)
+        assert (decoded is None) == (decoders.command(data) not in decoders.decoders)
+
+
+def test_synthetic_map_loads(generator):
+    for provinces in (10, 40, None):
+        board_map = generator.map(provinces)
+        board = Gameboard(None, generator.mdf(board_map).pack())
+        assert set(board.adjacencies) == set(board_map.provinces)
+        board.process_SCO(generator.sco(board_map).pack())
+        board.process_NOW(generator.now(board_map).pack())
+        units = sum(len(units) for units in board.units.values())
+        assert units == len(board_map.provinces)
+
+
+@pytest.mark.parametrize('kind', corpus.MALFORMED)
+def test_malformed_input_raises_value_error(generator, board_map, kind):
+    brackets = kind in ('drop_bra', 'drop_ket', 'swap_brackets')
+    for message_kind, msg in generator.corpus(board_map, 300):
+        data = generator.malformed(msg.pack(), kind)
+        try:
+            translated = Message.translate_from_bytes(data)
+        except ValueError:
+            assert kind in ('odd_length', 'unknown_token')
+            translated = None
+        if translated is not None:
+            if brackets:
+                with pytest.raises(ValueError):
+                    translated.fold()
+            else:
+                try:
+                    translated.fold()
+                except ValueError:
+                    pass
+        try:
+            decoders.decode(data)
+        except ValueError:
+            pass
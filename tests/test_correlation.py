@@ -0,0 +1,110 @@
+import concurrent.futures
+
+import pytest
+
+import correlation
+import fixtures
+from gameboard import *
+from HoldBot import HoldBot
+from language import *
+
+
+class Bot(HoldBot):
+    def __init__(self):
+        HoldBot.__init__(self)
+        self.verbose = False
+        self.sent = []
+        self.handled = []
+
+    def write(self, message, msg_type):
+        self.sent.append(Message.translate_from_bytes(message))
+
+    def handle_YES_NME(self, msg):
+        self.handled.append(msg)
+
+
+def bot():
+    b = Bot()
+    b.power = ENG
+    b.map = fixtures.board(ENG, now=None)
+    return b
+
+
+def reply(b, text, raw=False):
+    if raw:
+        b.handle_diplomacy_message(fixtures.packed(text))
+    else:
+        b.handle_diplomacy_message(fixtures.message(text))
+
+
+def test_replies_resolve_their_requests_in_any_order():
+    b = bot()
+    name = b.send_NME()
+    sco = b.request(+SCO)
+    orders = b.request(fixtures.message('SUB ( ( ENG FLT LON ) HLD ) ( ( ENG AMY LVP ) HLD )'))
+    press = b.request(fixtures.message('SND ( FRA ) ( PRP ( PCE ( ENG FRA ) ) )'))
+    assert len(b.sent) == 4 and len(b.requests) == 4
+
+    reply(b, 'THX ( ( ENG AMY LVP ) HLD ) ( MBV )')
+    reply(b, 'REJ ( SND ( FRA ) ( PRP ( PCE ( ENG FRA ) ) ) )')
+    reply(b, fixtures.SCO, raw=True)
+    assert not orders.done()
+    reply(b, 'THX ( ( ENG FLT LON ) HLD ) ( NSU )')
+    b.handle_diplomacy_message(YES(NME(b.name)(b.version)))
+
+    assert press.result(0).command is REJ
+    assert sco.result(0) == (SCO, fixtures.packed(fixtures.SCO))
+    assert orders.result(0) == (THX, [(((ENG, AMY, LVP), HLD), MBV), (((ENG, FLT, LON), HLD), NSU)])
+    assert name.result(0).command is YES
+    # The handlers see the replies as before
+    assert len(b.handled) == 1
+    assert len(b.requests) == 0
+
+
+def test_same_request_answered_in_order():
+    pending = correlation.PendingRequests()
+    first = pending.add(+NOW)
+    second = pending.add(+NOW)
+    assert pending.handle(fixtures.packed(fixtures.NOW_SPR))
+    assert first.done() and not second.done()
+    assert pending.handle(fixtures.message('REJ ( NOW )'))
+    assert second.result(0).command is REJ
+    assert not pending.handle(fixtures.message('YES ( NOW )'))
+
+
+def test_huh_fails_the_request():
+    pending = correlation.PendingRequests()
+    future = pending.add(fixtures.message('SUB ( ( ENG FLT LON ) MTO NTH )'))
+    assert pending.handle(fixtures.message('HUH ( SUB ( ( ENG FLT LON ) ERR MTO NTH ) )'))
+    with pytest.raises(correlation.RequestError) as e:
+        future.result(0)
+    assert e.value.reply[0] is HUH
+    assert pending.stats['errors'] == 1
+
+
+def test_timeout():
+    pending = correlation.PendingRequests()
+    slow = pending.add(+MAP, timeout=0.05)
+    answered = pending.add(+HLO, timeout=0.05)
+    called = []
+    waiting = pending.add(+SCO, callback=called.append)
+    pending.handle(fixtures.packed(fixtures.HLO))
+    with pytest.raises(concurrent.futures.TimeoutError):
+        slow.result(2)
+    assert answered.result(0).command is HLO
+    assert not waiting.done() and len(pending) == 1
+    assert pending.stats['timeouts'] == 1
+    pending.abandon()
+    assert waiting.cancelled() and called == [waiting]
+
+
+def test_new_phase_abandons_unacknowledged_orders():
+    b = bot()
+    tme = b.send_TME()
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    spring = b.requests.pending[-1].future
+    assert not spring.done()
+    b.handle_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert spring.cancelled()
+    assert not tme.done()
+    assert len(b.requests) == 2
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import fixtures
+import util
+from channel import MessageQueue
+from gameboard import *
+from HoldBot import HoldBot
+from language import *
+
+
+class Bot(HoldBot):
+    '''
+    Holds, then moves LON to NTH. With refine, it keeps "refining" until
+    told to stop; with overrun, it ignores should_stop for that many
+    seconds before moving.
+    '''
+    def __init__(self, overrun=None, refine=False):
+        HoldBot.__init__(self)
+        self.verbose = False
+        self.sync_deadlines = False
+        self.overrun = overrun
+        self.refine = refine
+        self.budgets = []
+        self.sent = []
+        self.finished_late = threading.Event()
+
+    def write(self, message, msg_type):
+        self.sent.append(Message.translate_from_bytes(message))
+
+    def generate_orders(self, board, budget=None):
+        self.budgets.append(budget)
+        HoldBot.generate_orders(self, board, budget)
+        if self.overrun is not None:
+            self.should_stop(board)
+            time.sleep(self.overrun)
+            board.add(MoveOrder(board.get_unit_of_province(LON), NTH))
+            self.finished_late.set()
+            return
+        board.add(MoveOrder(board.get_unit_of_province(LON), NTH))
+        while self.refine and not self.should_stop(board):
+            time.sleep(0.005)
+
+
+class LegacyBot(HoldBot):
+    def __init__(self):
+        HoldBot.__init__(self)
+        self.verbose = False
+        self.sent = []
+
+    def write(self, message, msg_type):
+        self.sent.append(Message.translate_from_bytes(message))
+
+    def generate_orders(self):
+        HoldBot.generate_orders(self, self.map)
+
+
+def start(b, limit=None, margin=2.0):
+    b.power = ENG
+    b.map = fixtures.board(ENG, now=None)
+    if limit is not None:
+        b.variant_options = {MTL: limit}
+    b.deadline_margin = margin
+    return b
+
+
+def submitted(b):
+    return [str(msg) for msg in b.sent if msg[0] is SUB]
+
+
+def test_budget_is_time_left_less_margin():
+    b = start(Bot(), limit=3, margin=2.8)
+    b.last_recv_time = time.monotonic()
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert 0.1 < b.budgets[0] <= 0.2
+    assert b.overruns == 0
+    assert submitted(b) == ['SUB ( ( ENG FLT EDI ) HLD ) ( ( ENG AMY LVP ) HLD ) ( ( ENG FLT LON ) MTO NTH ) ']
+
+
+def test_no_deadline_runs_to_completion():
+    b = start(Bot(overrun=0.05))
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert b.budgets == [None]
+    assert 'MTO NTH' in submitted(b)[0]
+
+
+def test_overrun_submits_last_checkpoint_and_abandons_the_thread():
+    b = start(Bot(overrun=0.5), limit=3, margin=2.9)
+    b.last_recv_time = time.monotonic()
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert b.overruns == 1
+    # The holds checkpointed before the overrun, not the late move
+    assert submitted(b) == ['SUB ( ( ENG FLT EDI ) HLD ) ( ( ENG FLT LON ) HLD ) ( ( ENG AMY LVP ) HLD ) ']
+    assert b.generation_thread.is_alive()
+    assert b.finished_late.wait(2)
+    b.generation_thread.join(2)
+    # What the abandoned thread added stayed on its fork
+    assert all(order.key != ((ENG, FLT, LON), MTO, NTH) for order in b.map.orders[b.map.turn])
+    assert b.checkpoint is None
+
+
+def test_abandoned_board_should_stop():
+    b = start(Bot())
+    board = b.map.fork()
+    assert b.should_stop(board)
+
+
+def test_tme_during_generation_moves_the_deadline():
+    b = start(Bot(refine=True), limit=60, margin=0.8)
+    b.connected = True
+    b.inbound = MessageQueue()
+    b.last_recv_time = time.monotonic()
+    # The server's answer to the TME sent at the start of the phase,
+    # behind a press message that must wait for the main loop
+    press = FRM(FRA, 1)(ENG)(PRP(PCE(ENG, FRA))).pack()
+    b.inbound.put((time.monotonic(), (util.DM, len(press), press)))
+    tme = TME(1).pack()
+    b.inbound.put((time.monotonic(), (util.DM, len(tme), tme)))
+    started = time.monotonic()
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert time.monotonic() - started < 5
+    assert b.budgets[0] > 50
+    assert len(b.deferred) == 1
+    assert b.readable()
+    assert b.next_message()[2] == press
+    assert not b.readable()
+
+
+def test_legacy_generate_orders_still_works():
+    b = start(LegacyBot(), limit=60)
+    b.pondering = True
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert submitted(b) == ['SUB ( ( ENG FLT EDI ) HLD ) ( ( ENG FLT LON ) HLD ) ( ( ENG AMY LVP ) HLD ) ']
+    assert b.ponder_queue == []
@@ -0,0 +1,100 @@
+import doctest
+
+import pytest
+
+import decoders
+import fixtures
+from decoders import decode, decode_MDF, decode_HLO, decode_NOW, decode_SCO, decode_ORD
+from language import *
+
+
+NOWS = [fixtures.NOW_SPR, fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN]
+
+
+def freeze(value):
+    '''
+    Folded lists -> tuples, the layout the decoders return.
+    '''
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def test_doctests():
+    assert doctest.testmod(decoders).failed == 0
+
+
+@pytest.mark.parametrize('text', NOWS)
+def test_NOW_matches_fold(text):
+    folded = fixtures.message(text).fold()
+    now = decode_NOW(fixtures.packed(text))
+    assert now.turn == tuple(folded[1])
+    assert len(now.units) == len(folded) - 2
+    for unit, position in zip(now.units, folded[2:]):
+        assert (unit.power, unit.unit_type) == tuple(position[:2])
+        if isinstance(position[2], list):
+            assert (unit.province, unit.coast) == tuple(position[2])
+        else:
+            assert (unit.province, unit.coast) == (position[2], None)
+        if MRT in position:
+            assert unit.retreats == list(freeze(position[position.index(MRT) + 1]))
+        else:
+            assert unit.retreats is None
+
+
+def test_NOW_bicoastal_and_retreats():
+    now = decode_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert (RUS, FLT, STP, SCS, None) in now.units
+    now = decode_NOW(fixtures.packed(fixtures.NOW_AUT))
+    assert (TUR, AMY, BUL, None, [CON, GRE]) in now.units
+    assert (AUS, FLT, ALB, None, [ADR, TRI]) in now.units
+    now = decode_NOW(fixtures.packed("NOW ( SUM 1901 ) ( FRA FLT MAO MRT ( ( SPA NCS ) POR ) )"))
+    assert now.units[0].retreats == [(SPA, NCS), POR]
+
+
+def test_SCO_matches_fold():
+    folded = fixtures.message(fixtures.SCO).fold()
+    owners = decode_SCO(fixtures.packed(fixtures.SCO))
+    assert owners == {position[0]: position[1:] for position in folded[1:]}
+
+
+@pytest.mark.parametrize('text', fixtures.ORD)
+def test_ORD_matches_fold(text):
+    folded = fixtures.message(text).fold()
+    result = decode_ORD(fixtures.packed(text))
+    assert result.turn == tuple(folded[1])
+    assert result.order == freeze(folded[2])
+    assert result.result == tuple(folded[3])
+
+
+def test_HLO():
+    hello = decode_HLO(fixtures.packed(fixtures.HLO))
+    assert hello.power is ENG
+    assert hello.passcode == 1234
+    assert hello.variant == {LVL: 0, MTL: 60, RTL: 30, BTL: 30, AOA: True}
+
+
+def test_MDF_matches_fold():
+    folded = fixtures.message(fixtures.STANDARD_MDF).fold()
+    mdf = decode_MDF(fixtures.packed(fixtures.STANDARD_MDF))
+    assert mdf.powers == folded[1]
+    assert mdf.home_centers == {centers[0]: centers[1:] for centers in folded[2][0]}
+    assert mdf.non_home_centers == folded[2][1]
+    assert len(mdf.adjacencies) == 75
+    for prov_adj in folded[3]:
+        adjs = mdf.adjacencies[prov_adj[0]]
+        assert adjs == {freeze(adj[0]): list(freeze(adj[1:])) for adj in prov_adj[1:]}
+    assert mdf.adjacencies[STP][(FLT, NCS)] == [BAR, NWY]
+    assert mdf.adjacencies[MAO][FLT][5:8] == [(SPA, NCS), POR, (SPA, SCS)]
+
+
+@pytest.mark.parametrize('text', NOWS + fixtures.ORD + [fixtures.SCO, fixtures.HLO, fixtures.STANDARD_MDF])
+def test_bytes_and_message_agree(text):
+    assert decode(fixtures.packed(text)) == decode(fixtures.message(text))
+
+
+def test_malformed():
+    with pytest.raises(ValueError):
+        decode_NOW(fixtures.packed("NOW ( SPR 1901 ) ( ENG FLT LON"))
+    with pytest.raises(ValueError):
+        decode_SCO(fixtures.packed("NOW ( SPR 1901 )"))
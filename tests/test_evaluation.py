@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+import evaluation
+import features
+import fixtures
+from BaseClient import BaseClient
+from language import *
+
+
+def test_batches_requests_from_many_threads():
+    calls = []
+
+    def square(items):
+        calls.append(len(items))
+        return [item * item for item in items]
+
+    queue = evaluation.EvaluationQueue(square, max_batch=8, max_delay=0.05)
+    results = {}
+    start = threading.Barrier(16)
+
+    def bot(i):
+        start.wait()
+        results[i] = queue.evaluate(i, timeout=5)
+
+    threads = [threading.Thread(target=bot, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.close()
+
+    assert results == {i: i * i for i in range(16)}
+    assert max(calls) <= 8
+    stats = queue.stats()
+    assert stats['items'] == 16
+    assert stats['batches'] == len(calls) < 16
+    assert sum(int(size) * count for size, count in stats['batch_sizes'].items()) == 16
+    assert stats['queue_latency']['count'] == 16
+
+
+def test_partial_batch_waits_at_most_max_delay():
+    queue = evaluation.EvaluationQueue(lambda items: [len(items)] * len(items), max_batch=100, max_delay=0.01)
+    assert queue.evaluate_many(['a', 'b', 'c'], timeout=5) == [3, 3, 3]
+    queue.close()
+    assert queue.stats()['batch_sizes'] == {'3': 1}
+    assert queue.stats()['full_batches'] == 0
+
+
+def test_evaluator_errors_reach_every_caller():
+    def broken(items):
+        raise KeyError('no model')
+
+    queue = evaluation.EvaluationQueue(broken, max_delay=0.001)
+    futures = [queue.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(KeyError):
+            future.result(5)
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.submit(0)
+
+
+def test_clients_share_a_queue_and_linear_model(board):
+    spring = board(None)
+    layout = features.Layout(spring)
+    size = len(layout.provinces) * len(layout.channels)
+    weights = {}
+    for power in (ENG, RUS):
+        # One point per supply centre owned
+        w = [0.0] * size
+        column = layout.center_owner[power]
+        for province in range(len(layout.provinces)):
+            w[province * len(layout.channels) + column] = 1.0
+        weights[power] = w
+    model = evaluation.LinearModel(layout, weights)
+
+    clients = [BaseClient(), BaseClient()]
+    for client in clients:
+        client.enable_evaluation(model, max_batch=4, max_delay=0.01)
+    assert clients[0].evaluator is clients[1].evaluator
+    assert clients[0].evaluate([spring, board(None, fixtures.NOW_FAL)]) == [{ENG: 4.0, RUS: 6.0}] * 2
+    clients[0].evaluator.close()
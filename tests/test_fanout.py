@@ -0,0 +1,99 @@
+import os
+import socket
+import struct
+import tempfile
+import time
+
+import fixtures
+from fanout import FanOut
+from Observer import Observer
+from language import *
+
+
+def connect(path):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    conn.settimeout(5)
+    return conn
+
+
+def read_message(conn):
+    header = conn.recv(4, socket.MSG_WAITALL)
+    if len(header) < 4:
+        return None
+    msg_type, length = struct.unpack('!bxh', header)
+    return Message.translate_from_bytes(conn.recv(length, socket.MSG_WAITALL))
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def fanout(**options):
+    return FanOut(os.path.join(tempfile.mkdtemp(), 'fanout.sock'), **options)
+
+
+def test_snapshot_then_deltas():
+    server = fanout()
+    server.publish(fixtures.packed(fixtures.STANDARD_MDF))
+    server.publish(fixtures.packed(fixtures.SCO))
+    server.publish(fixtures.packed(fixtures.NOW_SPR))
+    for text in fixtures.ORD[:2]:
+        server.publish(fixtures.packed(text))
+
+    conn = connect(server.path)
+    assert [read_message(conn)[0] for i in range(5)] == [MDF, SCO, NOW, ORD, ORD]
+    assert wait_for(lambda: len(server.subscribers) == 1)
+    server.publish(fixtures.packed(fixtures.NOW_FAL))
+    assert read_message(conn) == fixtures.message(fixtures.NOW_FAL)
+    server.publish((+OFF).pack())
+    server.close()
+    assert read_message(conn) == +OFF
+    assert read_message(conn) is None
+
+
+def test_slow_subscriber_is_dropped():
+    server = fanout(max_buffer=4096)
+    slow = connect(server.path)
+    fast = connect(server.path)
+    assert wait_for(lambda: len(server.subscribers) == 2)
+    data = fixtures.packed(fixtures.NOW_SPR)
+    received = 0
+    start = time.monotonic()
+    for i in range(2000):
+        server.publish(data)
+        read_message(fast)
+        received += 1
+    assert time.monotonic() - start < 5
+    assert server.dropped == 1
+    assert len(server.subscribers) == 1
+    assert received == 2000
+    server.close()
+
+
+def test_observer_republishes():
+    observer = Observer()
+    observer.verbose = False
+    observer.fanout = fanout()
+    observer.sent = []
+    observer.write = lambda message, msg_type: observer.sent.append(message)
+    for text in (fixtures.STANDARD_MDF, fixtures.SCO, fixtures.NOW_SPR):
+        observer.handle_diplomacy_message(fixtures.packed(text))
+    assert observer.map.turn == (SPR, 1901)
+    assert observer.fanout.published == 3
+    observer.fanout.close()
+
+
+def test_observer_keeps_the_position_until_the_map():
+    observer = Observer()
+    observer.verbose = False
+    observer.write = lambda message, msg_type: None
+    for text in (fixtures.SCO, fixtures.NOW_SPR, fixtures.NOW_FAL):
+        observer.handle_diplomacy_message(fixtures.packed(text))
+    assert observer.map is None
+    observer.handle_diplomacy_message(fixtures.packed(fixtures.STANDARD_MDF))
+    assert observer.map.turn == (FAL, 1901)
+    assert observer.early_position == {}
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+import features
+import fixtures
+from language import *
+
+
+def game_log(path):
+    lines = [fixtures.STANDARD_MDF, fixtures.SCO, fixtures.NOW_SPR] + fixtures.ORD + \
+        [fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN]
+    with open(path, 'w') as f:
+        for line in lines:
+            f.write(' '.join(line.split()) + '\n')
+    return path
+
+
+def plane(values, shape, position, province):
+    n, provinces, width = shape
+    start = (position * provinces + province) * width
+    return values[start:start + width]
+
+
+def test_export_game_features_and_labels(tmp_path):
+    messages = [fixtures.packed(text) for text in
+                [fixtures.STANDARD_MDF, fixtures.SCO, fixtures.NOW_SPR] + fixtures.ORD +
+                [fixtures.NOW_FAL, fixtures.NOW_AUT]]
+    layout, chunks = features.export_game(messages, str(tmp_path), 'game', chunk_size=2)
+    assert [chunk['positions'] for chunk in chunks] == [2, 1]
+
+    base = os.path.join(str(tmp_path), 'game-0000')
+    shape, values = features.read_npy(base + '.features.npy')
+    assert shape == (2, len(layout.provinces), len(layout.channels))
+    channels = layout.channels
+    stp = plane(values, shape, 0, layout.province_index[STP])
+    assert [channels[i] for i, v in enumerate(stp) if v] == ['unit_RUS', 'unit_FLT', 'coast_SCS', 'sc_RUS']
+    bul = plane(values, shape, 0, layout.province_index[BUL])
+    assert [channels[i] for i, v in enumerate(bul) if v] == ['sc_UNO']
+
+    shape, labels = features.read_npy(base + '.labels.npy')
+    assert shape == (2, len(layout.provinces), len(features.LABELS))
+    par = plane(labels, shape, 0, layout.province_index[PAR])
+    assert list(par) == [features.ORDER_TYPES.index(MTO) + 1, layout.province_index[BUR] + 1,
+                         features.RESULTS.index(SUC) + 1, 0]
+    bud = plane(labels, shape, 0, layout.province_index[BUD])
+    assert list(bud) == [features.ORDER_TYPES.index(SUP) + 1, layout.province_index[GAL] + 1,
+                         features.RESULTS.index(CUT) + 1, 0]
+    tri = plane(labels, shape, 0, layout.province_index[TRI])
+    assert tri[2:] == features.array.array('H', [features.RESULTS.index(BNC) + 1, 1])
+    # No ORDs were logged for the autumn
+    assert not any(labels[shape[1] * shape[2]:])
+
+    shape, turns = features.read_npy(base + '.turns.npy')
+    assert list(turns) == [SPR._hex, 1901, FAL._hex, 1901]
+
+    # AUS FLT ALB was dislodged by ITA FLT ALB
+    shape, values = features.read_npy(os.path.join(str(tmp_path), 'game-0001.features.npy'))
+    alb = plane(values, shape, 0, layout.province_index[ALB])
+    assert [channels[i] for i, v in enumerate(alb) if v] == \
+        ['unit_ITA', 'unit_FLT', 'dislodged_AUS', 'dislodged_FLT']
+
+
+def test_npy_header_is_aligned(tmp_path):
+    path = str(tmp_path / 'a.npy')
+    features.write_npy(path, features.array.array('H', range(6)), '<u2', (2, 3))
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert (len(data) - 12) % 64 == 0
+    assert features.read_npy(path) == ((2, 3), features.array.array('H', range(6)))
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_export_writes_manifest(tmp_path, workers):
+    logs = [game_log(str(tmp_path / ('game%d.log' % i))) for i in range(3)]
+    out = str(tmp_path / 'out')
+    manifest = features.export(logs, out, workers=workers, chunk_size=3)
+    assert len(manifest['maps']) == 1
+    layout = next(iter(manifest['maps'].values()))
+    assert len(layout['provinces']) == 75
+    assert [game['path'] for game in manifest['games']] == logs
+    assert [[chunk['positions'] for chunk in game['chunks']] for game in manifest['games']] == [[3, 1]] * 3
+    with open(os.path.join(out, 'manifest.json')) as f:
+        assert json.load(f) == manifest
+    assert os.path.exists(os.path.join(out, manifest['games'][2]['chunks'][1]['name'] + '.labels.npy'))
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fixtures
+import language
+from language import *
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def test_token_tables_up_to_date():
+    subprocess.check_call([sys.executable, os.path.join(ROOT, 'tools', 'gen_token_tables.py'), '--check'])
+
+
+def test_names_bound_from_tables():
+    assert NOW._hex == 0x480E and NOW.tla == 'NOW'
+    assert STP._hex == 0x574A
+    assert VTA is VIA
+    assert len(language.representation) == 215
+    for token in language.representation:
+        assert getattr(language, token.tla) is token
+
+
+def test_lookups():
+    assert language.tokens_by_tla['ENG'] is ENG
+    assert language.tokens_by_value[0x4101] is ENG
+    assert Token.from_value(0x4101) is ENG
+    assert Token.from_value(12)._hex == 12
+    assert Token.from_value(0x4B41).tla == 'A'
+
+
+def test_categories():
+    assert ENG.category() == 'POWER'
+    assert PRP.category() == 'PRESS'
+    assert STP.category() == 'PROVINCE'
+    assert Token.integer(5).category() == 'INTEGER'
+    assert str(fixtures.message("FRM ( FRA 1 ) ( ENG ) ( PRP ( PCE ( ENG FRA ) ) )")).strip() == \
+        "FRM ( FRA 1 ) ( ENG ) ( PRP ( PCE ( ENG FRA ) ) )"
+
+
+def test_translate_from_bytes_round_trip():
+    for text in (fixtures.STANDARD_MDF, fixtures.NOW_AUT, fixtures.HLO):
+        msg = fixtures.message(text)
+        translated = Message.translate_from_bytes(msg.pack())
+        assert translated.pack() == msg.pack()
+        assert [token for token in translated if token._hex >= 0x4000 and token._hex >> 8 != 0x4B] == \
+            [token for token in msg if token._hex >= 0x4000 and token._hex >> 8 != 0x4B]
+
+
+def test_unknown_token_raises_value_error():
+    data = NOW._hex.to_bytes(2, 'big') + (0x4A7F).to_bytes(2, 'big')
+    with pytest.raises(ValueError, match='0x4A7F'):
+        Message.translate_from_bytes(data)
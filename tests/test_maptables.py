@@ -0,0 +1,91 @@
+import os
+
+import features
+import fixtures
+import maptables
+from gameboard import Gameboard, Unit
+from language import *
+from memo import STATIC
+
+
+def boards(tmp_path):
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    return Gameboard(ENG, data), Gameboard(ENG, data, maptables.attach(data, str(tmp_path)))
+
+
+def test_views_match_decoded_map(tmp_path):
+    private, shared = boards(tmp_path)
+    assert shared.powers == private.powers
+    assert set(shared.adjacencies) == set(private.adjacencies)
+    for province, adjs in private.adjacencies.items():
+        assert {unit_type: list(row) for unit_type, row in shared.adjacencies[province].items()} == adjs
+    assert dict(shared.coasts) == private.coasts
+    assert set(shared.home_centers) == set(private.home_centers)
+    for power, homes in private.home_centers.items():
+        assert sorted(shared.home_centers[power], key=lambda p: p._hex) == sorted(homes, key=lambda p: p._hex)
+
+
+def test_attach_reuses_file(tmp_path):
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    first = maptables.attach(data, str(tmp_path))
+    second = maptables.attach(data, str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    assert second is first
+    assert bytes(first.buffer) == maptables.build_tables(data)
+    assert first.is_center(MUN) and not first.is_center(BOH)
+
+
+def test_shared_board_plays(tmp_path):
+    private, shared = boards(tmp_path)
+    for board in (private, shared):
+        board.process_SCO(fixtures.packed(fixtures.SCO))
+        board.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert shared.position_hash == private.position_hash
+    for unit in private.get_own_units():
+        assert shared.get_moveable_adjacencies(unit) == private.get_moveable_adjacencies(unit)
+        assert shared.get_adjacent_provinces(unit.province, unit.coast) == \
+            private.get_adjacent_provinces(unit.province, unit.coast)
+    assert shared.open_home_centers() == private.open_home_centers()
+    assert STATIC not in shared.caches and STATIC in private.caches
+    assert shared.map_id == private.map_id == shared.tables.map_id
+
+
+def test_views_are_cached_and_immutable(tmp_path):
+    private, shared = boards(tmp_path)
+    row = shared.adjacencies[STP][(FLT, NCS)]
+    assert row == (BAR, NWY)
+    assert shared.adjacencies[STP][(FLT, NCS)] is row
+    assert shared.adjacencies[STP] is shared.adjacencies[STP]
+    moves = shared.get_moveable_adjacencies(shared.intern(Unit(RUS, FLT, (STP, NCS))))
+    moves.append(MOS)
+    assert shared.adjacencies[STP][(FLT, NCS)] == (BAR, NWY)
+
+
+def test_threat_map_and_layout_read_the_tables(tmp_path):
+    private, shared = boards(tmp_path)
+    for board in (private, shared):
+        board.process_SCO(fixtures.packed(fixtures.SCO))
+        board.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    threats = shared.get_threat_map()
+    assert threats.location_index is shared.tables.locations
+    assert threats.matrix() == private.get_threat_map().matrix()
+    layout = features.Layout(shared)
+    assert layout.province_index is shared.tables.province_index
+    assert layout.describe() == features.Layout(private).describe()
+    assert layout.features(shared) == features.Layout(private).features(private)
+
+
+def test_prune_removes_unused_and_old_tables(tmp_path):
+    data = fixtures.packed(fixtures.STANDARD_MDF)
+    directory = str(tmp_path)
+    for name in ('map-0123456789abcdef0123-v1.tables', 'map-00000000000000000000-v%d.tables' % maptables.VERSION,
+                 'tmpabc', 'notes.txt'):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write('x')
+    old = os.path.join(directory, 'map-00000000000000000000-v%d.tables' % maptables.VERSION)
+    os.utime(old, (0, 0))
+    os.utime(os.path.join(directory, 'tmpabc'), (0, 0))
+    tables = maptables.attach(data, directory)
+    assert sorted(os.listdir(directory)) == sorted([os.path.basename(path) for path in maptables._attached
+                                                    if os.path.dirname(path) == directory] + ['notes.txt'])
+    assert tables.is_center(MUN)
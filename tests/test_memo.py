@@ -0,0 +1,75 @@
+import threading
+
+import fixtures
+from language import *
+from memo import QueryCache, STATIC, POSITION
+
+
+def test_hits_and_misses_are_counted(board):
+    gameboard = board()
+    first = gameboard.get_adjacent_provinces(LON, None)
+    first.append(PAR)
+    assert gameboard.get_adjacent_provinces(LON, None) == [WAL, YOR, ECH, NTH]
+    gameboard.get_adjacent_provinces(EDI, None)
+    assert gameboard.cache_stats()[STATIC]['get_adjacent_provinces'] == (1, 2)
+    gameboard.caches[STATIC].reset_stats()
+    assert gameboard.cache_stats()[STATIC] == {}
+
+
+def test_size_is_bounded(board):
+    gameboard = board()
+    gameboard.caches[STATIC] = QueryCache(maxsize=2)
+    for province in (LON, EDI, LVP):
+        gameboard.get_adjacent_provinces(province, None)
+    assert len(gameboard.caches[STATIC]) == 2
+    # LON was the least recently used, so it was dropped
+    gameboard.get_adjacent_provinces(LVP, None)
+    gameboard.get_adjacent_provinces(LON, None)
+    assert gameboard.cache_stats()[STATIC]['get_adjacent_provinces'] == (1, 4)
+
+
+def test_position_cache_is_dropped_on_now_and_sco(board):
+    gameboard = board()
+    gameboard.open_home_centers()
+    gameboard.get_adjacent_provinces(LON, None)
+    assert len(gameboard.caches[POSITION]) == 1
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert len(gameboard.caches[POSITION]) == 0
+    gameboard.open_home_centers()
+    gameboard.process_SCO(fixtures.packed(fixtures.SCO))
+    assert len(gameboard.caches[POSITION]) == 0
+    assert len(gameboard.caches[STATIC]) == 1
+
+
+def test_adjacent_provinces_on_a_coast(board):
+    gameboard = board()
+    # The army's neighbours and those of the fleet on the given coast
+    assert set(gameboard.get_adjacent_provinces(STP, NCS)) == {BAR, NWY, FIN, LVN, MOS}
+    # Without a coast, every neighbour by any route
+    assert set(gameboard.get_adjacent_provinces(STP, None)) == {BAR, NWY, FIN, LVN, MOS, GOB}
+
+
+def test_static_cache_shared_between_threads(board):
+    gameboard = board()
+    forks = [gameboard.fork() for _ in range(8)]
+    assert all(fork.caches[STATIC] is gameboard.caches[STATIC] for fork in forks)
+    provinces = list(gameboard.adjacencies)
+    errors = []
+
+    def search(fork):
+        try:
+            for _ in range(20):
+                for province in provinces:
+                    fork.get_adjacent_provinces(province, None)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search, args=(fork,)) for fork in forks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    hits, misses = gameboard.cache_stats()[STATIC]['get_adjacent_provinces']
+    assert hits + misses == 8 * 20 * len(provinces)
+    assert len(gameboard.caches[STATIC]) == len(provinces)
@@ -0,0 +1,66 @@
+import json
+import time
+
+import instrument
+import util
+from language import *
+
+
+def test_histogram():
+    hist = instrument.Histogram()
+    assert hist.percentile(0.5) is None
+    for micros in (3, 5, 5, 100, 2000):
+        hist.record(micros / 1e6)
+    snapshot = hist.snapshot()
+    assert snapshot['count'] == 5
+    assert snapshot['min'] == 3e-6 and snapshot['max'] == 2000e-6
+    assert snapshot['buckets_us'] == {'4': 1, '8': 2, '128': 1, '2048': 1}
+    assert snapshot['p50'] == 8e-6
+    assert snapshot['p99'] == 2048e-6
+
+
+def test_frame_kind():
+    assert instrument.frame_kind(util.DM, NOW(SPR, 1901).pack()) == 'NOW'
+    assert instrument.frame_kind(util.FM, b'') == 'FM'
+
+
+def test_snapshot_counts_frames_and_now_to_sub():
+    metrics = instrument.Metrics()
+    metrics.frame_in('NOW', 100)
+    metrics.frame_in('NOW', 120)
+    metrics.frame_out('SUB', 40)
+    metrics.frame_out('SUB', 40)
+    metrics.record('handle_NOW', 0.001)
+    snapshot = metrics.snapshot()
+    assert snapshot['frames_in'] == {'NOW': 2}
+    assert snapshot['bytes_in'] == {'NOW': 220}
+    assert snapshot['frames_out'] == {'SUB': 2}
+    # Only the first SUB after a NOW is timed
+    assert snapshot['histograms']['NOW->SUB']['count'] == 1
+    assert snapshot['histograms']['handle_NOW']['count'] == 1
+    json.dumps(snapshot)
+
+
+def test_periodic_dumps_on_a_quiet_connection(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    metrics = instrument.Metrics(str(path), dump_interval=0.02)
+    metrics.frame_in('HLO', 30)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if path.exists() and len(path.read_text().splitlines()) >= 2:
+            break
+        time.sleep(0.01)
+    metrics.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) >= 3
+    assert lines[-1]['frames_in'] == {'HLO': 1}
+    assert 'time' in lines[-1]
+    count = len(lines)
+    time.sleep(0.05)
+    assert len(path.read_text().splitlines()) == count
+
+
+def test_no_dump_path():
+    metrics = instrument.Metrics()
+    assert metrics.timer is None
+    metrics.close()
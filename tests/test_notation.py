@@ -0,0 +1,68 @@
+import doctest
+import io
+
+import pytest
+
+import fixtures
+import notation
+from language import *
+
+
+def all_fixtures():
+    texts = [fixtures.STANDARD_MDF, fixtures.HLO, fixtures.NOW_SPR, fixtures.NOW_FAL,
+             fixtures.NOW_AUT, fixtures.NOW_WIN, fixtures.SCO]
+    return texts + list(fixtures.ORD)
+
+
+def constructed():
+    return [
+        NME('HoldBot')('1.0'),
+        NME("it's a bot")('v2 (beta)'),
+        +OBS,
+        TME(60),
+        YES(MAP('STANDARD')),
+        HUH(Message(ERR) ++ NOW),
+        SND(Message(FRA))(Message(PRP)(Message(PCE)(Message(ENG, FRA)))),
+        Message(),
+    ]
+
+
+def test_doctests():
+    assert doctest.testmod(notation).failed == 0
+
+
+def test_round_trip_every_message():
+    for text in all_fixtures():
+        msg = notation.parse(text)
+        assert notation.parse(str(msg)) == msg
+    for msg in constructed():
+        assert notation.parse(str(msg)) == msg
+
+
+def test_packed_matches_message():
+    for text in all_fixtures():
+        assert notation.parse_packed(text) == notation.parse(text).pack()
+
+
+def test_tokens_are_shared():
+    msg = notation.parse("NOW ( SPR 1901 ) ( ENG FLT ( STP NCS ) )")
+    assert msg[0] is NOW and msg[2] is SPR and msg[10] is NCS
+    assert msg[3]._hex == 1901
+
+
+def test_streams_lines():
+    log = io.StringIO('\n'.join(fixtures.ORD) + '\n\n' + "TME ( 30 )\n")
+    messages = list(notation.iter_messages(log))
+    assert len(messages) == len(fixtures.ORD) + 1
+    assert messages[-1] == TME(30)
+    log.seek(0)
+    assert list(notation.iter_packed(log)) == [msg.pack() for msg in messages]
+
+
+def test_malformed_text():
+    with pytest.raises(ValueError):
+        notation.parse("NOW ( SPR 1901 ) ( ENG FLT XYZ )")
+    with pytest.raises(ValueError):
+        notation.parse("TME ( 99999 )")
+    with pytest.raises(ValueError):
+        notation.parse("NME ( 'unterminated )")
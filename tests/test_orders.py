@@ -0,0 +1,86 @@
+import copy
+import doctest
+
+import pytest
+
+import fixtures
+import gameboard
+from gameboard import Unit, HoldOrder, MoveOrder, MoveByConvoyOrder, WaiveOrder, BaseOrder
+from language import *
+
+
+def test_units_are_values():
+    assert Unit(ENG, FLT, (STP, NCS)) == Unit(ENG, FLT, (STP, NCS))
+    assert Unit(ENG, FLT, (STP, NCS)) != Unit(ENG, FLT, (STP, SCS))
+    assert {Unit(ENG, AMY, LON): 1}[Unit(ENG, AMY, LON)] == 1
+    assert copy.copy(Unit(ENG, AMY, LON)) == Unit(ENG, AMY, LON)
+
+
+def test_values_are_immutable():
+    unit = Unit(ENG, AMY, LON)
+    with pytest.raises(AttributeError):
+        unit.province = WAL
+    with pytest.raises(AttributeError):
+        HoldOrder(unit).result = None
+    assert not hasattr(unit, '__dict__')
+    assert not hasattr(HoldOrder(unit), '__dict__')
+
+
+def test_all_orders_share_base():
+    for name in dir(gameboard):
+        value = getattr(gameboard, name)
+        if isinstance(value, type) and name.endswith('Order'):
+            assert issubclass(value, BaseOrder), name
+
+
+def test_orders_compare_by_key():
+    unit = Unit(ENG, AMY, LON)
+    assert MoveOrder(unit, WAL) == MoveOrder(Unit(ENG, AMY, LON), WAL)
+    assert MoveOrder(unit, WAL) != MoveOrder(unit, YOR)
+    assert len({HoldOrder(unit), HoldOrder(unit), MoveOrder(unit, WAL)}) == 2
+    assert copy.copy(MoveByConvoyOrder(unit, [ECH, BRE])) == MoveByConvoyOrder(unit, [ECH, BRE])
+
+
+def test_destination_keys_are_hashable():
+    unit = Unit(ENG, FLT, NWY)
+    order = MoveOrder(unit, [STP, NCS])
+    assert order.key == (unit.key, MTO, (STP, NCS))
+    assert order == MoveOrder(unit, (STP, NCS))
+    assert len({order, gameboard.RetreatOrder(unit, [STP, NCS])}) == 2
+    assert MoveOrder(unit, STP).key == (unit.key, MTO, STP)
+
+
+def test_fork_has_its_own_results(board):
+    parent = board()
+    parent.process_ORD(fixtures.packed(fixtures.ORD[0]))
+    fork = parent.fork()
+    fork.process_ORD(fixtures.packed(fixtures.ORD[1]))
+    assert len(fork.results[(SPR, 1901)]) == 2
+    assert len(parent.results[(SPR, 1901)]) == 1
+
+
+def test_board_interns_per_position(board):
+    gameboard = board()
+    unit = gameboard.get_own_units()[0]
+    first = HoldOrder(Unit(unit.power, unit.unit_type, unit.key[2]))
+    gameboard.add(first)
+    gameboard.add(HoldOrder(unit))
+    assert gameboard.orders[gameboard.turn] == [first]
+    assert gameboard.orders[gameboard.turn][0] is first
+    assert gameboard.intern(Unit(unit.power, unit.unit_type, unit.key[2])) is unit
+
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert gameboard.intern(HoldOrder(unit)) is not first
+
+
+def test_missing_orders_sees_equal_units(board):
+    gameboard = board()
+    assert gameboard.missing_orders()
+    gameboard.add(WaiveOrder(ENG))
+    for unit in gameboard.get_own_units():
+        gameboard.add(HoldOrder(Unit(unit.power, unit.unit_type, unit.key[2])))
+    assert not gameboard.missing_orders()
+
+
+def test_doctests():
+    assert doctest.testmod(gameboard).failed == 0
@@ -0,0 +1,50 @@
+import fixtures
+import ponder
+from gameboard import MoveOrder
+from language import *
+
+
+def unit_at(gameboard, province):
+    for unit in gameboard.get_own_units():
+        if unit.province is province:
+            return unit
+
+
+def test_next_turns():
+    assert ponder.next_turns((SPR, 1901)) == [(FAL, 1901)]
+    assert ponder.next_turns((AUT, 1901)) == [(WIN, 1901), (SPR, 1902)]
+    assert ponder.next_turns((WIN, 1901)) == [(SPR, 1902)]
+
+
+def test_sco_predicted_only_after_fall(board):
+    spring = board()
+    assert all(sco is None for _, sco in ponder.predict(spring, []))
+    fall = board(now=fixtures.NOW_FAL)
+    assert all(sco is not None for _, sco in ponder.predict(fall, []))
+
+
+def test_predicted_centers_follow_occupation(board):
+    fall = board(now=fixtures.NOW_FAL)
+    fleet = unit_at(fall, NTH)
+    orders = [MoveOrder(fleet, NWY)]
+    units = ponder.apply_orders(fall, orders)
+    centers = ponder.predict_centers(fall, units)
+    assert NWY in centers[ENG]
+    assert all(NWY not in provinces for power, provinces in centers.items() if power is not ENG)
+
+
+def test_prediction_matches_real_position_hash(board):
+    fall = board(now=fixtures.NOW_FAL)
+    now, sco = ponder.predict(fall, [], 1)[0]
+    predicted = fall.fork()
+    predicted.process_SCO(sco)
+    predicted.process_NOW(now)
+
+    real = fall.fork()
+    real.process_SCO(sco.pack())
+    real.process_NOW(now.pack())
+    assert predicted.position_hash == real.position_hash
+
+    stale = fall.fork()
+    stale.process_NOW(now)
+    assert stale.position_hash != predicted.position_hash
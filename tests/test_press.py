@@ -0,0 +1,121 @@
+import socket
+import struct
+import time
+
+import fixtures
+import press
+import util
+from BaseClient import BaseClient
+from language import *
+from press import Press, Statement, Peace, Alliance, Draw, Demilitarize, OrderArrangement, Compound
+
+
+def frm(text):
+    return press.decode_FRM(fixtures.packed(text))
+
+
+def test_decode_proposals():
+    received = frm("FRM ( FRA 12 ) ( ENG GER ) ( PRP ( ALY ( ENG FRA ) VSS ( GER ) ) )")
+    assert received.sender is FRA
+    assert received.number == 12
+    assert received.recipients == (ENG, GER)
+    assert received.message == Statement(PRP, Alliance((ENG, FRA), (GER,)))
+
+    assert frm("FRM ( FRA ) ( ENG ) ( PRP ( DRW ) )").message == Statement(PRP, Draw())
+    assert frm("FRM ( FRA ) ( ENG ) ( PRP ( DRW ) )").number is None
+
+
+def test_decode_replies_and_compounds():
+    received = frm("FRM ( GER 3 ) ( ENG ) ( YES ( PRP ( AND ( PCE ( ENG GER ) ) ( DMZ ( ENG GER ) ( NTH HEL ) ) ) ) )")
+    assert received.message == Statement(YES, Statement(PRP, Compound(AND, (
+        Peace((ENG, GER)), Demilitarize((ENG, GER), (NTH, HEL))))))
+
+    received = frm("FRM ( GER 4 ) ( ENG ) ( PRP ( XDO ( ( GER FLT KIE ) MTO HOL ) ) )")
+    assert received.message == Statement(PRP, OrderArrangement(((GER, FLT, KIE), MTO, HOL)))
+
+
+def test_unknown_press_kept_as_tuples():
+    received = frm("FRM ( GER 5 ) ( ENG ) ( TRY ( PRP PCE ALY ) )")
+    assert received.message == Statement(TRY, ((PRP, PCE, ALY),))
+    assert press.as_tuple(received.message) == (TRY, (PRP, PCE, ALY))
+
+
+def test_encode_round_trip_and_cache():
+    encoder = press.Encoder()
+    proposal = Statement(PRP, Compound(ORR, (Peace((ENG, FRA)), Draw())))
+    data = encoder.encode_SND((FRA,), proposal)
+    assert data == fixtures.packed("SND ( FRA ) ( PRP ( ORR ( PCE ( ENG FRA ) ) ( DRW ) ) )")
+    assert encoder.encode_SND([FRA], proposal) is data
+    assert encoder.cache.stats() == {'SND': (1, 1)}
+
+    # The FRM the recipient gets back decodes to the same Statement
+    echoed = FRM._hex.to_bytes(2, 'big') + fixtures.packed("( ENG 1 )") + data[2:]
+    assert press.decode_FRM(echoed).message == proposal
+
+
+def test_encode_statement_holding_lists():
+    encoder = press.Encoder()
+    data = encoder.encode_SND([FRA], Statement(PRP, Peace([ENG, FRA])))
+    assert data == fixtures.packed("SND ( FRA ) ( PRP ( PCE ( ENG FRA ) ) )")
+    assert encoder.encode_SND((FRA,), Statement(PRP, Peace((ENG, FRA)))) is data
+    assert encoder.cache.stats() == {'SND': (1, 1)}
+
+
+def message(sender, number):
+    return Press(sender, number, (ENG,), Statement(PRP, Peace((ENG, sender))))
+
+
+def test_queue_policies():
+    queues = press.PressQueues(maxlen=2, policy=press.DROP_NEWEST)
+    assert queues.put(Press(FRA, 1, (ENG,), Statement(PRP, Draw())))
+    assert queues.put(Press(FRA, 2, (ENG,), Statement(PRP, Peace((ENG, FRA)))))
+    assert not queues.put(Press(FRA, 3, (ENG,), Statement(PRP, Peace((ENG, GER)))))
+    assert [queues.get().number, queues.get().number, queues.get()] == [1, 2, None]
+
+    queues = press.PressQueues(maxlen=2, policy=press.DROP_OLDEST)
+    for number in range(3):
+        queues.put(Press(FRA, number, (ENG,), Statement(PRP, press.Solo(number))))
+    assert [queues.get().number, queues.get().number] == [1, 2]
+    assert queues.dropped == 1
+
+    queues = press.PressQueues(maxlen=2, policy=press.COALESCE)
+    for number in range(5):
+        queues.put(message(FRA, number))
+    assert len(queues) == 1 and queues.coalesced == 4
+
+
+def test_senders_take_turns():
+    queues = press.PressQueues()
+    for number in range(3):
+        queues.put(Press(FRA, number, (ENG,), Statement(PRP, press.Solo(number))))
+    queues.put(message(GER, 0))
+    assert [queues.get().sender for _ in range(4)] == [FRA, GER, FRA, FRA]
+
+
+def test_press_flood_does_not_hold_up_NOW():
+    client_sock, server = socket.socketpair()
+    client = BaseClient()
+    client.sock = client_sock
+    client.connected = True
+    client.inbound_size = 4
+    client.start_io_threads()
+
+    frames = b''
+    for number in range(500):
+        sender = ('FRA', 'GER', 'ITA')[number % 3]
+        data = fixtures.packed("FRM ( %s %d ) ( ENG ) ( PRP ( SLO ( %s ) ) )" % (sender, number, sender))
+        frames += struct.pack('!bxh', util.DM, len(data)) + data
+    data = fixtures.packed(fixtures.NOW_SPR)
+    frames += struct.pack('!bxh', util.DM, len(data)) + data
+    server.sendall(frames)
+
+    item = client.inbound.get(timeout=5)
+    assert item is not None
+    recv_time, (msg_type, msg_len, message) = item
+    assert message == data
+    assert len(client.press_queues) == 3
+    assert client.press_queues.coalesced == 497
+
+    client.connected = False
+    server.close()
+    client.stop_io_threads()
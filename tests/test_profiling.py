@@ -0,0 +1,63 @@
+import os
+import pstats
+import subprocess
+import sys
+
+import fixtures
+from HoldBot import HoldBot
+from language import *
+
+
+class Bot(HoldBot):
+    def __init__(self):
+        HoldBot.__init__(self)
+        self.verbose = False
+        self.sent = []
+
+    def write(self, message, msg_type):
+        self.sent.append(message)
+
+
+def bot(directory, **options):
+    b = Bot()
+    b.power = ENG
+    b.map = fixtures.board(ENG, now=None)
+    b.enable_profiling(str(directory), game='test', **options)
+    return b
+
+
+def test_selected_seasons_are_profiled(tmp_path):
+    b = bot(tmp_path, seasons={FAL}, allocations=True)
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    b.handle_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert sorted(os.listdir(tmp_path)) == ['test_ENG_FAL1901.alloc.txt', 'test_ENG_FAL1901.prof']
+    stats = pstats.Stats(str(tmp_path / 'test_ENG_FAL1901.prof'))
+    assert any(name == 'generate_orders' for _, _, name in stats.stats)
+    assert len(b.sent) == 2
+
+
+def test_every_and_limit(tmp_path):
+    b = bot(tmp_path, every=2, limit=2)
+    for _ in range(3):
+        b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+        b.handle_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert b.profiler.profiled == 2
+    assert b.profiler.written == [str(tmp_path / 'test_ENG_SPR1901.prof')] * 2
+
+
+def test_generation_thread_is_profiled(tmp_path):
+    b = bot(tmp_path)
+    b.variant_options = {MTL: 60}
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    stats = pstats.Stats(str(tmp_path / 'test_ENG_SPR1901.prof'))
+    assert any(name == 'generate_orders' for _, _, name in stats.stats)
+
+
+def test_profilers_imported_only_when_used():
+    pydip = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pydip')
+    loaded = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys; import BaseClient; '
+        'print(sorted(set(sys.modules) & {"cProfile", "pstats", "tracemalloc"}))',
+    ], cwd=pydip, text=True)
+    assert loaded.strip() == '[]'
@@ -0,0 +1,116 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+import fixtures
+import notation
+from HoldBot import HoldBot
+from language import *
+
+
+def read_frame(conn):
+    header = conn.recv(4, socket.MSG_WAITALL)
+    if len(header) < 4:
+        return None
+    msg_type, length = struct.unpack('!bxh', header)
+    data = conn.recv(length, socket.MSG_WAITALL) if length else b''
+    return msg_type, data
+
+
+def send_dm(conn, text):
+    if isinstance(text, str):
+        data = notation.parse_packed(text)
+    elif isinstance(text, Message):
+        data = text.pack()
+    else:
+        data = text
+    conn.sendall(struct.pack('!bxh', 2, len(data)) + data)
+
+
+def diplomacy_messages(conn):
+    while True:
+        frame = read_frame(conn)
+        if frame is None:
+            return
+        if frame[0] == 2:
+            yield Message.translate_from_bytes(frame[1])
+
+
+class Server(threading.Thread):
+    '''
+    Accepts the bot, drops it after its NME, then plays the reconnected
+    bot through one phase.
+    '''
+    def __init__(self):
+        threading.Thread.__init__(self, daemon=True)
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(2)
+        self.port = self.listener.getsockname()[1]
+        self.received = []
+
+    def run(self):
+        conn, _ = self.listener.accept()
+        for msg in diplomacy_messages(conn):
+            self.received.append(msg)
+            if msg[0] is NME:
+                break
+        conn.close()
+
+        conn, _ = self.listener.accept()
+        try:
+            self.play(conn)
+        finally:
+            conn.close()
+
+    def play(self, conn):
+        for msg in diplomacy_messages(conn):
+            self.received.append(msg)
+            if msg[0] is IAM:
+                send_dm(conn, YES(msg))
+            elif msg == +SCO:
+                send_dm(conn, fixtures.packed(fixtures.SCO))
+            elif msg[0] is HST:
+                send_dm(conn, fixtures.packed(fixtures.ORD[0]))
+                send_dm(conn, fixtures.packed(fixtures.SCO))
+                send_dm(conn, fixtures.packed(fixtures.NOW_SPR))
+            elif msg == +NOW:
+                send_dm(conn, fixtures.packed(fixtures.NOW_FAL))
+            elif msg[0] is SUB:
+                send_dm(conn, +OFF)
+                break
+
+
+class Bot(HoldBot):
+    def __init__(self, port):
+        HoldBot.__init__(self, port=port)
+        self.verbose = False
+        self.reconnect = True
+        self.reconnect_delay = 0.01
+
+
+@pytest.mark.parametrize('threaded', [False, True])
+def test_resumes_with_IAM_and_catches_up(threaded):
+    server = Server()
+    server.start()
+    bot = Bot(server.port)
+    bot.threaded = threaded
+    bot.power = ENG
+    bot.passcode = 1234
+    bot.map = fixtures.board(ENG)
+    bot.play()
+    server.join(5)
+
+    commands = [msg[0] for msg in server.received]
+    assert commands == [NME, IAM, HST, SCO, NOW, SUB]
+    assert server.received[2] == HST(SPR, 1901)
+    assert bot.map.turn == (FAL, 1901)
+    assert (SPR, 1901) in bot.map.results
+    assert len(bot.recovery_times) == 1
+
+
+def test_no_resume_without_a_power():
+    bot = Bot(1)
+    assert not bot.resume()
@@ -0,0 +1,91 @@
+import array
+import pickle
+
+import pytest
+
+import fixtures
+import snapshot
+from gameboard import HoldOrder, MoveOrder, RetreatOrder, Unit
+from language import *
+
+
+def played(board, now=fixtures.NOW_AUT):
+    '''
+    Turkey's board with the spring 1901 results, at now.
+    '''
+    gameboard = board(TUR, fixtures.NOW_FAL)
+    for text in fixtures.ORD:
+        gameboard.process_ORD(fixtures.packed(text))
+    gameboard.process_NOW(fixtures.packed(now))
+    return gameboard
+
+
+def blank(board):
+    return board(TUR, now=None, sco=None)
+
+
+def test_round_trip(board):
+    original = played(board)
+    bulgaria = original.unit_by_key[(TUR, AMY, BUL)]
+    original.add(RetreatOrder(bulgaria, CON))
+    restored = snapshot.restore(snapshot.encode(original), blank(board))
+
+    assert restored.turn == original.turn
+    assert restored.power_played is TUR
+    assert restored.units == original.units
+    assert restored.center_owner == original.center_owner
+    assert restored.center_counts == original.center_counts
+    assert restored.retreat_opts == original.retreat_opts
+    assert restored.orders[restored.turn] == original.orders[original.turn]
+    assert restored.results == {(SPR, 1901): original.results[(SPR, 1901)]}
+    assert restored.position_hash == original.position_hash
+    assert restored.orders_hash == original.orders_hash
+    assert restored.get_dislodged() == original.get_dislodged()
+
+
+def test_template_is_untouched(board):
+    template = blank(board)
+    snapshot.restore(snapshot.encode(played(board)), template)
+    assert template.turn is None and template.results == {} and template.orders == {}
+
+
+def test_map_is_checked(board):
+    data = snapshot.encode(played(board))
+    other = blank(board)
+    other.map_id ^= 1
+    with pytest.raises(ValueError):
+        snapshot.restore(data, other)
+    with pytest.raises(ValueError):
+        snapshot.restore(b'\0' * 20, blank(board))
+
+
+def test_smaller_than_pickle(board):
+    original = played(board, fixtures.NOW_FAL)
+    for unit in original.get_own_units():
+        original.add(HoldOrder(unit))
+    data = snapshot.encode(original)
+    state = (original.units, original.supply_centers, original.retreat_opts,
+             original.orders[original.turn], original.results, original.turn)
+    assert len(data) < len(pickle.dumps(state)) / 2
+
+
+def test_corrupt_snapshots_raise_value_error(board):
+    # A board between games has no turn, so it can't have orders
+    template = blank(board)
+    template.orders[None] = [HoldOrder(Unit(TUR, AMY, CON))]
+    with pytest.raises(ValueError, match='no turn'):
+        snapshot.restore(snapshot.encode(template), blank(board))
+
+    data = array.array('H', snapshot.encode(played(board)))
+    for position, value in ((6, ENG._hex | 0x7F), (7, NOW._hex), (7, 0)):
+        corrupt = array.array('H', data)
+        corrupt[position] = value
+        with pytest.raises(ValueError):
+            snapshot.restore(corrupt.tobytes(), blank(board))
+    with pytest.raises(ValueError, match='corrupt'):
+        snapshot.restore(data[:len(data) // 2].tobytes(), blank(board))
+    # A unit of a power that isn't on the map
+    corrupt = array.array('H', data)
+    corrupt[10] = 0x41FF
+    with pytest.raises(ValueError, match='corrupt'):
+        snapshot.restore(corrupt.tobytes(), blank(board))
@@ -0,0 +1,106 @@
+import fixtures
+import submission
+from gameboard import *
+from HoldBot import HoldBot
+from language import *
+
+
+class Bot(HoldBot):
+    def __init__(self):
+        HoldBot.__init__(self)
+        self.verbose = False
+        self.incremental_orders = True
+        self.sent = []
+
+    def write(self, message, msg_type):
+        self.sent.append(Message.translate_from_bytes(message))
+
+
+def bot():
+    b = Bot()
+    b.power = ENG
+    b.map = fixtures.board(ENG, now=None)
+    b.handle_NOW(fixtures.packed(fixtures.NOW_SPR))
+    return b
+
+
+def unit(b, province):
+    return next(u for u in b.map.get_own_units() if u.province is province)
+
+
+def reply(b, text):
+    b.handle_diplomacy_message(fixtures.message(text))
+
+
+def test_only_changed_orders_are_resent():
+    b = bot()
+    assert [str(msg) for msg in b.sent] == [
+        'SUB ( ( ENG FLT EDI ) HLD ) ( ( ENG FLT LON ) HLD ) ( ( ENG AMY LVP ) HLD ) ']
+    b.sent = []
+    b.submit_orders()
+    assert b.sent == []
+
+    b.map.add(MoveOrder(unit(b, LON), NTH))
+    b.submit_orders()
+    assert [str(msg) for msg in b.sent] == ['SUB ( ( ENG FLT LON ) MTO NTH ) ']
+
+    b.sent = []
+    b.map.orders[b.map.turn].remove(HoldOrder(unit(b, EDI)))
+    b.submit_orders()
+    assert [str(msg) for msg in b.sent] == ['NOT ( SUB ( ( ENG FLT EDI ) HLD ) ) ']
+
+    stats = b.submissions.stats
+    assert stats['submissions'] == 4
+    assert stats['messages'] == 3
+    assert stats['orders_sent'] == 4
+    assert stats['retracted'] == 1
+    messages, nbytes = b.submissions.savings()
+    assert messages == 1 and nbytes > 0
+
+
+def test_thx_tracks_what_the_server_holds():
+    b = bot()
+    reply(b, 'THX ( ( ENG FLT LON ) HLD ) ( MBV )')
+    reply(b, 'THX ( ( ENG AMY LVP ) HLD ) ( NSU )')
+    assert list(b.submissions.acknowledged) == [unit(b, LON).key]
+    assert b.submissions.stats['rejected'] == 1
+
+    # The refused order is sent again
+    b.sent = []
+    b.submit_orders()
+    assert [str(msg) for msg in b.sent] == ['SUB ( ( ENG AMY LVP ) HLD ) ']
+
+    # A THX for an order that has since been replaced is ignored
+    b.map.add(MoveOrder(unit(b, LON), NTH))
+    b.submit_orders()
+    reply(b, 'THX ( ( ENG FLT LON ) HLD ) ( MBV )')
+    assert b.submissions.stats['acknowledged'] == 1
+
+
+def test_refused_retraction_is_retried():
+    b = bot()
+    reply(b, 'THX ( ( ENG FLT EDI ) HLD ) ( MBV )')
+    b.map.orders[b.map.turn].remove(HoldOrder(unit(b, EDI)))
+    b.submit_orders()
+    reply(b, 'REJ ( NOT ( SUB ( ( ENG FLT EDI ) HLD ) ) )')
+    b.sent = []
+    b.submit_orders()
+    assert [str(msg) for msg in b.sent] == ['NOT ( SUB ( ( ENG FLT EDI ) HLD ) ) ']
+    reply(b, 'YES ( NOT ( SUB ( ( ENG FLT EDI ) HLD ) ) )')
+    assert unit(b, EDI).key not in b.submissions.acknowledged
+
+
+def test_new_phase_starts_afresh():
+    b = bot()
+    b.sent = []
+    b.handle_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert len(b.sent) == 1 and len(b.sent[0].fold()) == 4
+    assert [stats['turn'] for stats in b.submissions.history] == [(SPR, 1901)]
+
+
+def test_waives_are_counted_per_power():
+    submissions = submission.Submissions()
+    assert [str(msg) for msg in submissions.update([WaiveOrder(ENG), WaiveOrder(ENG)])] == \
+        ['SUB ( ENG WVE ) ( ENG WVE ) ']
+    assert [str(msg) for msg in submissions.update([WaiveOrder(ENG)])] == ['NOT ( SUB ( ENG WVE ) ) ']
+    assert submissions.update([WaiveOrder(ENG)]) == []
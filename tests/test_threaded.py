@@ -0,0 +1,114 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+import util
+from channel import MessageQueue
+from HoldBot import HoldBot
+from language import *
+
+
+def frame(msg):
+    data = msg.pack()
+    return struct.pack('!bxh', util.DM, len(data)) + data
+
+
+def test_urgent_items_skip_ahead_in_order():
+    queue = MessageQueue()
+    queue.put('NOW')
+    queue.put('OFF', urgent=True)
+    queue.put('ORD')
+    queue.put('TME', urgent=True)
+    assert [queue.get(0) for _ in range(4)] == ['OFF', 'TME', 'NOW', 'ORD']
+
+
+def test_full_queue_blocks_normal_puts_only():
+    queue = MessageQueue(maxsize=1)
+    queue.put('NOW')
+    queue.put('OFF', urgent=True)
+    put = threading.Thread(target=queue.put, args=('ORD',))
+    put.start()
+    put.join(0.05)
+    assert put.is_alive()
+    assert queue.get(0) == 'OFF'
+    assert queue.get(0) == 'NOW'
+    put.join(2)
+    assert queue.get(0) == 'ORD'
+    queue.close()
+    assert queue.get() is None
+
+
+def test_reader_thread_puts_only_off_and_tme_first():
+    bot = HoldBot()
+    bot.verbose = False
+    bot.sock, server = socket.socketpair()
+    bot.connected = True
+    bot.inbound = MessageQueue()
+    messages = [NOW(SPR, 1901), SMR(SPR, 1901), TME(30), DRW, HUH(ERR), OFF]
+    server.sendall(b''.join(frame(msg if isinstance(msg, Message) else +msg)
+                            for msg in messages))
+    server.close()
+    bot.read_loop()
+    commands = []
+    while True:
+        item = bot.inbound.get(0)
+        if item is None:
+            break
+        commands.append(Message.translate_from_bytes(item[1][2])[0])
+    assert commands == [TME, OFF, NOW, SMR, DRW, HUH]
+
+
+class Server(threading.Thread):
+    '''
+    Waits for the bot's NME, answers it with message, then reads until
+    the bot closes the connection.
+    '''
+    def __init__(self, message):
+        threading.Thread.__init__(self, daemon=True)
+        self.message = message
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.closed = False
+
+    def run(self):
+        conn, _ = self.listener.accept()
+        conn.settimeout(5)
+        try:
+            while True:
+                header = conn.recv(4, socket.MSG_WAITALL)
+                if len(header) < 4:
+                    self.closed = True
+                    return
+                msg_type, length = struct.unpack('!bxh', header)
+                data = conn.recv(length, socket.MSG_WAITALL) if length else b''
+                if msg_type == util.DM and Message.translate_from_bytes(data)[0] is NME:
+                    conn.sendall(frame(self.message))
+        finally:
+            conn.close()
+            self.listener.close()
+
+
+@pytest.mark.parametrize('message', [+OFF, SLO(ENG), +DRW, SMR(SPR, 1901)])
+def test_clean_shutdown(message):
+    before = set(threading.enumerate())
+    server = Server(message)
+    server.start()
+    bot = HoldBot(port=server.port)
+    bot.verbose = False
+    bot.threaded = True
+    bot.enable_metrics()
+    player = threading.Thread(target=bot.play, daemon=True)
+    player.start()
+    player.join(5)
+    assert not player.is_alive()
+    server.join(5)
+    assert server.closed
+    assert bot.finished and not bot.connected
+    assert bot.io_threads == [] and bot.inbound is None and bot.outbound is None
+    assert not [thread for thread in set(threading.enumerate()) - before
+                if thread.name in ('pydip-reader', 'pydip-writer')]
+    assert bot.metrics.snapshot()['frames_in'] == {str(message[0]): 1}
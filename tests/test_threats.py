@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fixtures
+import threats
+from language import *
+from threats import ThreatMap
+
+
+@pytest.fixture(params=[False, True], ids=['lists', 'numpy'])
+def use_numpy(request):
+    if request.param and threats.load_numpy() is None:
+        pytest.skip('NumPy is not installed')
+    return request.param
+
+
+def brute_force(gameboard):
+    counts = {}
+    for power, units in gameboard.units.items():
+        for unit in units:
+            if unit in gameboard.retreat_opts:
+                continue
+            provinces = set(adj[0] if isinstance(adj, tuple) else adj
+                            for adj in gameboard.get_moveable_adjacencies(unit))
+            for province in provinces:
+                counts[province, power] = counts.get((province, power), 0) + 1
+    return counts
+
+
+def threat_map_of(gameboard, use_numpy):
+    gameboard.threat_map = ThreatMap(gameboard, use_numpy)
+    gameboard.threat_map.update(gameboard)
+    assert gameboard.threat_map.numpy == use_numpy
+    return gameboard.threat_map
+
+
+def rows(matrix):
+    return [[int(count) for count in row] for row in matrix]
+
+
+def check(gameboard, threat_map):
+    counts = brute_force(gameboard)
+    for province in threat_map.provinces:
+        for power in threat_map.powers:
+            assert threat_map.reach(province, power) == counts.get((province, power), 0)
+
+
+def test_counts_match_adjacencies(board, use_numpy):
+    gameboard = board()
+    threat_map = threat_map_of(gameboard, use_numpy)
+    check(gameboard, threat_map)
+    assert threat_map.reach(ECH, ENG) == 1
+    assert threat_map.threat(ECH, ENG) == 1
+    assert threat_map.powers_reaching(BUR) == {FRA: 2, GER: 1}
+    assert ECH in threat_map.contested(ENG)
+
+
+def test_updated_incrementally_on_now(board, use_numpy):
+    gameboard = board()
+    threat_map = threat_map_of(gameboard, use_numpy)
+    for now in (fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN, fixtures.NOW_SPR):
+        gameboard.process_NOW(fixtures.packed(now))
+        assert gameboard.get_threat_map() is threat_map
+        check(gameboard, threat_map)
+        fresh = ThreatMap(gameboard, use_numpy)
+        fresh.update(gameboard)
+        assert rows(fresh.matrix()) == rows(threat_map.matrix())
+
+
+def test_update_looks_only_at_changed_units(board, use_numpy):
+    gameboard = board()
+    threat_map = threat_map_of(gameboard, use_numpy)
+    looked_at = []
+    location = threat_map.location
+    threat_map.location = lambda unit: looked_at.append(unit) or location(unit)
+
+    fall = fixtures.NOW_SPR.replace('SPR', 'FAL').replace('ENG FLT LON', 'ENG FLT NTH')
+    gameboard.process_NOW(fixtures.packed(fall))
+    assert sorted(map(str, looked_at)) == ['ENG FLT LON', 'ENG FLT NTH']
+    check(gameboard, threat_map)
+
+    # A unit dislodged where it stood, then retreating
+    del looked_at[:]
+    autumn = fall.replace('FAL', 'AUT').replace('( TUR AMY CON )', '( TUR AMY CON MRT ( BUL ) ) ( RUS FLT CON )')
+    autumn = autumn.replace(' ( RUS FLT SEV )', '')
+    gameboard.process_NOW(fixtures.packed(autumn))
+    assert sorted(map(str, looked_at)) == ['RUS FLT CON', 'RUS FLT SEV', 'TUR AMY CON']
+    check(gameboard, threat_map)
+    del looked_at[:]
+    gameboard.process_NOW(fixtures.packed(autumn.replace('AUT', 'WIN').replace('TUR AMY CON MRT ( BUL )', 'TUR AMY BUL')))
+    assert sorted(map(str, looked_at)) == ['TUR AMY BUL', 'TUR AMY CON']
+    check(gameboard, threat_map)
+
+
+def test_numpy_and_lists_agree(board):
+    if threats.load_numpy() is None:
+        pytest.skip('NumPy is not installed')
+    gameboard = board(now=fixtures.NOW_AUT)
+    with_numpy = threat_map_of(gameboard, True).copy()
+    assert rows(with_numpy.matrix()) == threat_map_of(gameboard, False).matrix()
+
+
+def test_numpy_imported_only_when_used():
+    pydip = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pydip')
+    loaded = subprocess.check_output([
+        sys.executable, '-c', 'import sys; import gameboard; print("numpy" in sys.modules)',
+    ], cwd=pydip, text=True)
+    assert loaded.strip() == 'False'
+
+
+def test_fork_has_its_own_counts(board, use_numpy):
+    gameboard = board()
+    before = rows(threat_map_of(gameboard, use_numpy).matrix())
+    fork = gameboard.fork()
+    fork.clear_units()
+    assert fork.get_threat_map().reachable(ENG) == []
+    assert rows(gameboard.get_threat_map().matrix()) == before
@@ -0,0 +1,45 @@
+import fixtures
+import zobrist
+from gameboard import Unit
+from language import *
+
+
+def test_units_that_stay_are_reused(board):
+    gameboard = board(now=fixtures.NOW_FAL)
+    venice = gameboard.unit_by_key[(ITA, AMY, VEN)]
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_AUT))
+    assert gameboard.unit_by_key[(ITA, AMY, VEN)] is venice
+    assert gameboard.intern(Unit(ITA, AMY, VEN)) is venice
+
+
+def test_changes(board):
+    gameboard = board(now=fixtures.NOW_FAL)
+    seen = []
+    gameboard.now_listeners.append(lambda b, changes: seen.append(changes))
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_AUT))
+    changes = gameboard.get_unit_changes()
+    assert seen == [changes]
+    moved = set((old.key, new.key) for old, new in changes.moved)
+    assert ((ENG, FLT, NWG), (ENG, FLT, NWY)) in moved
+    assert ((AUS, AMY, SER), (AUS, AMY, BUL)) in moved
+    assert ((ITA, FLT, ION), (ITA, FLT, ALB)) in moved
+    # The dislodged Turkish army stayed where it was
+    assert gameboard.unit_by_key[(TUR, AMY, BUL)] in changes.dislodged
+    assert set(unit.key for unit in changes.dislodged) == {(TUR, AMY, BUL), (AUS, FLT, ALB)}
+    assert changes.built == [] and changes.removed == []
+
+
+def test_adjustments_build_and_remove(board):
+    gameboard = board(now=fixtures.NOW_WIN)
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    changes = gameboard.get_unit_changes()
+    assert changes.moved == []
+    assert len(changes.built) == len(changes.removed) > 0
+
+
+def test_hash_after_diffs(board):
+    gameboard = board()
+    for now in (fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN, fixtures.NOW_SPR):
+        gameboard.process_NOW(fixtures.packed(now))
+        units = [unit for units in gameboard.units.values() for unit in units]
+        assert gameboard.position_hash == zobrist.position_hash(units, gameboard.supply_centers, gameboard.turn)
@@ -0,0 +1,55 @@
+import doctest
+
+import fixtures
+import zobrist
+from gameboard import Unit, HoldOrder, MoveOrder
+from language import *
+
+
+def all_units(gameboard):
+    return [unit for units in gameboard.units.values() for unit in units]
+
+
+def reference(gameboard):
+    return zobrist.position_hash(all_units(gameboard), gameboard.supply_centers, gameboard.turn)
+
+
+def test_doctests():
+    assert doctest.testmod(zobrist).failed == 0
+
+
+def test_incremental_hash_matches_reference(board):
+    gameboard = board(now=None, sco=None)
+    for text in [fixtures.NOW_SPR, fixtures.SCO, fixtures.NOW_FAL, fixtures.NOW_AUT, fixtures.NOW_WIN,
+                 "SCO ( ENG EDI LON LVP ) ( UNO BEL )", fixtures.NOW_SPR]:
+        data = fixtures.packed(text)
+        if text.split()[0] == 'NOW':
+            gameboard.process_NOW(data)
+        else:
+            gameboard.process_SCO(data)
+        assert gameboard.position_hash == reference(gameboard)
+    gameboard.clear_units()
+    assert gameboard.position_hash == reference(gameboard)
+
+
+def test_same_position_same_hash(board):
+    a, b = board(ENG, now=None, sco=None), board(FRA, now=None, sco=None)
+    a.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    a.process_SCO(fixtures.packed(fixtures.SCO))
+    b.process_SCO(fixtures.packed(fixtures.SCO))
+    b.process_NOW(fixtures.packed(fixtures.NOW_FAL))
+    assert a.position_hash != b.position_hash
+    b.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    assert a.position_hash == b.position_hash
+
+
+def test_orders_hash_tracks_replacement(board):
+    gameboard = board(now=None, sco=None)
+    gameboard.process_NOW(fixtures.packed(fixtures.NOW_SPR))
+    edi = gameboard.get_own_units()[0]
+    gameboard.add(HoldOrder(edi))
+    gameboard.add(MoveOrder(Unit(ENG, FLT, EDI), CLY))
+    orders = gameboard.orders[gameboard.turn]
+    assert len(orders) == 1
+    assert gameboard.orders_hash == zobrist.orders_hash(orders)
+    assert str(gameboard.get_orders()) == '( ( ENG FLT EDI ) MTO CLY ) '
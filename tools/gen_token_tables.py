@@ -0,0 +1,89 @@
+'''
+Generates the token tables in pydip/language.py from pydip/tokens.spec,
+so that importing language only has to read a few literal tuples. The
+tables are written between the BEGIN and END markers in language.py.
+
+    python tools/gen_token_tables.py           # rewrite the tables
+    python tools/gen_token_tables.py --check   # fail if they are stale
+'''
+import os
+import sys
+
+PYDIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pydip')
+SPEC = os.path.join(PYDIP, 'tokens.spec')
+OUTPUT = os.path.join(PYDIP, 'language.py')
+BEGIN = '# BEGIN GENERATED TOKEN TABLES'
+END = '# END GENERATED TOKEN TABLES'
+
+
+def parse(lines):
+    '''
+    Returns ([(value, tla) ...], {category byte: name}).
+    '''
+    tokens = []
+    categories = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('%category'):
+            _, bytes_range, name = line.split(None, 2)
+            first, _, last = bytes_range.partition('-')
+            for cat_byte in range(int(first, 16), int(last or first, 16) + 1):
+                categories[cat_byte] = name
+            continue
+        first, *tlas = line.split()
+        for offset, tla in enumerate(tlas):
+            tokens.append((int(first, 16) + offset, tla))
+    values = [value for value, tla in tokens]
+    if len(set(values)) != len(values):
+        raise ValueError('duplicate token values in spec')
+    for value in values:
+        if value >> 8 not in categories:
+            raise ValueError('0x%04X has no category' % value)
+    return tokens, categories
+
+
+def render(tokens, categories):
+    lines = [
+        BEGIN,
+        '# Generated by tools/gen_token_tables.py from tokens.spec. Do not edit.',
+        '',
+        '# Token values, and their TLAs in the same order',
+        'VALUES = (',
+    ]
+    for i in range(0, len(tokens), 10):
+        lines.append('    ' + ' '.join('0x%04X,' % value for value, tla in tokens[i:i + 10]))
+    lines.append(')')
+    lines.append('TLAS = (')
+    for i in range(0, len(tokens), 16):
+        lines.append("    '%s '" % ' '.join(tla for value, tla in tokens[i:i + 16]))
+    lines.append(').split()')
+    lines.append('')
+    lines.append('# Category name by the high byte of a value')
+    lines.append('CATEGORIES = (')
+    for i in range(0, 256, 8):
+        lines.append('    ' + ' '.join('%r,' % categories.get(b) for b in range(i, i + 8)))
+    lines.append(')')
+    lines.append(END)
+    return '\n'.join(lines)
+
+
+def main():
+    with open(SPEC) as f:
+        tokens, categories = parse(f)
+    with open(OUTPUT) as f:
+        current = f.read()
+    start = current.index(BEGIN)
+    end = current.index(END) + len(END)
+    source = current[:start] + render(tokens, categories) + current[end:]
+    if '--check' in sys.argv:
+        if source != current:
+            sys.exit('token tables in language.py are out of date; run tools/gen_token_tables.py')
+        return
+    with open(OUTPUT, 'w') as f:
+        f.write(source)
+
+
+if __name__ == '__main__':
+    main()